@@ -0,0 +1,261 @@
+# analytics_store.py
+# Process-wide analytics store shared by every dashboard session.
+# Holds the parsed data.json, team indexes and a memory-budgeted LRU of
+# per-filter aggregates. Safe to use from many Streamlit script threads.
+# With a disk cache attached, parsed data and persistable aggregates
+# survive restarts. A store built for a newer data.json can take over the
+# incremental aggregates (INCREMENTAL) of the store it replaces: when the new
+# data only adds matches, they are extended with the new matches instead of
+# being rebuilt.
+
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from disk_cache import MISSING, DiskCache, file_hash
+from match_model import Match
+from stats_engine import ENGINE_VERSION, load_data
+from veto_model import VetoModel
+
+DEFAULT_BUDGET_MB = 256
+# Aggregates over every match that can absorb new matches (see AnalyticsStore.incremental)
+INCREMENTAL = (("elo",), ("form_index",))
+
+
+def data_version(path: str) -> str:
+    """Cheap version tag for a data file: mtime + size"""
+    st_info = os.stat(path)
+    return f"{st_info.st_mtime_ns}-{st_info.st_size}"
+
+
+@lru_cache(maxsize=None)
+def slot_names(cls: type) -> tuple:
+    """Every __slots__ attribute of cls and its bases"""
+    names = []
+    for base in cls.__mro__:
+        slots = base.__dict__.get("__slots__", ())
+        names.extend([slots] if isinstance(slots, str) else slots)
+    return tuple(n for n in names if n not in ("__dict__", "__weakref__"))
+
+
+def approx_size(obj: Any, shared: frozenset = frozenset()) -> int:
+    """Approximate deep size in bytes of JSON-like structures and objects (plain or __slots__) holding them;
+    objects whose id is in shared (already paid for elsewhere) count as references only"""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or id(o) in shared:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        else:
+            if hasattr(o, "__dict__"):
+                stack.append(vars(o))
+            for name in slot_names(type(o)):
+                stack.append(getattr(o, name, None))
+    return total
+
+
+def added_matches(old: List[Match], new: List[Match]) -> Optional[List[Match]]:
+    """Matches of new whose ids old doesn't have; None when old matches were edited or removed
+    (or ids aren't unique), i.e. when aggregates over old can't just be extended"""
+    by_id = {m.id: m for m in new}
+    if None in by_id or len(by_id) != len(new) or len(old) > len(new):
+        return None
+    for m in old:
+        cur = by_id.get(m.id)
+        if cur is None or cur.fields() != m.fields():
+            return None
+    old_ids = {m.id for m in old}
+    return [m for m in new if m.id not in old_ids]
+
+
+class AnalyticsStore:
+    """Parsed match data plus a shared, thread-safe aggregate cache.
+
+    Values handed out by the store are shared between sessions and must be
+    treated as read-only by callers.
+    """
+
+    def __init__(self, path: str, budget_mb: int = None, cache_dir: str = None, previous: "AnalyticsStore" = None):
+        if budget_mb is None:
+            budget_mb = int(os.environ.get("VAL_STORE_BUDGET_MB", DEFAULT_BUDGET_MB))
+        self.path = path
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.used_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._pending: Dict[Hashable, threading.Event] = {}
+        self._local = threading.local()
+        self.cache_dir = cache_dir
+        self.disk: DiskCache = None
+        self._carried: Dict[Hashable, Any] = {}
+        self.added: List[Match] = []
+        self.load()
+        if previous is not None:
+            self.take_over(previous)
+
+    # --- Parsed data + indexes ---
+    def load(self) -> None:
+        self.data_hash = data_hash = file_hash(self.path)
+        self.version = data_hash[:16]
+        if self.cache_dir:
+            self.disk = DiskCache(self.cache_dir, f"v{ENGINE_VERSION}-{data_hash}")
+        parsed = self.disk.get("data") if self.disk else MISSING
+        if parsed is MISSING:
+            parsed = load_data(self.path)
+            if self.disk:
+                self.disk.put("data", parsed)
+        self.set_data(*parsed)
+
+    def set_data(self, teams: List[str], matches: List[Match]) -> None:
+        by_team: Dict[str, List[int]] = {}
+        for i, m in enumerate(matches):
+            for name in (m.left, m.right):
+                if name:
+                    by_team.setdefault(name, []).append(i)
+        with self._lock:
+            self.teams = sorted(teams)
+            self.matches = matches
+            self.by_team = by_team
+            # Aggregates referencing the loaded matches don't hold them: budget only what they add
+            self._shared = frozenset(map(id, matches))
+            self._entries.clear()
+            self.used_bytes = 0
+
+    def seed_precomputed(self, path: str) -> bool:
+        """Preload aggregates written by build_data_json.py --precompute, if they match this data"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                pre = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if pre.get("data_hash") != self.data_hash or pre.get("engine_version") != ENGINE_VERSION:
+            return False
+        sig = tuple(pre["filter"])
+        self._put(("leaderboard", sig), pre["leaderboard"])
+        for team, stats in pre["team_stats"].items():
+            self._put(("team_stats", team, sig), stats)
+        # Per-patch segments, keyed like a single-patch filter so multi-patch selections can merge them
+        for patch, seg in pre.get("segments", {}).items():
+            seg_sig = (("patch", patch),)
+            self._put(("leaderboard_counts", seg_sig), seg["leaderboard_counts"])
+            for team, stats in seg["team_stats"].items():
+                self._put(("team_stats", team, seg_sig), stats)
+        if "veto_model" in pre:
+            self._put(("veto_model",), VetoModel.from_dict(pre["veto_model"]))
+        return True
+
+    def take_over(self, previous: "AnalyticsStore") -> bool:
+        """Keep previous's in-memory INCREMENTAL aggregates if this data only adds matches to its data"""
+        with previous._lock:
+            carried = {key: previous._entries[key][0] for key in INCREMENTAL if key in previous._entries}
+        added = added_matches(previous.matches, self.matches) if carried else None
+        if added is None:
+            return False
+        with self._lock:
+            self._carried, self.added = carried, added
+        return True
+
+    def matches_for(self, team: str) -> List[Match]:
+        return [self.matches[i] for i in self.by_team.get(team, [])]
+
+    # --- Aggregate cache ---
+    def aggregate(self, key: Hashable, compute: Callable[[], Any], persist: bool = True) -> Any:
+        """Return the cached value for key, computing it at most once across threads.
+
+        Persistable values are also read from / written to the disk cache;
+        pass persist=False for values that only reference already-loaded
+        matches (filtered lists), which are cheaper to rebuild than to unpickle.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self._local.outcome = "hit"
+                    return entry[0]
+                event = self._pending.get(key)
+                owner = event is None
+                if owner:
+                    event = self._pending[key] = threading.Event()
+                    self.misses += 1
+            if not owner:
+                # Another session is already computing this key; reuse its result
+                event.wait()
+                continue
+            try:
+                value = self.disk.get(key) if (persist and self.disk) else MISSING
+                outcome = "disk"
+                if value is MISSING:
+                    value = compute()
+                    outcome = "miss"
+                    if persist and self.disk:
+                        self.disk.put(key, value)
+                self._put(key, value)
+                self._local.outcome = outcome
+                return value
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+                event.set()
+
+    def incremental(self, key: Hashable, build: Callable[[], Any], extend: Callable[[Any, List[Match]], Any],
+                    persist: bool = True) -> Any:
+        """aggregate() for an INCREMENTAL key: extend(previous value, added matches) when the replaced
+        store handed its value over, else build(). extend must not modify the previous value,
+        which sessions still on the old data may be reading"""
+        def compute():
+            with self._lock:
+                old = self._carried.pop(key, None)
+            return build() if old is None else extend(old, self.added)
+        return self.aggregate(key, compute, persist)
+
+    def cached(self, key: Hashable) -> bool:
+        """Whether key is in memory right now (no hit/miss accounting)"""
+        with self._lock:
+            return key in self._entries
+
+    def last_outcome(self) -> str:
+        """"hit", "disk" or "miss" for this thread's most recent aggregate() call"""
+        return getattr(self._local, "outcome", None)
+
+    def reset_outcome(self) -> None:
+        self._local.outcome = None
+
+    def _put(self, key: Hashable, value: Any) -> None:
+        size = approx_size(value, self._shared)
+        with self._lock:
+            if size > self.budget_bytes:
+                return
+            # A key computed again (a disk read racing a compute, a reseed) replaces the old entry
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.used_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.used_bytes += size
+            while self.used_bytes > self.budget_bytes and self._entries:
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self.used_bytes -= old_size
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries), "used_mb": self.used_bytes / 1024 / 1024,
+                "budget_mb": self.budget_bytes / 1024 / 1024,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+            }
@@ -0,0 +1,314 @@
+# api_server.py
+# Read-only HTTP JSON API over the analytics the dashboard shows (no Streamlit).
+# Runs on the same AnalyticsStore: parsed data, the filter engine and stats
+# aggregates are built once per process (warm from stats.json and the disk
+# cache), under the same keys the dashboard uses. Every encoded response is
+# cached in the store as well, keyed by route + canonical filter query, with
+# its gzip variant compressed once. ETags come from the data hash and
+# Last-Modified from data.json's mtime, so clients revalidate with 304s; a new
+# data.json is picked up within RELOAD_CHECK_S and changes every ETag.
+# Usage: python api_server.py [--data web/data.json] [--host 127.0.0.1] [--port 8502]
+#
+# Endpoints (GET/HEAD; [F] = honours the filter parameters):
+#   /api/meta                        data version, counts, patches, filter options
+#   /api/teams                       team names
+#   /api/leaderboard            [F]  leaderboard rows
+#   /api/team/<team>            [F]  team stats (series, maps, pistols, sides, bans)
+#   /api/team/<team>/maps       [F]  one row per map
+#   /api/team/<team>/matches    [F]  the team's matches, newest first (?limit=&offset=)
+#   /api/h2h/<team1>/<team2>    [F]  head-to-head record and matches
+#   /api/matches                [F]  matches, newest first (?limit=&offset=)
+#   /api/ratings                     Elo table (all matches)
+# Filters: region, from, to (ISO dates), patch (repeatable), map, opponent,
+# opponent_region, format, picked_by, agent -- see filter_engine.py.
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+from datetime import date
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from analytics_store import AnalyticsStore, data_version
+from filter_engine import FORMATS, PICKED_BY, FilterEngine, canonical
+from h2h_matrix import H2HMatrix
+from patches import patch_spans
+from ratings import EloRatings
+from stats_engine import REGION_TEAMS, calc_wr, get_leaderboard, get_team_stats
+
+RELOAD_CHECK_S = 5.0
+GZIP_MIN_BYTES = 1024
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+VALUE_FILTERS = ("region", "opponent_region", "opponent", "format", "map", "picked_by", "agent")
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_filters(query: Dict[str, List[str]]) -> tuple:
+    """Canonical filter query from URL parameters (the last value wins, except for patch)"""
+    preds = []
+    for kind in VALUE_FILTERS:
+        if kind in query:
+            preds.append((kind, query[kind][-1]))
+    for kind, allowed in (("region", REGION_TEAMS), ("opponent_region", REGION_TEAMS),
+                          ("format", FORMATS), ("picked_by", PICKED_BY)):
+        if kind in query and query[kind][-1] not in allowed:
+            raise ApiError(400, f"{kind} must be one of {', '.join(allowed)}")
+    since, until = query.get("from", [None])[-1], query.get("to", [None])[-1]
+    for d in (since, until):
+        try:
+            if d: date.fromisoformat(d)
+        except ValueError:
+            raise ApiError(400, f"bad date {d!r} (use YYYY-MM-DD)")
+    if since or until:
+        preds.append(("date", since, until))
+    patches = sorted({p for v in query.get("patch", ()) for p in v.split(",") if p})
+    if patches:
+        preds.append(("patch",) + tuple(patches))
+    return canonical(preds)
+
+
+def parse_page(query: Dict[str, List[str]]) -> Tuple[int, int]:
+    try:
+        limit = int(query.get("limit", [DEFAULT_LIMIT])[-1])
+        offset = int(query.get("offset", [0])[-1])
+    except ValueError:
+        raise ApiError(400, "limit and offset must be integers")
+    if limit < 1 or offset < 0:
+        raise ApiError(400, "limit must be positive and offset non-negative")
+    return min(limit, MAX_LIMIT), offset
+
+
+def page(matches: list, limit: int, offset: int) -> dict:
+    newest = sorted(matches, key=lambda m: m.date or "", reverse=True)
+    return {"total": len(newest), "offset": offset, "limit": limit,
+            "matches": [m.to_dict() for m in newest[offset:offset + limit]]}
+
+
+class Api:
+    """Routes a request to the store's aggregates; answers are cached as encoded bytes"""
+
+    def __init__(self, path: str, cache_dir: str = None):
+        self.path, self.cache_dir = path, cache_dir
+        self._lock = threading.Lock()
+        self._checked = float("-inf")
+        self.version = None
+        self.refresh()
+
+    # --- Data version ---
+    def refresh(self) -> Tuple[AnalyticsStore, str]:
+        """(store, Last-Modified) for the current data.json; the store is replaced, not mutated, when
+        the file changes, so in-flight requests finish on the old one"""
+        now = time.monotonic()
+        if now - self._checked >= RELOAD_CHECK_S:
+            with self._lock:
+                if now - self._checked >= RELOAD_CHECK_S:
+                    version = data_version(self.path)
+                    if version != self.version:
+                        previous = self.current[0] if self.version else None
+                        store = AnalyticsStore(self.path, cache_dir=self.cache_dir, previous=previous)
+                        store.seed_precomputed(os.path.join(os.path.dirname(self.path), "stats.json"))
+                        self.current = (store, formatdate(os.stat(self.path).st_mtime, usegmt=True))
+                        self.version = version
+                    self._checked = now
+        return self.current
+
+    # --- Aggregates (same keys as the dashboard) ---
+    @staticmethod
+    def engine(store: AnalyticsStore) -> FilterEngine:
+        return store.aggregate(("filter_engine",), lambda: FilterEngine(store.matches))
+
+    def rows(self, store: AnalyticsStore, sig: tuple):
+        engine = self.engine(store)
+        mask = lambda pred: store.aggregate(("filter_mask", pred), lambda: engine.mask(pred), persist=False)
+        return store.aggregate(("filter_rows", sig), lambda: engine.select(sig, mask), persist=False)
+
+    def filtered(self, store: AnalyticsStore, sig: tuple) -> list:
+        return store.aggregate(("filtered", sig), lambda: [
+            store.matches[i] for i in self.engine(store).match_index(self.rows(store, sig))], persist=False)
+
+    def team_matches(self, store: AnalyticsStore, team: str, sig: tuple) -> list:
+        return store.aggregate(("team_matches", team, sig), lambda: [
+            store.matches[i] for i in self.engine(store).team_index(self.rows(store, sig), team)], persist=False)
+
+    def team_stats(self, store: AnalyticsStore, team: str, sig: tuple) -> dict:
+        return store.aggregate(("team_stats", team, sig),
+                               lambda: get_team_stats(team, self.team_matches(store, team, sig))[0])
+
+    # --- Routes ---
+    def meta(self, store, sig, query):
+        engine = self.engine(store)
+        return {"version": store.version, "teams": len(store.teams),
+                "matches": len(store.matches), "patches": {p: list(s) for p, s in patch_spans(store.matches).items()},
+                "filters": engine.options()}
+
+    def leaderboard(self, store, sig, query):
+        return store.aggregate(("leaderboard", sig), lambda: get_leaderboard(
+            store.teams, self.filtered(store, sig), {t: self.team_matches(store, t, sig) for t in store.teams}))
+
+    def team(self, store, sig, query, team):
+        return self.team_stats(store, team, sig)
+
+    def team_maps(self, store, sig, query, team):
+        s = self.team_stats(store, team, sig)
+        return [{"map": mn, "wins": d["wins"], "losses": d["losses"], "win_pct": calc_wr(d["wins"], d["losses"]),
+                 "picks": d["picks"], "bans": d["bans"], "pistol_wins": d.get("pistol_wins", 0),
+                 "pistol_losses": d.get("pistol_losses", 0), "ban_1st": s["ban_1st"].get(mn, 0),
+                 "ban_2nd": s["ban_2nd"].get(mn, 0)} for mn, d in sorted(s["maps"].items())]
+
+    def team_match_list(self, store, sig, query, team):
+        return page(self.team_matches(store, team, sig), *parse_page(query))
+
+    def h2h(self, store, sig, query, team1, team2):
+        matrix = store.aggregate(("h2h_matrix", sig), lambda: H2HMatrix(self.filtered(store, sig)), persist=False)
+        record = matrix.record(team1, team2)
+        out = {"team1": team1, "team2": team2, "played": record.pop("played")}
+        out.update({k: {"wins": w, "losses": l} for k, (w, l) in record.items()})
+        out.update(page(matrix.matches(team1, team2), *parse_page(query)))
+        return out
+
+    def match_list(self, store, sig, query):
+        return page(self.filtered(store, sig), *parse_page(query))
+
+    def ratings(self, store, sig, query):
+        return store.incremental(("elo",), lambda: EloRatings(store.matches),
+                                 lambda old, added: old.extended(added, store.matches), persist=False).table()
+
+    def route(self, parts: List[str]):
+        """(handler, team arguments) for a path split on "/" after /api"""
+        simple = {("meta",): self.meta, ("teams",): lambda store, sig, query: store.teams,
+                  ("leaderboard",): self.leaderboard, ("matches",): self.match_list, ("ratings",): self.ratings}
+        if tuple(parts) in simple:
+            return simple[tuple(parts)], []
+        if parts[:1] == ["team"] and len(parts) in (2, 3):
+            sub = {2: self.team, 3: {"maps": self.team_maps, "matches": self.team_match_list}.get(parts[-1])}
+            return sub[len(parts)], parts[1:2]
+        if parts[:1] == ["h2h"] and len(parts) == 3:
+            return self.h2h, parts[1:]
+        return None, []
+
+    def response(self, target: str) -> Tuple[str, tuple]:
+        """(Last-Modified, (status, body, gzipped body or None, etag)) for a request target; errors become a JSON 500"""
+        try:
+            return self.dispatch(target)
+        except Exception:
+            # Logged here; the client gets an answer instead of a dropped connection
+            traceback.print_exc()
+            return formatdate(usegmt=True), encode(500, {"error": "internal error"}, None)
+
+    def dispatch(self, target: str) -> Tuple[str, tuple]:
+        store, last_modified = self.refresh()
+        url = urlsplit(target)
+        parts = [unquote(p) for p in url.path.strip("/").split("/")]
+        query = parse_qs(url.query)
+        try:
+            if parts[:1] != ["api"]:
+                raise ApiError(404, "not found")
+            handler, teams = self.route(parts[1:])
+            if handler is None:
+                raise ApiError(404, "not found")
+            missing = [t for t in teams if t not in store.by_team]
+            if missing:
+                raise ApiError(404, f"unknown team {missing[0]!r}")
+            sig = parse_filters(query)
+            paging = parse_page(query) if handler in (self.team_match_list, self.h2h, self.match_list) else ()
+        except ApiError as e:
+            return last_modified, encode(e.status, {"error": str(e)}, None)
+        key = ("api",) + tuple(parts[1:]) + (sig, paging)
+        return last_modified, store.aggregate(key, lambda: encode(200, handler(store, sig, query, *teams), store.version + repr(key)),
+                                      persist=False)
+
+
+def encode(status: int, payload, tag: str) -> tuple:
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    gz = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+    etag = '"%s"' % hashlib.sha1(tag.encode("utf-8")).hexdigest()[:20] if tag else None
+    return status, body, gz, etag
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"     # keep-alive: clients polling at high rates reuse connections
+    disable_nagle_algorithm = True    # headers and body go out as separate writes
+    api: Api = None
+    quiet = True
+
+    def do_GET(self):
+        self.serve(head=False)
+
+    def do_HEAD(self):
+        self.serve(head=True)
+
+    def serve(self, head: bool):
+        last_modified, (status, body, gz, etag) = self.api.response(self.path)
+        headers = {"Content-Type": "application/json; charset=utf-8", "Vary": "Accept-Encoding",
+                   "Access-Control-Allow-Origin": "*"}
+        if etag:
+            headers.update({"ETag": etag, "Last-Modified": last_modified, "Cache-Control": "no-cache"})
+            if self.not_modified(etag, last_modified):
+                self.send(304, headers, b"", head=True)
+                return
+        if gz is not None and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gz
+            headers["Content-Encoding"] = "gzip"
+        self.send(status, headers, body, head)
+
+    def not_modified(self, etag: str, last_modified: str) -> bool:
+        match = self.headers.get("If-None-Match")
+        if match is not None:
+            return match.strip() == "*" or etag in [t.strip().removeprefix("W/") for t in match.split(",")]
+        since = self.headers.get("If-Modified-Since")
+        if since:
+            try:
+                return parsedate_to_datetime(since) >= parsedate_to_datetime(last_modified)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def send(self, status: int, headers: dict, body: bytes, head: bool):
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        if not self.quiet:
+            super().log_message(fmt, *args)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve dashboard stats as a read-only JSON API")
+    ap.add_argument("--data", default=os.environ.get("VAL_DATA_PATH") or "./web/data.json")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8502)
+    ap.add_argument("--cache-dir", default=os.environ.get("VAL_CACHE_DIR", ".val_cache"))
+    ap.add_argument("--log", action="store_true", help="Log every request to stderr")
+    args = ap.parse_args()
+
+    Handler.api = Api(args.data, args.cache_dir)
+    Handler.quiet = not args.log
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    print(f"Serving {args.data} ({len(Handler.api.current[0].matches)} matches) on http://{args.host}:{args.port}/api/meta")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
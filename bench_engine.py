@@ -0,0 +1,166 @@
+# bench_engine.py
+# Headless benchmarks for the stats engine on synthetic data.
+# Times data loading, team stats, leaderboard, filtering and H2H selection
+# at each scale, measures the in-memory size of the parsed matches (compact
+# match_model records vs the raw json.load dicts) and writes the results as
+# JSON for comparing commits.
+# Usage: python bench_engine.py --scales 1000 10000 100000
+#        python bench_engine.py --compare bench_results/<old>.json bench_results/<new>.json
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from collections import Counter
+from datetime import date, timedelta
+from typing import Callable, Dict
+
+from analytics_store import AnalyticsStore
+from filter_engine import FilterEngine
+from h2h_matrix import H2HMatrix
+from ratings import EloRatings
+from stats_engine import filter_matches, get_leaderboard, get_team_stats, h2h_matches, load_data
+from synth_data import load_vocab, write_dataset
+
+
+def timeit(fn: Callable, repeat: int) -> Dict[str, float]:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - t0) * 1000)
+    return {"min_ms": min(runs), "median_ms": statistics.median(runs), "mean_ms": statistics.fmean(runs), "runs": repeat}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def ensure_dataset(n: int, data_dir: str, vocab_path: str) -> str:
+    path = os.path.join(data_dir, f"synth_{n}.json")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        write_dataset(n, load_vocab(vocab_path), path)
+    return path
+
+
+def bench_scale(path: str, repeat: int) -> Dict[str, dict]:
+    results = {"load_data": timeit(lambda: AnalyticsStore(path), max(1, repeat // 2))}
+    store = AnalyticsStore(path)
+    teams, matches = store.teams, store.matches
+
+    counts = Counter(t for m in matches for t in (m.left, m.right))
+    top = [t for t, _ in counts.most_common(5)]
+    pairs = Counter(frozenset((m.left, m.right)) for m in matches)
+    t1, t2 = sorted(pairs.most_common(1)[0][0])
+    last_date = max(m.date or "" for m in matches)
+    window = ((date.fromisoformat(last_date) - timedelta(days=90)).isoformat(), last_date)
+
+    def team_stats_top():
+        for t in top:
+            get_team_stats(t, [m for m in matches if m.left == t or m.right == t])
+
+    results["get_team_stats_top5"] = timeit(team_stats_top, repeat)
+    results["leaderboard"] = timeit(lambda: get_leaderboard(teams, matches), repeat)
+    results["filter_region"] = timeit(lambda: filter_matches(matches, "EMEA"), repeat)
+    results["filter_region_date"] = timeit(lambda: filter_matches(matches, "EMEA", window), repeat)
+    results["filter_engine_build"] = timeit(lambda: FilterEngine(matches), 1)
+    engine = FilterEngine(matches)
+    query = (("date",) + window, ("map", "Lotus"), ("region", "EMEA"))
+    results["filter_engine_query"] = timeit(lambda: engine.match_index(engine.select(query)), repeat)
+    results["h2h_select"] = timeit(lambda: h2h_matches(matches, t1, t2), repeat)
+    results["h2h_matrix_build"] = timeit(lambda: H2HMatrix(matches), repeat)
+    mx = H2HMatrix(matches)
+    results["h2h_matrix_lookup"] = timeit(lambda: (mx.record(t1, t2), mx.matches(t1, t2)), repeat)
+    results["elo_build"] = timeit(lambda: EloRatings(matches), repeat)
+    # Incremental update: rate everything but the newest 1%, then time adding it (once, it mutates)
+    newest = set(sorted(matches, key=lambda m: m.date or "")[-max(1, len(matches) // 100):])
+    base = EloRatings(m for m in matches if m not in newest)
+    results["elo_add_newest_1pct"] = timeit(lambda: base.add(newest), 1)
+    return results
+
+
+def traced_mb(fn: Callable) -> float:
+    """MB still allocated by fn's return value (while it is alive)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        obj = fn()
+        size = tracemalloc.get_traced_memory()[0]
+        del obj
+        return size / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_memory(path: str) -> Dict[str, float]:
+    def dict_model():
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["matches"]
+    dict_mb = traced_mb(dict_model)
+    compact_mb = traced_mb(lambda: load_data(path)[1])
+    return {"dict_model_mb": dict_mb, "compact_model_mb": compact_mb,
+            "saving": 1 - compact_mb / dict_mb if dict_mb else 0.0}
+
+
+def compare(old_path: str, new_path: str) -> None:
+    with open(old_path, encoding="utf-8") as f: old = json.load(f)
+    with open(new_path, encoding="utf-8") as f: new = json.load(f)
+    print(f"{'scale':>8} {'benchmark':<22} {old['commit']:>10} {new['commit']:>10}  ratio")
+    for scale, ops in new["results"].items():
+        for op, r in ops.items():
+            o = old["results"].get(scale, {}).get(op)
+            if not o: continue
+            ratio = r["median_ms"] / o["median_ms"] if o["median_ms"] else float("nan")
+            print(f"{scale:>8} {op:<22} {o['median_ms']:>9.2f}ms {r['median_ms']:>9.2f}ms  {ratio:.2f}x")
+    for scale, mem in new.get("memory", {}).items():
+        o = old.get("memory", {}).get(scale)
+        before = f"{o['compact_model_mb']:>9.1f}MB" if o else f"{'-':>11}"
+        print(f"{scale:>8} {'matches_in_memory':<22} {before} {mem['compact_model_mb']:>9.1f}MB")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the stats engine on synthetic data")
+    ap.add_argument("--scales", nargs="+", type=int, default=[1000, 10000, 100000])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--data-dir", default="./bench_data")
+    ap.add_argument("--vocab", default="./web/data.json")
+    ap.add_argument("--output", default="./bench_results")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files and exit")
+    args = ap.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    commit = git_commit()
+    report = {"commit": commit, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "python": platform.python_version(), "results": {}, "memory": {}}
+    for n in args.scales:
+        path = ensure_dataset(n, args.data_dir, args.vocab)
+        print(f"[{n} matches]")
+        report["results"][str(n)] = res = bench_scale(path, args.repeat)
+        for op, r in res.items():
+            print(f"  {op:<22} median {r['median_ms']:9.2f} ms   min {r['min_ms']:9.2f} ms")
+        report["memory"][str(n)] = mem = bench_memory(path)
+        print(f"  {'matches_in_memory':<22} {mem['compact_model_mb']:9.1f} MB   dict model "
+              f"{mem['dict_model_mb']:.1f} MB ({mem['saving']:.0%} smaller)")
+
+    os.makedirs(args.output, exist_ok=True)
+    out_path = os.path.join(args.output, f"bench_{commit}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Wrote {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 # build_data.py
 # Builds data.json from scraped match files
-# Usage: python build_data.py --input ./data --output ./web
+# Usage: python build_data.py --input ./data --output ./web [--precompute] [--shards] [--patches patches.json]
+# Records are normalized to a strict schema (normalize.py); anything dropped or
+# repaired is listed in rejects.json next to data.json. --check also runs the
+# cross-field checks (consistency.py) and writes rescrape.txt for the scraper
+# next to the output directory (or to --rescrape-file).
 
 import os
 import json
@@ -8,6 +12,13 @@ import re
 import argparse
 from datetime import datetime
 
+from consistency import check_archive, write_rescrape
+from disk_cache import file_hash
+from normalize import normalize_data
+from patches import PatchLookup, load_calendar
+from shards import write_shards
+from stats_engine import parse_matches, precompute
+
 def safe_date(d):
     if not d:
         return None
@@ -36,7 +47,8 @@ def load_matches(folder):
             print(f"Warning: Could not load {fn}: {e}")
     return out
 
-def summarize_for_web(matches):
+def summarize_for_web(matches, calendar):
+    patch_of = PatchLookup(calendar)
     teams = set()
     ms = []
     for m in matches:
@@ -63,14 +75,25 @@ def summarize_for_web(matches):
             "right": right,
             "winner": (m.get("result") or {}).get("winner"),
             "played": played,
-            "veto": m.get("veto")
+            "veto": m.get("veto"),
+            "patch": patch_of(m.get("date"))
         })
-    return {"teams": sorted(t for t in teams if t), "matches": ms}
+    return {"teams": sorted(t for t in teams if t), "matches": ms, "patches": calendar}
 
 def main():
     ap = argparse.ArgumentParser(description="Build data.json from match files")
     ap.add_argument("--input", default="./data", help="Input directory with match_*_veto.json files")
     ap.add_argument("--output", default="./web", help="Output directory for data.json")
+    ap.add_argument("--precompute", action="store_true",
+                    help="Also write stats.json with the unfiltered and per-patch leaderboard and team stats")
+    ap.add_argument("--shards", action="store_true",
+                    help="Also write per-team/per-month JSON shards with .gz/.br variants to <output>/shards (see shards.py)")
+    ap.add_argument("--check", action="store_true",
+                    help="Run consistency checks: consistency.json in --output, flagged match IDs in --rescrape-file")
+    ap.add_argument("--rescrape-file", default=None,
+                    help="Where --check writes the match IDs to re-scrape (default: rescrape.txt next to the --output directory)")
+    ap.add_argument("--patches", default=None,
+                    help="Patch calendar JSON ([{\"patch\": id, \"start\": date}, ...]); default: patches.json in --output, else the built-in one")
     args = ap.parse_args()
     
     matches = load_matches(args.input)
@@ -80,9 +103,16 @@ def main():
         print("Warning: No matches found! Make sure you've run the scraper first.")
         return
     
-    data = summarize_for_web(matches)
+    calendar = load_calendar(args.patches or os.path.join(args.output, "patches.json"))
+    data, report = normalize_data(summarize_for_web(matches, calendar))
     
     os.makedirs(args.output, exist_ok=True)
+    rejects_path = os.path.join(args.output, "rejects.json")
+    with open(rejects_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    if report["rejects"]:
+        actions = ", ".join(f"{n} {a}" for a, n in sorted(report["summary"].items()))
+        print(f"Warning: {len(report['rejects'])} schema problems ({actions}); see {rejects_path}")
     out_path = os.path.join(args.output, "data.json")
     
     with open(out_path, "w", encoding="utf-8") as f:
@@ -90,5 +120,31 @@ def main():
     
     print(f"✓ Wrote {out_path} with {len(data['teams'])} teams and {len(data['matches'])} matches")
 
+    if args.precompute:
+        pre = precompute(data["teams"], parse_matches(data["matches"], trusted=True))
+        pre["data_hash"] = file_hash(out_path)
+        stats_path = os.path.join(args.output, "stats.json")
+        with open(stats_path, "w", encoding="utf-8") as f:
+            json.dump(pre, f, ensure_ascii=False)
+        print(f"✓ Wrote {stats_path} with {len(pre['team_stats'])} team summaries over {len(pre['segments'])} patches")
+
+    if args.check:
+        report = check_archive(parse_matches(data["matches"], trusted=True))
+        report_path = os.path.join(args.output, "consistency.json")
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        # Not inside --output, which is served as-is; the scraper reads it with --ids-file
+        rescrape_path = args.rescrape_file or os.path.join(os.path.dirname(os.path.abspath(args.output)), "rescrape.txt")
+        write_rescrape(report["rescrape"], rescrape_path)
+        print(f"✓ Wrote {report_path}: {report['flagged_matches']} matches flagged, "
+              f"{len(report['rescrape'])} queued in {rescrape_path}")
+
+    if args.shards:
+        shard_dir = os.path.join(args.output, "shards")
+        manifest, info = write_shards(data, shard_dir, version=file_hash(out_path)[:16])
+        sizes = ", ".join(f"{k} {v / 1024:.0f} KB" for k, v in info["bytes"].items() if v)
+        print(f"✓ Wrote {shard_dir}: {len(manifest['teams'])} team and {len(manifest['months'])} month shards "
+              f"({info['new']} new files, {info['removed']} stale removed; {sizes})")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
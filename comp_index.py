@@ -0,0 +1,151 @@
+# comp_index.py
+# Agent composition analytics over every played map.
+# Each five-agent lineup is interned once as a bitmask over the agent
+# vocabulary; every (map, team) appearance becomes one row of NumPy columns
+# (comp id, map, team, day, win, filter_engine team row). Comp win rates, map x agent pick rates and
+# role queries ("double controller") are bincounts and matrix products over
+# those columns, so a query never walks the matches again.
+
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from stats_engine import calc_wr
+
+AGENT_ROLES = {
+    "Astra": "Controller", "Brimstone": "Controller", "Clove": "Controller",
+    "Harbor": "Controller", "Omen": "Controller", "Viper": "Controller",
+    "Iso": "Duelist", "Jett": "Duelist", "Neon": "Duelist", "Phoenix": "Duelist",
+    "Raze": "Duelist", "Reyna": "Duelist", "Waylay": "Duelist", "Yoru": "Duelist",
+    "Breach": "Initiator", "Fade": "Initiator", "Gekko": "Initiator", "KAY/O": "Initiator",
+    "Skye": "Initiator", "Sova": "Initiator", "Tejo": "Initiator",
+    "Chamber": "Sentinel", "Cypher": "Sentinel", "Deadlock": "Sentinel", "Killjoy": "Sentinel",
+    "Sage": "Sentinel", "Veto": "Sentinel", "Vyse": "Sentinel",
+}
+ROLES = ("Controller", "Duelist", "Initiator", "Sentinel")
+COMP_SIZE = 5
+
+
+def day_number(d: str) -> int:
+    return date.fromisoformat(d).toordinal()
+
+
+class CompIndex:
+    """Interned lineups plus one row per (played map, team); filters are keyword arguments to every query"""
+
+    def __init__(self, matches: Iterable):
+        comp_ids: Dict[int, int] = {}   # bitmask -> comp id
+        self.agents: List[str] = []
+        agent_bit: Dict[str, int] = {}
+        map_ids: Dict[str, int] = {}
+        team_ids: Dict[str, int] = {}
+        masks: List[int] = []
+        cols = {"comp": [], "map": [], "team": [], "day": [], "win": [], "row": []}
+
+        for k, m in enumerate(matches):
+            day = day_number(m.date) if m.date else 0
+            for p in m.played:
+                if not p.map: continue
+                for side, team, lineup, won in ((0, m.left, p.left_agents, p.ls > p.rs), (1, m.right, p.right_agents, p.rs > p.ls)):
+                    if not team or len(set(lineup)) != COMP_SIZE or not all(lineup): continue
+                    mask = 0
+                    for a in lineup:
+                        bit = agent_bit.get(a)
+                        if bit is None:
+                            bit = agent_bit[a] = len(self.agents)
+                            self.agents.append(a)
+                        mask |= 1 << bit
+                    cid = comp_ids.get(mask)
+                    if cid is None:
+                        cid = comp_ids[mask] = len(masks)
+                        masks.append(mask)
+                    cols["comp"].append(cid)
+                    cols["map"].append(map_ids.setdefault(p.map, len(map_ids)))
+                    cols["team"].append(team_ids.setdefault(team, len(team_ids)))
+                    cols["day"].append(day)
+                    cols["win"].append(won)
+                    cols["row"].append(2 * k + side)
+        self.maps = list(map_ids)
+        self.teams = list(team_ids)
+        self.map_ids, self.team_ids = map_ids, team_ids
+        self.masks = masks
+        self.comp = np.array(cols["comp"], dtype=np.int32)
+        self.map = np.array(cols["map"], dtype=np.int16)
+        self.team = np.array(cols["team"], dtype=np.int32)
+        self.day = np.array(cols["day"], dtype=np.int32)
+        self.win = np.array(cols["win"], dtype=np.int8)
+        self.row = np.array(cols["row"], dtype=np.int64)   # team row in filter_engine terms
+        # comp x agent membership and comp x role counts, derived from the bitmasks
+        n_agents = len(self.agents)
+        bits = np.array(masks, dtype=np.uint64 if n_agents <= 64 else object).reshape(-1, 1)
+        shifts = np.arange(n_agents, dtype=bits.dtype if n_agents <= 64 else np.int64)
+        self.comp_agents = ((bits >> shifts) & 1).astype(np.int32).reshape(len(masks), n_agents)
+        role_of_agent = np.array([[AGENT_ROLES.get(a) == r for r in ROLES] for a in self.agents],
+                                 dtype=np.int32).reshape(n_agents, len(ROLES))
+        self.comp_roles = self.comp_agents @ role_of_agent
+
+    def __len__(self):
+        return len(self.comp)
+
+    def comp_agent_names(self, cid: int) -> List[str]:
+        """Agents of a comp, controllers first, then duelists, initiators and sentinels"""
+        mask = self.masks[cid]
+        names = [a for b, a in enumerate(self.agents) if (mask >> b) & 1]
+        order = {r: i for i, r in enumerate(ROLES)}
+        return sorted(names, key=lambda a: (order.get(AGENT_ROLES.get(a), len(ROLES)), a))
+
+    def select(self, map_name: str = None, teams: Sequence[str] = None,
+               since: str = None, until: str = None, rows: np.ndarray = None) -> np.ndarray:
+        """Row mask for a map, a set of teams, an inclusive ISO date range and a FilterEngine team-row mask"""
+        sel = np.ones(len(self.comp), dtype=bool) if rows is None else rows[self.row]
+        if map_name is not None:
+            sel &= self.map == self.map_ids.get(map_name, -1)
+        if teams is not None:
+            sel &= np.isin(self.team, [self.team_ids[t] for t in teams if t in self.team_ids])
+        if since:
+            sel &= self.day >= day_number(since)
+        if until:
+            sel &= self.day <= day_number(until)
+        return sel
+
+    def comp_stats(self, min_games: int = 1, top: Optional[int] = 10, **filters) -> List[dict]:
+        """Most successful comps: win rate among comps with at least min_games, ties by games"""
+        sel = self.select(**filters)
+        n = len(self.masks)
+        games = np.bincount(self.comp[sel], minlength=n)
+        wins = np.bincount(self.comp[sel], weights=self.win[sel], minlength=n).astype(np.int64)
+        cand = np.flatnonzero(games >= max(1, min_games))
+        order = cand[np.lexsort((-games[cand], -wins[cand] / games[cand]))]
+        return [{"Comp": ", ".join(self.comp_agent_names(c)), "Games": int(games[c]), "Wins": int(wins[c]),
+                 "Win %": calc_wr(int(wins[c]), int(games[c] - wins[c]))} for c in order[:top]]
+
+    def pick_rates(self, **filters):
+        """(maps, agents, matrix): % of lineups on each map that included each agent"""
+        sel = self.select(**filters)
+        n_maps, n_comps = len(self.maps), len(self.masks)
+        # map x comp counts, then one matrix product gives map x agent counts
+        pair = np.bincount(self.map[sel].astype(np.int64) * n_comps + self.comp[sel],
+                           minlength=n_maps * n_comps).reshape(n_maps, n_comps)
+        counts = pair @ self.comp_agents
+        games = pair.sum(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = np.where(games > 0, counts / games * 100, 0.0)
+        return self.maps, self.agents, rates
+
+    def teams_with_roles(self, roles: Dict[str, int], min_games: int = 1, **filters) -> List[dict]:
+        """Teams fielding at least roles[r] agents of each role r, e.g. {"Controller": 2}"""
+        ok = np.ones(len(self.masks), dtype=bool)
+        for r, k in roles.items():
+            ok &= self.comp_roles[:, ROLES.index(r)] >= k
+        sel = self.select(**filters) & ok[self.comp]
+        n = len(self.teams)
+        games = np.bincount(self.team[sel], minlength=n)
+        wins = np.bincount(self.team[sel], weights=self.win[sel], minlength=n).astype(np.int64)
+        total = np.bincount(self.team[self.select(**filters)], minlength=n)
+        rows = [{"Team": self.teams[t], "Games": int(games[t]), "Wins": int(wins[t]),
+                 "Win %": calc_wr(int(wins[t]), int(games[t] - wins[t])),
+                 "Share %": float(games[t] / total[t] * 100)}
+                for t in np.flatnonzero(games >= max(1, min_games))]
+        rows.sort(key=lambda r: (r["Games"], r["Win %"]), reverse=True)
+        return rows
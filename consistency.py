@@ -0,0 +1,140 @@
+# consistency.py
+# Cross-field consistency checks over the whole match archive.
+# Where normalize.py checks each field on its own, this catches records whose
+# fields disagree with each other: attack + defence rounds that don't add up
+# to the map score, pistol counts above 2 (or not totalling 2), lineups that
+# aren't five agents, impossible final scores, and series whose maps don't
+# add up to the result or the veto. Map-level checks run as numpy column
+# arithmetic over every played map at once. Flagged match IDs go to a
+# re-scrape list that vlr_veto_and_result.py reads with --ids-file.
+# Usage: python consistency.py [--data web/data.json] [--report consistency.json] [--rescrape rescrape.txt]
+
+import argparse
+import json
+import os
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from stats_engine import load_data
+
+# check name -> what it means; every flagged row names one of these
+CHECKS = {
+    "sides_sum": "attack + defence rounds differ from the map score",
+    "pistols_over_2": "a team won more than 2 pistol rounds on a map",
+    "pistols_total": "pistol rounds won don't total 2",
+    "agents_missing": "a lineup has fewer than 5 agents",
+    "impossible_score": "map score can't end a Valorant map (13-x with x <= 11, or a 2-round overtime lead)",
+    "maps_missing": "fewer maps than the series format needs to produce a winner",
+    "winner_mismatch": "the recorded winner didn't win more maps",
+    "map_not_in_veto": "a played map was neither picked nor the decider",
+}
+# These are fixed by scraping the match again; the rest may be genuine (forfeits, remakes)
+RESCRAPE = ("sides_sum", "pistols_over_2", "pistols_total", "agents_missing", "impossible_score", "maps_missing")
+
+
+def map_columns(matches) -> Dict[str, np.ndarray]:
+    """One row per played map: match index, scores, sides, pistols and lineup sizes (-1 = not scraped)"""
+    rows = [(k, p.ls, p.rs) + (p.sides or (-1, -1, -1, -1)) + (p.pistols or (-1, -1)) +
+            (len(p.left_agents), len(p.right_agents))
+            for k, m in enumerate(matches) for p in m.played if p.map]
+    a = np.array(rows, dtype=np.int32).reshape(-1, 11)
+    names = ("match", "ls", "rs", "l_atk", "l_def", "r_atk", "r_def", "l_pistols", "r_pistols", "l_agents", "r_agents")
+    return {n: a[:, i] for i, n in enumerate(names)}
+
+
+def valid_score(hi: np.ndarray, lo: np.ndarray) -> np.ndarray:
+    return ((hi == 13) & (lo <= 11)) | ((hi > 13) & (hi - lo == 2))
+
+
+def check_maps(matches) -> List[Tuple[int, str, str]]:
+    """(match index, check, detail) for every map-level problem"""
+    c = map_columns(matches)
+    if not len(c["match"]):
+        return []
+    out = []
+    ls, rs = c["ls"], c["rs"]
+    has_sides = c["l_atk"] >= 0
+    has_pistols = c["l_pistols"] >= 0
+    flags = {
+        "sides_sum": has_sides & ((c["l_atk"] + c["l_def"] != ls) | (c["r_atk"] + c["r_def"] != rs)),
+        "pistols_over_2": has_pistols & ((c["l_pistols"] > 2) | (c["r_pistols"] > 2)),
+        "pistols_total": has_pistols & (c["l_pistols"] <= 2) & (c["r_pistols"] <= 2)
+                         & (c["l_pistols"] + c["r_pistols"] != 2),
+        "agents_missing": (c["l_agents"] < 5) | (c["r_agents"] < 5),
+        "impossible_score": ~valid_score(np.maximum(ls, rs), np.minimum(ls, rs)),
+    }
+    for check, mask in flags.items():
+        for i in np.flatnonzero(mask).tolist():
+            out.append((int(c["match"][i]), check, f"{ls[i]}-{rs[i]}" + {
+                "sides_sum": f" sides {c['l_atk'][i]}+{c['l_def'][i]} / {c['r_atk'][i]}+{c['r_def'][i]}",
+                "pistols_over_2": f" pistols {c['l_pistols'][i]}-{c['r_pistols'][i]}",
+                "pistols_total": f" pistols {c['l_pistols'][i]}-{c['r_pistols'][i]}",
+                "agents_missing": f" agents {c['l_agents'][i]}/{c['r_agents'][i]}",
+            }.get(check, "")))
+    return out
+
+
+def check_series(matches) -> List[Tuple[int, str, str]]:
+    """(match index, check, detail) for series-level problems"""
+    out = []
+    for k, m in enumerate(matches):
+        played = [p for p in m.played if p.map]
+        lw = sum(1 for p in played if p.ls > p.rs)
+        rw = sum(1 for p in played if p.rs > p.ls)
+        picks = [e.map for e in m.veto if e.type == "pick" and e.map]
+        if m.veto:
+            need = 3 if len(picks) >= 3 else (2 if picks else 1)
+            if max(lw, rw) < need:
+                out.append((k, "maps_missing", f"{len(played)} maps, {lw}-{rw}, need {need} wins"))
+            allowed = set(picks) | {m.decider} | {e.map for e in m.veto if e.type == "decider"}
+            for p in played:
+                if p.map not in allowed:
+                    out.append((k, "map_not_in_veto", p.map))
+        elif not played or lw == rw:
+            out.append((k, "maps_missing", f"{len(played)} maps, {lw}-{rw}"))
+        if m.winner and lw != rw and m.winner != (m.left if lw > rw else m.right):
+            out.append((k, "winner_mismatch", f"winner {m.winner}, maps {lw}-{rw}"))
+    return out
+
+
+def check_archive(matches) -> dict:
+    """Report with per-check counts, flagged rows and the match IDs to re-scrape"""
+    rows = sorted(check_maps(matches) + check_series(matches))
+    flagged = [{"id": matches[k].id, "date": matches[k].date, "teams": f"{matches[k].left} vs {matches[k].right}",
+                "check": check, "detail": detail} for k, check, detail in rows]
+    rescrape = sorted({r["id"] for r in flagged if r["check"] in RESCRAPE and r["id"] is not None})
+    return {"matches": len(matches), "checks": CHECKS, "counts": dict(Counter(r["check"] for r in flagged)),
+            "flagged_matches": len({r["id"] for r in flagged}), "rescrape": rescrape, "rows": flagged}
+
+
+def write_rescrape(ids: List[int], path: str) -> None:
+    """One match ID per line, the format vlr_veto_and_result.py --ids-file reads"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Match IDs flagged by consistency.py; re-scrape with:\n")
+        f.write(f"#   python vlr_veto_and_result.py --ids-file {os.path.basename(path)}\n")
+        f.writelines(f"{i}\n" for i in ids)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cross-field consistency checks over data.json")
+    ap.add_argument("--data", default="./web/data.json")
+    ap.add_argument("--report", default=None, help="Report JSON (default: consistency.json next to --data)")
+    ap.add_argument("--rescrape", default="./rescrape.txt", help="Where to write the match IDs to re-scrape")
+    args = ap.parse_args()
+
+    _, matches = load_data(args.data)
+    report = check_archive(matches)
+    report_path = args.report or os.path.join(os.path.dirname(args.data), "consistency.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    write_rescrape(report["rescrape"], args.rescrape)
+    print(f"Checked {report['matches']} matches: {report['flagged_matches']} flagged")
+    for check, n in sorted(report["counts"].items(), key=lambda kv: -kv[1]):
+        print(f"  {n:6d}  {check:18s} {CHECKS[check]}")
+    print(f"✓ Wrote {report_path} and {len(report['rescrape'])} match IDs to {args.rescrape}")
+
+
+if __name__ == "__main__":
+    main()
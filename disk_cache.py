@@ -0,0 +1,115 @@
+# disk_cache.py
+# Persistent pickle cache for parsed data and computed aggregates.
+# Entries are namespaced by data-file hash + engine version, so a new
+# data.json or a stats code change never reads stale results; old entries
+# simply age out through size-based (least recently used) eviction.
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from typing import Any, Hashable
+
+DEFAULT_MAX_MB = 512
+MISSING = object()
+
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class DiskCache:
+    def __init__(self, directory: str, namespace: str, max_mb: int = None):
+        if max_mb is None:
+            max_mb = int(os.environ.get("VAL_DISK_CACHE_MB", DEFAULT_MAX_MB))
+        self.directory = directory
+        self.namespace = namespace
+        self.max_bytes = max_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.used_bytes = sum(size for _, _, size in self._scan())
+
+    def _path(self, key: Hashable) -> str:
+        digest = hashlib.sha1(f"{self.namespace}|{key!r}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + ".pkl")
+
+    def _scan(self):
+        for root, _, files in os.walk(self.directory):
+            for fn in files:
+                if not fn.endswith(".pkl"):
+                    continue
+                p = os.path.join(root, fn)
+                try:
+                    info = os.stat(p)
+                except OSError:
+                    continue
+                yield p, info.st_mtime, info.st_size
+
+    def get(self, key: Hashable) -> Any:
+        p = self._path(key)
+        try:
+            with open(p, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return MISSING
+        except Exception:
+            # Truncated or unreadable entry: drop it and recompute
+            self._remove(p)
+            return MISSING
+        try:
+            os.utime(p)  # mtime doubles as last-used time for eviction
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        p = self._path(key)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_bytes:
+            return
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(p), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+        except OSError:
+            self._remove(tmp)
+            return
+        with self._lock:
+            # An existing entry for the key is replaced, so its bytes stop counting
+            try:
+                old = os.path.getsize(p)
+            except OSError:
+                old = 0
+            try:
+                os.replace(tmp, p)
+            except OSError:
+                self._remove(tmp)
+                return
+            self.used_bytes += len(payload) - old
+            over = self.used_bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self) -> None:
+        with self._lock:
+            entries = sorted(self._scan(), key=lambda e: e[1])
+            total = sum(size for _, _, size in entries)
+            for p, _, size in entries:
+                if total <= self.max_bytes * 0.9:
+                    break
+                if self._remove(p):
+                    total -= size
+            self.used_bytes = total
+
+    def _remove(self, p: str) -> bool:
+        try:
+            os.remove(p)
+            return True
+        except OSError:
+            return False
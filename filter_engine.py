@@ -0,0 +1,188 @@
+# filter_engine.py
+# Composable match filters compiled to boolean masks over columnar arrays.
+# Every match is two "team rows" (left team's view, right team's view) with
+# team, opponent, day and series format columns; every played map adds a row
+# per side with its map id and who picked it, plus (map, side, agent) rows
+# for lineups. A predicate compiles to one mask over team rows or map sides;
+# a query ANDs the map-side masks, folds them onto team rows, and ANDs the
+# team-row masks. Team-relative predicates (opponent, opponent region,
+# picked by the team or the opponent) therefore stay correct per team.
+#
+# Predicates are hashable tuples, so callers can cache masks per predicate:
+#   ("region", "EMEA")            either team in the region
+#   ("date", "2026-01-01", None)  inclusive ISO bounds (undated matches pass)
+#   ("patch", "11.00", "12.00")   any of the listed patches (patches.py calendar)
+#   ("map", "Lotus")              a played map
+#   ("opponent", "FNATIC")        the other team
+#   ("opponent_region", "EMEA")   the other team's region
+#   ("format", "Bo5")             Bo1 / Bo3 / Bo5
+#   ("picked_by", "team")         a played map picked by the team / "opponent" / "decider"
+#   ("agent", "Viper")            the team fielded the agent on a played map
+# Map-level predicates in one query must all hold on the same played map.
+
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from stats_engine import REGION_TEAMS, is_team_in_region
+
+FORMATS = ("Bo1", "Bo3", "Bo5")
+PICKED_BY = ("team", "opponent", "decider")
+MAP_LEVEL = ("map", "picked_by", "agent")
+
+Predicate = Tuple
+Query = Tuple[Predicate, ...]
+
+
+def series_format(m) -> str:
+    picks = sum(1 for e in m.veto if e.type == "pick")
+    if picks >= 3 or len(m.played) >= 4:
+        return "Bo5"
+    if picks >= 1 or len(m.played) >= 2:
+        return "Bo3"
+    return "Bo1"
+
+
+def canonical(predicates: Iterable[Predicate]) -> Query:
+    """Sorted, de-duplicated query; use it as the cache key for the filtered data"""
+    return tuple(sorted(set(predicates), key=repr))
+
+
+def _day(d) -> int:
+    return date.fromisoformat(d).toordinal() if d else 0
+
+
+class FilterEngine:
+    """Columnar view of a match list; queries return indices into that list"""
+
+    def __init__(self, matches: Sequence, regions: Dict[str, list] = REGION_TEAMS):
+        ids: Dict[str, int] = {"": 0}
+        map_ids: Dict[str, int] = {}
+        agent_ids: Dict[str, int] = {}
+        patch_ids: Dict[str, int] = {}
+        team, day, fmt, patch = [], [], [], []
+        map_match, map_id, picked = [], [], []
+        ag_side, ag_id = [], []                       # (map side index, agent id) per lineup slot
+        for k, m in enumerate(matches):
+            left, right = ids.setdefault(m.left or "", len(ids)), ids.setdefault(m.right or "", len(ids))
+            team += (left, right)
+            day.append(_day(m.date))
+            fmt.append(FORMATS.index(series_format(m)))
+            patch.append(patch_ids.setdefault(m.patch, len(patch_ids)) if m.patch else -1)
+            picks = {e.map: e.team for e in m.veto if e.type == "pick"}
+            for p in m.played:
+                q = len(map_match)
+                map_match.append(k)
+                map_id.append(map_ids.setdefault(p.map, len(map_ids)) if p.map else -1)
+                by = picks.get(p.map) or p.picked_by
+                picked.append(0 if by and by == m.left else (1 if by and by == m.right else -1))
+                for side, lineup in ((0, p.left_agents), (1, p.right_agents)):
+                    for a in lineup:
+                        if a:
+                            ag_side.append(2 * q + side)
+                            ag_id.append(agent_ids.setdefault(a, len(agent_ids)))
+        self.n = len(matches)
+        self.teams, self.map_ids, self.agent_ids, self.ids = list(ids), map_ids, agent_ids, ids
+        self.team = np.array(team, dtype=np.int32)
+        self.opp = self.team.reshape(-1, 2)[:, ::-1].reshape(-1)
+        self.day = np.array(day, dtype=np.int32)
+        self.fmt = np.array(fmt, dtype=np.int8)
+        self.patch_ids = patch_ids
+        self.patch = np.array(patch, dtype=np.int16)
+        self.map_id = np.array(map_id, dtype=np.int32)
+        self.picked = np.array(picked, dtype=np.int8)
+        # map side 2q + s belongs to team row 2 * match + s
+        self.map_row = (2 * np.array(map_match, dtype=np.int64)[:, None] + np.arange(2)).reshape(-1)
+        self.ag_side = np.array(ag_side, dtype=np.int64)
+        self.ag_id = np.array(ag_id, dtype=np.int32)
+        self.regions = list(regions)
+        self.in_region = np.array([[is_team_in_region(t, r) if t else False for r in self.regions] for t in self.teams],
+                                  dtype=bool).reshape(len(self.teams), len(self.regions))
+        # Team rows of each team, in match order
+        order = np.argsort(self.team, kind="stable")
+        bounds = np.searchsorted(self.team[order], np.arange(len(self.teams) + 1))
+        self.rows_of = {t: order[bounds[i]:bounds[i + 1]] for i, t in enumerate(self.teams) if t}
+
+    def _region(self, name: str) -> np.ndarray:
+        if name not in self.regions:
+            raise ValueError(f"unknown region {name!r}")
+        return self.in_region[:, self.regions.index(name)]
+
+    def mask(self, pred: Predicate) -> np.ndarray:
+        """Boolean mask of one predicate: over team rows, or over map sides for MAP_LEVEL kinds"""
+        kind, *args = pred
+        if kind == "region":
+            reg = self._region(args[0])
+            return reg[self.team] | reg[self.opp]
+        if kind == "opponent_region":
+            return self._region(args[0])[self.opp]
+        if kind == "opponent":
+            return self.opp == self.ids.get(args[0], -1)
+        if kind == "date":
+            since, until = args
+            ok = np.ones(self.n, dtype=bool)
+            if since: ok &= self.day >= _day(since)
+            if until: ok &= self.day <= _day(until)
+            return np.repeat(ok | (self.day == 0), 2)
+        if kind == "patch":
+            return np.repeat(np.isin(self.patch, [self.patch_ids.get(p, -2) for p in args]), 2)
+        if kind == "format":
+            return np.repeat(self.fmt == FORMATS.index(args[0]), 2)
+        if kind == "map":
+            return np.repeat(self.map_id == self.map_ids.get(args[0], -2), 2)
+        if kind == "picked_by":
+            side = np.tile(np.arange(2, dtype=np.int8), len(self.picked))
+            picked = np.repeat(self.picked, 2)
+            return {"team": picked == side, "opponent": picked == 1 - side, "decider": picked == -1}[args[0]]
+        if kind == "agent":
+            out = np.zeros(len(self.map_row), dtype=bool)
+            out[self.ag_side[self.ag_id == self.agent_ids.get(args[0], -1)]] = True
+            return out
+        raise ValueError(f"unknown predicate {kind!r}")
+
+    def select(self, query: Query, mask: Callable[[Predicate], np.ndarray] = None) -> np.ndarray:
+        """Team-row mask for a query; `mask` lets the caller serve per-predicate masks from a cache"""
+        mask = mask or self.mask
+        rows = np.ones(2 * self.n, dtype=bool)
+        sides = None
+        for pred in query:
+            if pred[0] in MAP_LEVEL:
+                sides = mask(pred) if sides is None else sides & mask(pred)
+            else:
+                rows &= mask(pred)
+        if sides is not None:
+            on_map = np.zeros(2 * self.n, dtype=bool)
+            on_map[self.map_row[sides]] = True
+            rows &= on_map
+        return rows
+
+    def match_index(self, rows: np.ndarray) -> np.ndarray:
+        """Matches where either team's row passes"""
+        return np.flatnonzero(rows.reshape(-1, 2).any(axis=1))
+
+    def team_index(self, rows: np.ndarray, team: str) -> np.ndarray:
+        """Matches of `team` where its own row passes"""
+        r = self.rows_of.get(team)
+        if r is None:
+            return np.zeros(0, dtype=np.int64)
+        return r[rows[r]] // 2
+
+    def team_pairs(self, rows: np.ndarray, teams: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(match index, position in teams) for every listed team's passing rows, in match order"""
+        parts = [self.team_index(rows, t) for t in teams]
+        if not parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        key = np.concatenate(parts) * len(teams) + np.repeat(np.arange(len(teams)), [len(p) for p in parts])
+        key = np.unique(key)   # sorted by match; drops a team listed twice in one match
+        return key // len(teams), key % len(teams)
+
+    def most_active(self, rows: np.ndarray, n: int) -> List[str]:
+        """Up to n teams with the most passing rows, most first (ties in first-seen order)"""
+        played = np.bincount(self.team[rows], minlength=len(self.teams))
+        return [self.teams[i] for i in np.argsort(-played, kind="stable")[:n] if played[i] and self.teams[i]]
+
+    def options(self) -> Dict[str, List[str]]:
+        """Values offered for each predicate kind"""
+        return {"map": sorted(self.map_ids), "agent": sorted(self.agent_ids), "opponent": sorted(t for t in self.teams if t),
+                "region": self.regions, "opponent_region": self.regions, "format": list(FORMATS), "picked_by": list(PICKED_BY)}
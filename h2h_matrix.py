@@ -0,0 +1,109 @@
+# h2h_matrix.py
+# League-wide head-to-head records as dense team x team arrays.
+# One pass over a match list collects integer columns (team ids, series
+# winner, per-map rounds and pistols); np.add.at scatters them into
+# matrices where [i, j] is what team i won against team j. Any pairwise
+# record is then array indexing, and whole-league views (heatmaps) are
+# slices of the same arrays.
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from stats_engine import calc_wr
+
+KINDS = ("series", "maps", "rounds", "pistols")
+
+
+class H2HMatrix:
+    """played[i, j] = series between i and j; wins[kind][i, j] = series/maps/rounds/pistols i won against j"""
+
+    def __init__(self, matches: Iterable):
+        self.ids: Dict[str, int] = {}
+        self.pairs: Dict[Tuple[int, int], list] = {}   # (low id, high id) -> matches in input order
+        ids = self.ids
+        s_i, s_j, s_won = [], [], []                     # one row per series
+        m_i, m_j, m_won, m_rounds, m_pistols = [], [], [], [], []   # one row per (map, side)
+        for m in matches:
+            if not (m.left and m.right) or m.left == m.right:
+                continue
+            i = ids.setdefault(m.left, len(ids))
+            j = ids.setdefault(m.right, len(ids))
+            self.pairs.setdefault((i, j) if i < j else (j, i), []).append(m)
+            s_i.append(i); s_j.append(j)
+            s_won.append(1 if m.winner == m.left else (-1 if m.winner == m.right else 0))
+            for p in m.played:
+                if not p.map: continue
+                lp, rp = p.pistols or (0, 0)
+                m_i += (i, j); m_j += (j, i)
+                m_won += (p.ls > p.rs, p.rs > p.ls)
+                m_rounds += (p.ls, p.rs)
+                m_pistols += (lp, rp)
+        self.teams: List[str] = list(ids)
+        n = len(ids)
+        s_i, s_j, s_won = np.array(s_i, dtype=np.intp), np.array(s_j, dtype=np.intp), np.array(s_won)
+        m_i, m_j = np.array(m_i, dtype=np.intp), np.array(m_j, dtype=np.intp)
+
+        self.played = np.zeros((n, n), dtype=np.int32)
+        np.add.at(self.played, (s_i, s_j), 1)
+        self.played += self.played.T
+        self.map_count = np.zeros((n, n), dtype=np.int32)
+        np.add.at(self.map_count, (m_i, m_j), 1)
+        self.wins = {}
+        series = self.wins["series"] = np.zeros((n, n), dtype=np.int32)
+        np.add.at(series, (s_i[s_won == 1], s_j[s_won == 1]), 1)
+        np.add.at(series, (s_j[s_won == -1], s_i[s_won == -1]), 1)
+        for kind, values in (("maps", m_won), ("rounds", m_rounds), ("pistols", m_pistols)):
+            arr = self.wins[kind] = np.zeros((n, n), dtype=np.int32)
+            np.add.at(arr, (m_i, m_j), np.array(values, dtype=np.int32))
+
+    def __contains__(self, team: str) -> bool:
+        return team in self.ids
+
+    def losses(self, kind: str) -> np.ndarray:
+        # A drawn/unfinished map counts as a loss for both sides, as in get_team_stats
+        return self.map_count - self.wins["maps"] if kind == "maps" else self.wins[kind].T
+
+    def record(self, team1: str, team2: str) -> Dict[str, Tuple[int, int]]:
+        """{kind: (team1 wins, team1 losses)} plus "played": series between the two"""
+        i, j = self.ids.get(team1), self.ids.get(team2)
+        if i is None or j is None:
+            return dict({k: (0, 0) for k in KINDS}, played=0)
+        out = {k: (int(self.wins[k][i, j]), int(self.losses(k)[i, j])) for k in KINDS}
+        out["played"] = int(self.played[i, j])
+        return out
+
+    def matches(self, team1: str, team2: str) -> list:
+        i, j = self.ids.get(team1), self.ids.get(team2)
+        if i is None or j is None:
+            return []
+        return self.pairs.get((i, j) if i < j else (j, i), [])
+
+    def most_active(self, top: int = None) -> List[str]:
+        """Teams ordered by series played within this matrix"""
+        order = np.argsort(-self.played.sum(axis=1), kind="stable")
+        return [self.teams[k] for k in order[:top]]
+
+    def win_pct(self, kind: str, teams: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(win %, wins, losses) sub-matrices for teams; win % is NaN where the pair never met"""
+        idx = np.array([self.ids[t] for t in teams], dtype=np.intp)
+        sub = np.ix_(idx, idx)
+        w, l = self.wins[kind][sub], self.losses(kind)[sub]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            pct = np.where(w + l > 0, w / (w + l) * 100, np.nan)
+        return pct, w, l
+
+    def table(self, team: str) -> List[dict]:
+        """One row per opponent of team: series, map and round records"""
+        i = self.ids.get(team)
+        if i is None:
+            return []
+        rows = []
+        for j in np.flatnonzero(self.played[i]):
+            rec = {k: (int(self.wins[k][i, j]), int(self.losses(k)[i, j])) for k in KINDS}
+            rows.append({"Opponent": self.teams[j], "Series": int(self.played[i, j]),
+                         "W-L": "%d-%d" % rec["series"], "Win %": calc_wr(*rec["series"]),
+                         "Map W-L": "%d-%d" % rec["maps"], "Map %": calc_wr(*rec["maps"]),
+                         "Round %": calc_wr(*rec["rounds"])})
+        rows.sort(key=lambda r: (-r["Series"], r["Opponent"]))
+        return rows
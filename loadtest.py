@@ -0,0 +1,251 @@
+# loadtest.py
+# Concurrent-session load test for the dashboard.
+# Starts one `streamlit run valdashboard.py` server on synthetic data and drives
+# it with N headless websocket clients speaking Streamlit's own protocol, so the
+# server does exactly the work a browser session would trigger. Each simulated
+# analyst changes teams, toggles the date filter, switches tabs and picks maps.
+# Reports rerun latency percentiles, throughput, server CPU and RSS per level.
+# Needs the websockets package (pip install websockets), which the dashboard
+# itself does not use.
+# Usage: python loadtest.py --matches 10000 --levels 1 4 8 16 --steps 20
+#        python loadtest.py --url ws://localhost:8501 --server-pid 1234   (existing server)
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+from bench_engine import ensure_dataset, git_commit
+from profiling import percentile
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "valdashboard.py")
+VIEWS = ["🏠 Home", "🏆 Leaderboard", "📊 Overview", "📜 History", "⚔️ Head-to-Head", "🧮 H2H Matrix",
+         "🗺️ Map Deep Dive", "🧩 Comps", "📈 Comparison"]
+WIDGET_KINDS = {"selectbox": "string_value", "checkbox": "bool_value"}
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+# --- Server process metrics (Linux /proc) ---
+def proc_cpu_s(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    except (OSError, IndexError, ValueError):
+        return 0.0
+
+
+def proc_rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+# --- Headless Streamlit client ---
+class Session:
+    """One simulated browser tab: keeps widget state and reruns the script like the frontend does"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.widgets: Dict[str, dict] = {}   # label -> {"id", "kind", "options"}
+        self.values: Dict[str, tuple] = {}   # widget id -> (value field, value)
+
+    async def rerun(self) -> float:
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        for wid, (field, value) in self.values.items():
+            w = msg.rerun_script.widget_states.widgets.add()
+            w.id = wid
+            setattr(w, field, value)
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        seen: Dict[str, dict] = {}
+        while True:
+            fm = ForwardMsg()
+            fm.ParseFromString(await self.ws.recv())
+            kind = fm.WhichOneof("type")
+            if kind == "delta":
+                d = fm.delta
+                if d.WhichOneof("type") == "new_element":
+                    ek = d.new_element.WhichOneof("type")
+                    if ek in WIDGET_KINDS:
+                        el = getattr(d.new_element, ek)
+                        seen[el.label] = {"id": el.id, "kind": WIDGET_KINDS[ek],
+                                          "options": list(el.options) if ek == "selectbox" else None}
+                elif d.WhichOneof("type") == "add_block" and d.add_block.WhichOneof("type") == "tab_container":
+                    seen["tabs"] = {"id": d.add_block.tab_container.id, "kind": "string_value", "options": VIEWS}
+            elif kind == "script_finished":
+                break
+        elapsed = (time.perf_counter() - t0) * 1000
+        # Like the frontend, only widgets rendered in the latest run keep state
+        self.widgets = seen
+        live = {w["id"] for w in seen.values()}
+        self.values = {k: v for k, v in self.values.items() if k in live}
+        return elapsed
+
+    def set(self, label: str, value) -> bool:
+        w = self.widgets.get(label)
+        if not w:
+            return False
+        self.values[w["id"]] = (w["kind"], value)
+        return True
+
+    def current(self, label: str, default=None):
+        w = self.widgets.get(label)
+        return self.values.get(w["id"], (None, default))[1] if w else default
+
+
+async def session_worker(url: str, seed: int, steps: int, latencies: List[float], errors: List[str]):
+    import websockets
+
+    rng = random.Random(seed)
+    try:
+        async with websockets.connect(f"{url}/_stcore/stream", subprotocols=["streamlit"], max_size=None) as ws:
+            s = Session(ws)
+            latencies.append(await s.rerun())
+            for _ in range(steps):
+                action = rng.choice(("team", "team", "date", "view", "view", "map"))
+                if action == "team":
+                    label = rng.choice(("Team 1", "Team 2"))
+                    opts = (s.widgets.get(label) or {}).get("options") or []
+                    if opts: s.set(label, rng.choice(opts))
+                elif action == "date":
+                    s.set("📅 Filter by date range", not s.current("📅 Filter by date range", False))
+                elif action == "view":
+                    s.set("tabs", rng.choice(VIEWS))
+                else:
+                    s.set("tabs", "🗺️ Map Deep Dive")
+                    latencies.append(await s.rerun())
+                    opts = (s.widgets.get("Select Map") or {}).get("options") or []
+                    if not opts: continue
+                    s.set("Select Map", rng.choice(opts))
+                latencies.append(await s.rerun())
+    except Exception as e:
+        errors.append(f"{type(e).__name__}: {e}"[:200])
+
+
+async def sample_rss(pid: int, peak: List[float], stop: asyncio.Event):
+    while not stop.is_set():
+        peak[0] = max(peak[0], proc_rss_mb(pid))
+        try:
+            await asyncio.wait_for(stop.wait(), 0.2)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_level(url: str, pid: Optional[int], n_sessions: int, steps: int, seed: int) -> dict:
+    latencies: List[float] = []
+    errors: List[str] = []
+    peak = [proc_rss_mb(pid) if pid else 0.0]
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(pid, peak, stop)) if pid else None
+    cpu0, t0 = (proc_cpu_s(pid) if pid else 0.0), time.perf_counter()
+    await asyncio.gather(*(session_worker(url, seed + i, steps, latencies, errors) for i in range(n_sessions)))
+    wall = time.perf_counter() - t0
+    cpu = (proc_cpu_s(pid) - cpu0) if pid else 0.0
+    stop.set()
+    if sampler: await sampler
+    lat = sorted(latencies)
+    return {
+        "sessions": n_sessions, "reruns": len(lat), "errors": len(errors),
+        "p50_ms": percentile(lat, 0.5), "p95_ms": percentile(lat, 0.95), "p99_ms": percentile(lat, 0.99),
+        "max_ms": lat[-1] if lat else 0.0,
+        "throughput_rps": len(lat) / wall if wall else 0.0,
+        "wall_s": wall, "server_cpu_s": cpu, "server_cpu_util": cpu / wall if wall else 0.0,
+        "server_rss_peak_mb": peak[0], "first_error": errors[0] if errors else None,
+    }
+
+
+def start_server(data_path: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, VAL_DATA_PATH=os.path.abspath(data_path))
+    cmd = [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+           "--server.port", str(port), "--server.fileWatcherType", "none",
+           "--browser.gatherUsageStats", "false"]
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(300):
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1):
+                return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise RuntimeError("streamlit server exited during startup")
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("streamlit server did not become healthy")
+
+
+async def run_all(args, url: str, pid: Optional[int]) -> List[dict]:
+    # One warm-up session so data loading is not charged to the first level
+    t0 = time.perf_counter()
+    await session_worker(url, args.seed, 0, [], [])
+    print(f"Warm-up (first session incl. data load): {time.perf_counter() - t0:.1f}s")
+    results = []
+    for n in args.levels:
+        r = await run_level(url, pid, n, args.steps, args.seed)
+        results.append(r)
+        print(f"  {n:>3} sessions  p50 {r['p50_ms']:8.1f} ms  p95 {r['p95_ms']:8.1f} ms  "
+              f"p99 {r['p99_ms']:8.1f} ms  {r['throughput_rps']:6.1f} reruns/s  "
+              f"cpu {r['server_cpu_util']:4.2f}  rss {r['server_rss_peak_mb']:7.1f} MB  errors {r['errors']}")
+        if r["first_error"]:
+            print(f"      first error: {r['first_error']}")
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Load-test the dashboard with concurrent simulated sessions")
+    ap.add_argument("--matches", type=int, default=10000, help="Synthetic data size")
+    ap.add_argument("--data", help="Use this data.json instead of synthetic data")
+    ap.add_argument("--data-dir", default="./bench_data")
+    ap.add_argument("--vocab", default="./web/data.json")
+    ap.add_argument("--levels", nargs="+", type=int, default=[1, 2, 4, 8, 16])
+    ap.add_argument("--steps", type=int, default=15, help="Interactions per session")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--port", type=int, default=8599)
+    ap.add_argument("--url", help="Target an already running server, e.g. ws://localhost:8501")
+    ap.add_argument("--server-pid", type=int, help="PID of --url's server, for CPU/RSS")
+    ap.add_argument("--output", default="./bench_results")
+    args = ap.parse_args()
+    try:
+        import websockets  # noqa: F401  (used by every session worker)
+    except ImportError:
+        sys.exit("loadtest.py needs the websockets package: pip install websockets")
+
+    proc = None
+    if args.url:
+        url, pid, data = args.url.rstrip("/"), args.server_pid, args.data or "(external server)"
+    else:
+        data = args.data or ensure_dataset(args.matches, args.data_dir, args.vocab)
+        proc = start_server(data, args.port)
+        url, pid = f"ws://localhost:{args.port}", proc.pid
+    print(f"Data: {data}  Server: {url}")
+    try:
+        results = asyncio.run(run_all(args, url, pid))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    os.makedirs(args.output, exist_ok=True)
+    out_path = os.path.join(args.output, f"loadtest_{git_commit()}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"commit": git_commit(), "data": data, "steps": args.steps, "levels": results}, f, indent=2)
+    print(f"✓ Wrote {out_path}")
+
+
+if __name__ == "__main__":
+    main()
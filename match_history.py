@@ -0,0 +1,119 @@
+# match_history.py
+# One team's match history as date-sorted columns for paged tables.
+# Built once per (team, filter): per-series result, map and round score
+# columns plus integer sort keys, and for each map the rows where it was
+# played. Filtering and sorting are numpy operations over those columns;
+# display rows (score strings, map lines) are formatted only for the page
+# being shown, so a team with 500 series renders as fast as one with 20.
+# The same rows per map, already newest first, serve a team's recent games
+# on one map (Map Deep Dive) without sorting or copying its whole history.
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+RESULTS = {"W": 1, "L": -1}
+SORTS = ("Date", "Opponent", "Map diff", "Round diff")
+
+
+def _rank(values: Sequence) -> np.ndarray:
+    """Integer rank of each value (equal values share a rank), for fast argsort"""
+    uniq = sorted(set(values))
+    pos = {v: i for i, v in enumerate(uniq)}
+    return np.array([pos[v] for v in values], dtype=np.int32)
+
+
+class MatchHistory:
+    """A team's series, newest first; select() + order() give row indices, page() formats a slice"""
+
+    def __init__(self, team: str, matches: Sequence):
+        self.team = team
+        self.matches = sorted(matches, key=lambda m: m.date or "", reverse=True)
+        n = len(self.matches)
+        self.opponents: List[str] = []
+        result = np.zeros(n, dtype=np.int8)
+        score = np.zeros((n, 4), dtype=np.int32)           # maps won, maps lost, rounds won, rounds lost
+        rows_of_map: Dict[str, list] = {}
+        for i, m in enumerate(self.matches):
+            is_left = m.left == team
+            self.opponents.append((m.right if is_left else m.left) or "")
+            result[i] = 1 if m.winner == team else (-1 if m.winner else 0)
+            for p in m.played:
+                mine, theirs = (p.ls, p.rs) if is_left else (p.rs, p.ls)
+                score[i] += (mine > theirs, theirs > mine, mine, theirs)
+                if p.map:
+                    rows_of_map.setdefault(p.map, []).append(i)
+        self.result, self.score = result, score
+        self.rows_of_map = {mp: np.unique(rows) for mp, rows in rows_of_map.items()}
+        self.keys = {"Date": -np.arange(n, dtype=np.int32),     # already newest first
+                     "Opponent": _rank(self.opponents),
+                     "Map diff": score[:, 0] - score[:, 1], "Round diff": score[:, 2] - score[:, 3]}
+
+    def __len__(self) -> int:
+        return len(self.matches)
+
+    def maps(self) -> List[str]:
+        return sorted(self.rows_of_map)
+
+    def select(self, opponent: Optional[str] = None, result: Optional[str] = None,
+               map_name: Optional[str] = None) -> np.ndarray:
+        """Row indices (newest first) passing every given filter"""
+        ok = np.ones(len(self), dtype=bool)
+        if opponent:
+            ok &= np.array([o == opponent for o in self.opponents], dtype=bool)
+        if result:
+            ok &= self.result == RESULTS[result]
+        if map_name:
+            on_map = np.zeros(len(self), dtype=bool)
+            on_map[self.rows_of_map.get(map_name, [])] = True
+            ok &= on_map
+        return np.flatnonzero(ok)
+
+    def order(self, rows: np.ndarray, sort: str = "Date", descending: bool = True) -> np.ndarray:
+        """rows sorted by one of SORTS; ties keep date order (newest first)"""
+        key = self.keys[sort][rows]
+        return rows[np.argsort(-key if descending else key, kind="stable")]
+
+    def map_games(self, map_name: str, start: int = 0, k: int = 5) -> List[dict]:
+        """The team's games on a map, newest first: up to k, skipping the first `start` series (O(k))"""
+        out = []
+        # Every listed series has at least one game on the map, so k series are enough
+        for i in self.rows_of_map.get(map_name, np.zeros(0, dtype=np.intp))[start:start + k].tolist():
+            m = self.matches[i]
+            is_left = m.left == self.team
+            for p in m.played:
+                if p.map != map_name:
+                    continue
+                mine, theirs = (p.ls, p.rs) if is_left else (p.rs, p.ls)
+                atk, dfn = (p.sides[:2] if is_left else p.sides[2:]) if p.sides else (0, 0)
+                pw, pl = (p.pistols if is_left else p.pistols[::-1]) if p.pistols else (0, 0)
+                out.append({"date": p.date or m.date, "opponent": self.opponents[i], "score": f"{mine}-{theirs}",
+                            "agents": p.left_agents if is_left else p.right_agents,
+                            "atk": atk, "def": dfn, "pistol_w": pw, "pistol_l": pl})
+                if len(out) == k:
+                    return out
+        return out
+
+    def map_game_count(self, map_name: str) -> int:
+        """Series in which the team played the map (for paging map_games)"""
+        return len(self.rows_of_map.get(map_name, ()))
+
+    def page(self, rows: np.ndarray, page: int, size: int) -> List[dict]:
+        """Display rows for rows[page * size:(page + 1) * size]"""
+        out = []
+        for i in rows[page * size:(page + 1) * size].tolist():
+            m = self.matches[i]
+            is_left = m.left == self.team
+            maps = []
+            for p in m.played:
+                mine, theirs = (p.ls, p.rs) if is_left else (p.rs, p.ls)
+                line = f"{p.map or 'Unknown'} {mine}-{theirs}"
+                if p.pistols:
+                    pm, po = p.pistols if is_left else p.pistols[::-1]
+                    line += f" (P:{pm}-{po})"
+                maps.append(line)
+            mw, ml, rw, rl = self.score[i].tolist()
+            out.append({"Date": m.date, "Opponent": self.opponents[i],
+                        "Result": {1: "✅ W", -1: "❌ L"}.get(int(self.result[i]), "–"),
+                        "Score": f"{mw}-{ml}", "Maps": " · ".join(maps), "Round diff": rw - rl, "Patch": m.patch})
+        return out
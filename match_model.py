@@ -0,0 +1,174 @@
+# match_model.py
+# Compact in-memory match model used by the stats engine and the dashboard.
+# json.load gives every match as nested dicts with a fresh string for each
+# team, map and agent occurrence and a dict per pistol/side breakdown. Here
+# matches, maps and veto events are __slots__ records, names and dates are
+# interned (one shared string per distinct value), scores are parsed to ints
+# once, and agent lineups are fixed-width tuples of those shared names.
+# Map names that fail valid_map are stored as None, so consumers only test
+# truthiness. data.json files written by normalize.py (marked with "schema":
+# SCHEMA_VERSION) take the from_clean path, which trusts types and keys.
+
+from typing import Callable, Iterable, List, Optional, Tuple
+
+SCHEMA_VERSION = 1
+
+
+def safe_int(v, d=0):
+    if v is None: return d
+    try: return int(v)
+    except: return d
+
+
+def _int(v) -> int:
+    return v if type(v) is int else safe_int(v)
+
+
+def _pair(d, a: str, b: str) -> Optional[tuple]:
+    if not d or not isinstance(d, dict):
+        return None
+    return _int(d.get(a, 0)), _int(d.get(b, 0))
+
+
+def valid_map(mn):
+    # Skips scraping garbage (long or multi-line text where a map name should be)
+    if not mn or not isinstance(mn, str) or len(mn) > 20: return False
+    return '\t' not in mn and '\n' not in mn
+
+
+def _map(mn):
+    return mn if valid_map(mn) else None
+
+
+def _no_intern(v):
+    return v
+
+# from_dict(..., intern=) takes a value -> canonical value function; parse_matches
+# passes a NamePool lookup so equal names across all records share one object
+Interner = Callable[[object], object]
+
+
+class NamePool(dict):
+    """pool[v] returns the first-seen object equal to v (hits stay a plain dict lookup)"""
+
+    def __missing__(self, v):
+        self[v] = v
+        return v
+
+
+class MapResult:
+    """One played map. pistols = (left, right), sides = (left_atk, left_def, right_atk, right_def); None when not scraped"""
+    __slots__ = ("map", "ls", "rs", "picked_by", "left_agents", "right_agents", "pistols", "sides", "date")
+
+    def __init__(self, map, ls=0, rs=0, picked_by=None, left_agents=(), right_agents=(),
+                 pistols=None, sides=None, date=None):
+        self.map = map
+        self.ls, self.rs = ls, rs
+        self.picked_by = picked_by
+        self.left_agents, self.right_agents = left_agents, right_agents
+        self.pistols, self.sides = pistols, sides
+        self.date = date
+
+    @classmethod
+    def from_dict(cls, p: dict, intern: Interner = _no_intern) -> "MapResult":
+        get = p.get
+        sides = _pair(get("sides"), "left_atk", "left_def")
+        if sides is not None:
+            sides += _pair(p["sides"], "right_atk", "right_def")
+        return cls(intern(_map(get("map"))), _int(get("ls", 0)), _int(get("rs", 0)), intern(get("picked_by")),
+                   tuple(map(intern, get("left_agents") or ())), tuple(map(intern, get("right_agents") or ())),
+                   _pair(get("pistols"), "left", "right"), sides, intern(get("date")))
+
+    @classmethod
+    def from_clean(cls, p: dict, intern: Interner = _no_intern) -> "MapResult":
+        pistols, sides = p["pistols"], p["sides"]
+        return cls(intern(p["map"]), p["ls"], p["rs"], intern(p["picked_by"]),
+                   tuple(map(intern, p["left_agents"])), tuple(map(intern, p["right_agents"])),
+                   (pistols["left"], pistols["right"]) if pistols else None,
+                   (sides["left_atk"], sides["left_def"], sides["right_atk"], sides["right_def"]) if sides else None,
+                   intern(p.get("date")))
+
+    def to_dict(self) -> dict:
+        d = {"map": self.map, "ls": self.ls, "rs": self.rs, "picked_by": self.picked_by,
+             "left_agents": list(self.left_agents), "right_agents": list(self.right_agents),
+             "pistols": dict(zip(("left", "right"), self.pistols)) if self.pistols else {},
+             "sides": dict(zip(("left_atk", "left_def", "right_atk", "right_def"), self.sides)) if self.sides else {}}
+        if self.date: d["date"] = self.date
+        return d
+
+
+class VetoEvent:
+    __slots__ = ("order", "type", "team", "map")
+
+    def __init__(self, order, type, team, map):
+        self.order, self.type, self.team, self.map = order, type, team, map
+
+    @classmethod
+    def from_dict(cls, e: dict, intern: Interner = _no_intern) -> "VetoEvent":
+        get = e.get
+        return cls(get("order"), intern(get("type")), intern(get("team")), intern(_map(get("map"))))
+
+    @classmethod
+    def from_clean(cls, e: dict, intern: Interner = _no_intern) -> "VetoEvent":
+        return cls(e["order"], intern(e["type"]), intern(e["team"]), intern(e["map"]))
+
+    def to_dict(self) -> dict:
+        return {"order": self.order, "type": self.type, "team": self.team, "map": self.map}
+
+
+class Match:
+    """One series. veto is the ordered tuple of VetoEvents (empty when the veto wasn't scraped)"""
+    __slots__ = ("id", "date", "left", "right", "winner", "played", "veto", "decider", "patch")
+
+    def __init__(self, id, date, left, right, winner=None, played=(), veto=(), decider=None, patch=None):
+        self.id, self.date = id, date
+        self.left, self.right, self.winner = left, right, winner
+        self.played: Tuple[MapResult, ...] = played
+        self.veto: Tuple[VetoEvent, ...] = veto
+        self.decider = decider
+        self.patch = patch
+
+    @classmethod
+    def from_dict(cls, m: dict, intern: Interner = _no_intern) -> "Match":
+        get = m.get
+        veto = get("veto") or {}
+        return cls(get("id"), intern(get("date")), intern(get("left")), intern(get("right")), intern(get("winner")),
+                   tuple([MapResult.from_dict(p, intern) for p in get("played") or ()]),
+                   tuple([VetoEvent.from_dict(e, intern) for e in veto.get("events") or ()]),
+                   intern(_map(veto.get("decider"))), intern(get("patch")))
+
+    @classmethod
+    def from_clean(cls, m: dict, intern: Interner = _no_intern) -> "Match":
+        veto = m["veto"]
+        return cls(m["id"], intern(m["date"]), intern(m["left"]), intern(m["right"]), intern(m["winner"]),
+                   tuple([MapResult.from_clean(p, intern) for p in m["played"]]),
+                   tuple([VetoEvent.from_clean(e, intern) for e in veto["events"]]),
+                   intern(veto["decider"]), intern(m["patch"]))
+
+    def to_dict(self) -> dict:
+        veto = {"events": [e.to_dict() for e in self.veto], "decider": self.decider} if (self.veto or self.decider) else None
+        d = {"id": self.id, "date": self.date, "left": self.left, "right": self.right, "winner": self.winner,
+             "played": [p.to_dict() for p in self.played], "veto": veto}
+        if self.patch: d["patch"] = self.patch
+        return d
+
+    def fields(self) -> tuple:
+        """Every field as plain tuples: equal for equal records from different parses"""
+        return (self.id, self.date, self.left, self.right, self.winner, self.decider, self.patch,
+                tuple([(p.map, p.ls, p.rs, p.picked_by, p.left_agents, p.right_agents, p.pistols, p.sides, p.date)
+                       for p in self.played]),
+                tuple([(e.order, e.type, e.team, e.map) for e in self.veto]))
+
+    def opponent(self, team: str) -> str:
+        return self.right if self.left == team else self.left
+
+    def __repr__(self):
+        return f"Match({self.id}, {self.date}, {self.left} vs {self.right})"
+
+
+def parse_matches(raw: Iterable[dict], pool: NamePool = None, trusted: bool = False) -> List[Match]:
+    """Records for data.json match dicts; pass the same pool to share names with other parses.
+    trusted=True is for normalized data (normalize.py) and skips the per-field checks"""
+    intern = (pool if pool is not None else NamePool()).__getitem__
+    make = Match.from_clean if trusted else Match.from_dict
+    return [make(m, intern) for m in raw]
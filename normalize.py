@@ -0,0 +1,189 @@
+# normalize.py
+# Build-time schema pass over data.json match records.
+# build_data_json.py runs every match through here before writing data.json:
+# ids, scores and pistol/side counts become ints, map names are mapped onto
+# the scraper's MAP_NAMES and agents onto AGENT_CANON, veto events are checked
+# against the two teams, and every key the match model reads is present
+# (pistols/sides are {} when not scraped, veto is {"events": [], "decider":
+# None} when missing). Anything that can't be repaired is dropped at the
+# smallest level that makes the rest valid (value, map, event or match) and
+# listed in rejects.json. The output carries "schema": SCHEMA_VERSION so
+# match_model.parse_matches can skip its per-field checks.
+
+from collections import Counter
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from match_model import SCHEMA_VERSION
+from vlr_veto_and_result import AGENT_CANON, MAP_NAMES, canonical_agent
+
+MAP_CANON = {m.lower(): m for m in MAP_NAMES}
+KNOWN_AGENTS = set(AGENT_CANON.values())
+VETO_TYPES = ("ban", "pick", "decider")
+LINEUP = 5
+
+
+def to_int(v) -> Optional[int]:
+    """int for ints, integral floats and integer strings; None for anything else"""
+    if type(v) is int:
+        return v
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    if isinstance(v, str):
+        try:
+            return int(v.strip())
+        except ValueError:
+            return None
+    return None
+
+
+def canonical_map(v) -> Optional[str]:
+    return MAP_CANON.get(v.strip().lower()) if isinstance(v, str) else None
+
+
+def _team(v) -> Optional[str]:
+    return v.strip() if isinstance(v, str) and v.strip() else None
+
+
+class Normalizer:
+    """Normalizes matches one at a time and collects a reject row for every repair or drop"""
+
+    def __init__(self):
+        self.rejects: List[dict] = []
+        self._id = None
+
+    def reject(self, where: str, problem: str, value, action: str) -> None:
+        self.rejects.append({"id": self._id, "where": where, "problem": problem, "value": value, "action": action})
+
+    def counts(self, pairs, keys: Tuple[str, ...], where: str) -> dict:
+        """{key: int} when every key holds a non-negative int, else {} (and a reject when something was there)"""
+        if not pairs:
+            return {}
+        vals = {k: to_int(pairs.get(k)) for k in keys} if isinstance(pairs, dict) else {}
+        if len(vals) < len(keys) or any(v is None or v < 0 for v in vals.values()):
+            self.reject(where, "bad counts", pairs, "cleared")
+            return {}
+        return vals
+
+    def agents(self, raw, where: str) -> List[str]:
+        out = []
+        if raw is not None and not isinstance(raw, list):
+            self.reject(where, "not a list", raw, "cleared")
+            raw = []
+        for a in raw or ():
+            canon = canonical_agent(a) if isinstance(a, str) else None
+            if canon is None:
+                self.reject(where, "not an agent", a, "dropped value")
+            elif canon in out:
+                self.reject(where, "duplicate agent", a, "dropped value")
+            else:
+                if canon not in KNOWN_AGENTS:
+                    self.reject(where, "unknown agent", a, "kept")
+                out.append(canon)
+        if len(out) > LINEUP:
+            self.reject(where, "more than 5 agents", out, "truncated")
+            out = out[:LINEUP]
+        return out
+
+    def played(self, p, i: int, teams: Tuple[str, str]) -> Optional[dict]:
+        where = f"played[{i}]"
+        if not isinstance(p, dict):
+            self.reject(where, "not a map record", p, "dropped map")
+            return None
+        mp = canonical_map(p.get("map"))
+        if mp is None:
+            self.reject(where, "unknown map", p.get("map"), "dropped map")
+            return None
+        ls, rs = to_int(p.get("ls")), to_int(p.get("rs"))
+        if ls is None or rs is None or ls < 0 or rs < 0:
+            self.reject(where, "bad score", [p.get("ls"), p.get("rs")], "dropped map")
+            return None
+        picked_by = p.get("picked_by")
+        if picked_by is not None and picked_by not in teams:
+            self.reject(where + ".picked_by", "not one of the teams", picked_by, "cleared")
+            picked_by = None
+        return {"map": mp, "ls": ls, "rs": rs, "picked_by": picked_by,
+                "left_agents": self.agents(p.get("left_agents"), where + ".left_agents"),
+                "right_agents": self.agents(p.get("right_agents"), where + ".right_agents"),
+                "pistols": self.counts(p.get("pistols"), ("left", "right"), where + ".pistols"),
+                "sides": self.counts(p.get("sides"), ("left_atk", "left_def", "right_atk", "right_def"), where + ".sides")}
+
+    def veto(self, v, teams: Tuple[str, str]) -> dict:
+        if not v:
+            return {"events": [], "decider": None}
+        if not isinstance(v, dict):
+            self.reject("veto", "not a veto record", v, "cleared")
+            return {"events": [], "decider": None}
+        events = []
+        for i, e in enumerate(v.get("events") or ()):
+            where = f"veto.events[{i}]"
+            kind = e.get("type", "").lower() if isinstance(e, dict) and isinstance(e.get("type"), str) else None
+            mp = canonical_map(e.get("map")) if isinstance(e, dict) else None
+            team = e.get("team") if isinstance(e, dict) else None
+            if kind not in VETO_TYPES or mp is None or (kind != "decider" and team not in teams):
+                self.reject(where, "bad veto event", e, "dropped event")
+                continue
+            order = to_int(e.get("order"))
+            events.append({"order": order if order is not None else i + 1, "type": kind,
+                           "team": team if kind != "decider" else None, "map": mp})
+        decider = v.get("decider")
+        if decider is not None:
+            decider = canonical_map(decider)
+            if decider is None:
+                self.reject("veto.decider", "unknown map", v.get("decider"), "cleared")
+        return {"events": events, "decider": decider}
+
+    def match(self, m) -> Optional[dict]:
+        self._id = m.get("id") if isinstance(m, dict) else None
+        if not isinstance(m, dict):
+            self.reject("match", "not a match record", m, "dropped match")
+            return None
+        mid = to_int(m.get("id"))
+        if mid is None:
+            self.reject("id", "bad id", m.get("id"), "dropped match")
+            return None
+        teams = _team(m.get("left")), _team(m.get("right"))
+        if None in teams or teams[0] == teams[1]:
+            self.reject("teams", "missing or identical teams", list(teams), "dropped match")
+            return None
+        d = m.get("date")
+        if d is not None:
+            try:
+                d = date.fromisoformat(d).isoformat()
+            except (TypeError, ValueError):
+                self.reject("date", "not an ISO date", d, "cleared")
+                d = None
+        winner = m.get("winner")
+        if winner is not None and winner not in teams:
+            self.reject("winner", "not one of the teams", winner, "cleared")
+            winner = None
+        played = [p for p in (self.played(p, i, teams) for i, p in enumerate(m.get("played") or ())) if p]
+        return {"id": mid, "date": d, "left": teams[0], "right": teams[1], "winner": winner, "played": played,
+                "veto": self.veto(m.get("veto"), teams), "patch": m.get("patch")}
+
+
+def normalize_matches(matches: List[dict]) -> Tuple[List[dict], List[dict]]:
+    """(clean matches, reject rows); a repeated match id keeps its first record"""
+    n = Normalizer()
+    out, seen = [], set()
+    for m in matches:
+        clean = n.match(m)
+        if clean is None:
+            continue
+        if clean["id"] in seen:
+            n.reject("id", "duplicate id", clean["id"], "dropped match")
+            continue
+        seen.add(clean["id"])
+        out.append(clean)
+    return out, n.rejects
+
+
+def normalize_data(data: dict) -> Tuple[dict, dict]:
+    """Normalized copy of a data.json dict, plus the reject report"""
+    matches, rejects = normalize_matches(data["matches"])
+    teams = sorted({m["left"] for m in matches} | {m["right"] for m in matches})
+    out = dict(data, schema=SCHEMA_VERSION, teams=teams, matches=matches)
+    summary: Dict[str, int] = Counter(r["action"] for r in rejects)
+    report = {"schema": SCHEMA_VERSION, "matches_in": len(data["matches"]), "matches_out": len(matches),
+              "summary": dict(summary), "problems": dict(Counter(r["problem"] for r in rejects)), "rejects": rejects}
+    return out, report
@@ -0,0 +1,66 @@
+# patches.py
+# Patch calendar: maps match dates to game patch IDs.
+# A calendar is a list of {"patch": id, "start": ISO date}; each patch runs
+# until the next one starts. build_data_json.py stamps every match with its
+# patch and stores the calendar in data.json, so stats can be split into
+# per-patch segments and recombined for multi-patch selections.
+# Override the default with a JSON file in the same format (--patches on
+# the build, or patches.json next to data.json).
+
+import json
+import os
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Major versions only, with approximate first-patch dates; point the build at a
+# patches.json with the real minor patches for finer segments.
+DEFAULT_CALENDAR = [
+    {"patch": "8.00", "start": "2024-01-09"},
+    {"patch": "9.00", "start": "2024-06-25"},
+    {"patch": "10.00", "start": "2025-01-08"},
+    {"patch": "11.00", "start": "2025-06-24"},
+    {"patch": "12.00", "start": "2026-01-06"},
+]
+
+
+def load_calendar(path: Optional[str] = None) -> List[dict]:
+    """Calendar from a JSON file, or the default when there is none; sorted by start date"""
+    calendar = DEFAULT_CALENDAR
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            calendar = json.load(f)
+    return sorted(calendar, key=lambda p: p["start"])
+
+
+class PatchLookup:
+    """date -> patch ID by binary search over the calendar's start dates"""
+
+    def __init__(self, calendar: List[dict]):
+        calendar = sorted(calendar, key=lambda p: p["start"])
+        self.starts = [p["start"] for p in calendar]
+        self.ids = [p["patch"] for p in calendar]
+
+    def __call__(self, d: Optional[str]) -> Optional[str]:
+        if not d:
+            return None
+        i = bisect_right(self.starts, d[:10]) - 1
+        return self.ids[i] if i >= 0 else None
+
+
+def assign_patches(matches: Iterable, calendar: List[dict]) -> None:
+    """Fill in the patch of matches that were built without one"""
+    lookup = PatchLookup(calendar)
+    for m in matches:
+        if m.patch is None:
+            m.patch = lookup(m.date)
+
+
+def patch_spans(matches: Iterable) -> Dict[str, Tuple[str, str]]:
+    """Patches present in the data, newest first, with their first and last match dates"""
+    spans: Dict[str, list] = {}
+    for m in matches:
+        if m.patch and m.date:
+            s = spans.setdefault(m.patch, [m.date, m.date])
+            if m.date < s[0]: s[0] = m.date
+            if m.date > s[1]: s[1] = m.date
+    return {p: tuple(s) for p, s in sorted(spans.items(), key=lambda kv: kv[1][0], reverse=True)}
@@ -0,0 +1,97 @@
+# profiling.py
+# Opt-in per-rerun timing instrumentation for the dashboard.
+# Enabled with ?debug=1 in the URL or VAL_PROFILE=1 in the environment.
+# Each named section is timed, logged as one JSON line to VAL_PROFILE_LOG
+# (default logs/rerun_timings.jsonl) and fed into process-wide rolling
+# p50/p95 stats shared by every session.
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+DEFAULT_LOG_PATH = "logs/rerun_timings.jsonl"
+WINDOW = 500
+
+
+def profiling_requested(query_params) -> bool:
+    if os.environ.get("VAL_PROFILE", "").lower() in ("1", "true", "yes"):
+        return True
+    return str(query_params.get("debug", "")).lower() in ("1", "true", "yes")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+
+class SectionStats:
+    """Rolling window of durations per section, shared across sessions"""
+
+    def __init__(self, window: int = WINDOW, log_path: str = None):
+        self.window = window
+        self.log_path = log_path or os.environ.get("VAL_PROFILE_LOG", DEFAULT_LOG_PATH)
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+
+    def record(self, records: List[dict]) -> None:
+        with self._lock:
+            for r in records:
+                self._samples.setdefault(r["section"], deque(maxlen=self.window)).append(r["ms"])
+            if self.log_path:
+                os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    for r in records:
+                        f.write(json.dumps(r, ensure_ascii=False, default=str) + "\n")
+
+    def summary(self) -> List[dict]:
+        with self._lock:
+            snap = {k: sorted(v) for k, v in self._samples.items()}
+        return [{"section": k, "n": len(v), "p50_ms": percentile(v, 0.5), "p95_ms": percentile(v, 0.95)}
+                for k, v in sorted(snap.items())]
+
+
+class RerunProfiler:
+    """Times named sections of a single rerun; a no-op when disabled"""
+
+    def __init__(self, enabled: bool, shared: Optional[SectionStats] = None, store=None, **context):
+        self.enabled = enabled
+        self.shared = shared
+        self.store = store
+        self.context = context
+        self.records: List[dict] = []
+        self._t0 = time.perf_counter()
+
+    def section(self, name: str, **ctx):
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name, ctx)
+
+    @contextmanager
+    def _timed(self, name: str, ctx: dict):
+        if self.store is not None:
+            self.store.reset_outcome()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            rec = {"ts": time.time(), "section": name, "ms": (time.perf_counter() - t0) * 1000}
+            rec.update(self.context)
+            rec.update(ctx)
+            if self.store is not None and "cache" not in rec:
+                rec["cache"] = self.store.last_outcome()
+            self.records.append(rec)
+
+    def finish(self) -> None:
+        if not self.enabled:
+            return
+        total = {"ts": time.time(), "section": "rerun_total", "ms": (time.perf_counter() - self._t0) * 1000}
+        total.update(self.context)
+        self.records.append(total)
+        if self.shared is not None:
+            self.shared.record(self.records)
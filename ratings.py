@@ -0,0 +1,127 @@
+# ratings.py
+# Incremental Elo team ratings.
+# Matches are applied in (date, match id) order, either once per series or
+# once per played map, with optional margin-of-victory weighting from round
+# differences. Every update is kept in a per-team history, so newer matches
+# are applied in O(new matches) and a late-arriving older match only rolls
+# back and replays the matches after it.
+
+import math
+from bisect import bisect_left
+from operator import itemgetter
+from typing import Dict, Iterable, List, Tuple
+
+BASE_RATING = 1500.0
+K_FACTOR = 24.0
+SCALE = 400.0
+
+
+def expected_score(r_a: float, r_b: float) -> float:
+    return 1 / (1 + 10 ** ((r_b - r_a) / SCALE))
+
+
+def margin_multiplier(round_diff: int, winner_elo_diff: float) -> float:
+    """Bigger wins move ratings more, damped when the favourite wins (FiveThirtyEight-style)"""
+    if round_diff <= 0:
+        return 1.0
+    return math.log(round_diff + 1) * 2.2 / (0.001 * winner_elo_diff + 2.2)
+
+
+def match_key(m) -> tuple:
+    return (m.date, m.id if m.id is not None else -1)
+
+
+class EloRatings:
+    """Team ratings plus their full history; add() new matches as they land"""
+
+    def __init__(self, matches: Iterable = (), k: float = K_FACTOR, per_map: bool = False, margin: bool = True):
+        self.k = k
+        self.per_map = per_map
+        self.margin = margin
+        self.ratings: Dict[str, float] = {}
+        self.history: Dict[str, List[Tuple[tuple, float]]] = {}  # team -> [(match key, rating after)]
+        self.applied: List[tuple] = []                            # (match key, match) in applied order
+        self.add(matches)
+
+    def copy(self, matches: Iterable = None) -> "EloRatings":
+        """Independent copy to add() to; with matches, applied records are swapped for their same-id
+        records there (a newer parse of the same data), so the copy doesn't keep the old ones alive"""
+        new = EloRatings(k=self.k, per_map=self.per_map, margin=self.margin)
+        new.ratings = dict(self.ratings)
+        new.history = {team: list(hist) for team, hist in self.history.items()}
+        by_id = {m.id: m for m in matches} if matches is not None else {}
+        new.applied = [(key, by_id.get(m.id, m)) for key, m in self.applied]
+        return new
+
+    def extended(self, matches: Iterable, current: Iterable = None) -> "EloRatings":
+        """A copy with new matches added (this one is left as is); current as in copy()"""
+        new = self.copy(current)
+        new.add(matches)
+        return new
+
+    def rating(self, team: str) -> float:
+        return self.ratings.get(team, BASE_RATING)
+
+    def add(self, matches: Iterable) -> int:
+        """Apply new matches; returns how many matches were (re)applied"""
+        new = sorted(((match_key(m), m) for m in matches if m.date and m.left and m.right), key=itemgetter(0))
+        if not new:
+            return 0
+        if self.applied and new[0][0] < self.applied[-1][0]:
+            # Late data: undo everything after the earliest new match, then replay it merged with the new matches
+            cut = bisect_left(self.applied, new[0][0], key=itemgetter(0))
+            self._rollback(new[0][0])
+            new = sorted(self.applied[cut:] + new, key=itemgetter(0))
+            del self.applied[cut:]
+        for key, m in new:
+            self._apply(key, m)
+            self.applied.append((key, m))
+        return len(new)
+
+    def _rollback(self, key: tuple) -> None:
+        for team, hist in self.history.items():
+            while hist and hist[-1][0] >= key:
+                hist.pop()
+            self.ratings[team] = hist[-1][1] if hist else BASE_RATING
+
+    def _update(self, left: str, right: str, left_won: bool, round_diff: int) -> None:
+        r_l, r_r = self.rating(left), self.rating(right)
+        e_l = expected_score(r_l, r_r)
+        k = self.k
+        if self.margin:
+            k *= margin_multiplier(round_diff, (r_l - r_r) if left_won else (r_r - r_l))
+        delta = k * ((1.0 if left_won else 0.0) - e_l)
+        self.ratings[left] = r_l + delta
+        self.ratings[right] = r_r - delta
+
+    def _apply(self, key: tuple, m) -> None:
+        if self.per_map:
+            for p in m.played:
+                if p.ls == p.rs: continue
+                self._update(m.left, m.right, p.ls > p.rs, abs(p.ls - p.rs))
+        elif m.winner in (m.left, m.right):
+            # Round margin from the winner's side: a series won while losing on total rounds gets no boost
+            diff = sum(p.ls - p.rs for p in m.played)
+            self._update(m.left, m.right, m.winner == m.left, diff if m.winner == m.left else -diff)
+        else:
+            return
+        for team in (m.left, m.right):
+            self.history.setdefault(team, []).append((key, self.rating(team)))
+
+    def trajectory(self, team: str) -> List[Tuple[str, float]]:
+        """(date, rating after that match) for every rated match of the team"""
+        return [(key[0], r) for key, r in self.history.get(team, [])]
+
+    def change(self, team: str, last_n: int = 10) -> float:
+        """Rating change over the team's last_n rated matches"""
+        hist = self.history.get(team, [])
+        if not hist:
+            return 0.0
+        before = hist[-last_n - 1][1] if len(hist) > last_n else BASE_RATING
+        return hist[-1][1] - before
+
+    def table(self) -> List[dict]:
+        rows = [{"Team": t, "Elo": r, "Rated": len(self.history.get(t, []))} for t, r in self.ratings.items()]
+        rows.sort(key=lambda x: x["Elo"], reverse=True)
+        for i, row in enumerate(rows, 1): row["#"] = i
+        return rows
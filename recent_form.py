@@ -0,0 +1,161 @@
+# recent_form.py
+# Recent-form stats from per-team, date-sorted prefix sums.
+# Each team keeps running totals of series, maps, rounds, pistols and
+# attack/defense rounds in match-date order (plus per-map win totals), so
+# any "last N series" or "last N days" window is a difference of two
+# entries. Building is O(n); appending newer matches extends the sums in
+# place, and out-of-order arrivals re-sort only the affected teams. When
+# data.json only gains matches, the dashboard extends the previous data
+# version's index (extended(), on copies of the touched teams' sums).
+
+from array import array
+from bisect import bisect_right
+from datetime import date, timedelta
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from stats_engine import calc_wr
+
+FORM_FIELDS = ("series", "series_wins", "map_wins", "map_losses", "round_wins", "round_losses",
+               "pistol_wins", "pistol_losses", "atk_won", "atk_lost", "def_won", "def_lost")
+FORM_DAYS = (30, 60, 90)
+
+
+class PrefixSums:
+    """Rows of int columns sorted by (date, tiebreak) keys, stored as running totals: any row range sums in O(1)"""
+
+    def __init__(self, width: int):
+        self.width = width
+        self.keys: List[tuple] = []
+        self.sums = [array("q", [0]) for _ in range(width)]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def extend(self, rows: List[Tuple[tuple, tuple]]) -> None:
+        """Add sorted (key, values) rows; keys before the current last one trigger a re-sort"""
+        if not rows:
+            return
+        if self.keys and rows[0][0] < self.keys[-1]:
+            rows = sorted(self.rows() + rows, key=itemgetter(0))
+            self.keys = []
+            self.sums = [array("q", [0]) for _ in range(self.width)]
+        for key, values in rows:
+            self.keys.append(key)
+            for col, v in zip(self.sums, values):
+                col.append(col[-1] + v)
+
+    def copy(self) -> "PrefixSums":
+        new = PrefixSums(self.width)
+        new.keys = list(self.keys)
+        new.sums = [array("q", col) for col in self.sums]
+        return new
+
+    def rows(self) -> List[Tuple[tuple, tuple]]:
+        return [(k, tuple(col[i + 1] - col[i] for col in self.sums)) for i, k in enumerate(self.keys)]
+
+    def total(self, i: int, j: int) -> tuple:
+        """Column sums over rows [i, j)"""
+        return tuple(col[j] - col[i] for col in self.sums)
+
+    def span(self, after: str = None, until: str = None) -> Tuple[int, int]:
+        """Row range with after < date <= until (ISO date strings)"""
+        i = bisect_right(self.keys, after, key=itemgetter(0)) if after else 0
+        j = bisect_right(self.keys, until, key=itemgetter(0)) if until else len(self.keys)
+        return i, max(i, j)
+
+
+def series_row(m, team: str) -> tuple:
+    """One FORM_FIELDS row for team's side of a match"""
+    is_left = m.left == team
+    row = [1, int(m.winner == team)] + [0] * (len(FORM_FIELDS) - 2)
+    for p in m.played:
+        my_s, op_s = (p.ls, p.rs) if is_left else (p.rs, p.ls)
+        row[2 if my_s > op_s else 3] += 1
+        row[4] += my_s; row[5] += op_s
+        if p.pistols:
+            my_p, op_p = p.pistols if is_left else p.pistols[::-1]
+            row[6] += my_p; row[7] += op_p
+        if p.sides:
+            my_atk, my_def, opp_atk, opp_def = p.sides if is_left else p.sides[2:] + p.sides[:2]
+            row[8] += my_atk; row[9] += opp_def
+            row[10] += my_def; row[11] += opp_atk
+    return tuple(row)
+
+
+class FormIndex:
+    """Per-team prefix sums over all dated matches; windows are relative to the latest match date"""
+
+    def __init__(self, matches: Iterable = ()):
+        self.series: Dict[str, PrefixSums] = {}
+        self.maps: Dict[Tuple[str, str], PrefixSums] = {}
+        self.latest: Optional[str] = None
+        self.add(matches)
+
+    def add(self, matches: Iterable) -> None:
+        series_rows: Dict[str, list] = {}
+        map_rows: Dict[Tuple[str, str], list] = {}
+        for m in matches:
+            if not m.date:
+                continue
+            # Same-day series are ordered by match id so batch and incremental builds agree
+            mid = m.id if m.id is not None else -1
+            for team in {m.left, m.right}:
+                if not team: continue
+                series_rows.setdefault(team, []).append(((m.date, mid), series_row(m, team)))
+                is_left = m.left == team
+                for n, p in enumerate(m.played):
+                    if not p.map: continue
+                    my_s, op_s = (p.ls, p.rs) if is_left else (p.rs, p.ls)
+                    map_rows.setdefault((team, p.map), []).append(((p.date or m.date, mid, n), (int(my_s > op_s),)))
+            if self.latest is None or m.date > self.latest:
+                self.latest = m.date
+        for team, rows in series_rows.items():
+            rows.sort(key=itemgetter(0))
+            self.series.setdefault(team, PrefixSums(len(FORM_FIELDS))).extend(rows)
+        for key, rows in map_rows.items():
+            rows.sort(key=itemgetter(0))
+            self.maps.setdefault(key, PrefixSums(1)).extend(rows)
+
+    def extended(self, matches: Iterable) -> "FormIndex":
+        """A copy with new matches added (this one is left as is); only teams the new matches touch are copied"""
+        matches = list(matches)
+        touched = {t for m in matches if m.date for t in (m.left, m.right) if t}
+        new = FormIndex()
+        new.latest = self.latest
+        new.series = {t: ps.copy() if t in touched else ps for t, ps in self.series.items()}
+        new.maps = {k: ps.copy() if k[0] in touched else ps for k, ps in self.maps.items()}
+        new.add(matches)
+        return new
+
+    def window(self, team: str, last_n: int = None, days: int = None) -> Dict[str, int]:
+        """FORM_FIELDS totals over the team's last_n series or the last `days` days of data"""
+        ps = self.series.get(team)
+        if ps is None:
+            return dict.fromkeys(FORM_FIELDS, 0)
+        if days is not None:
+            cutoff = (date.fromisoformat(self.latest) - timedelta(days=days)).isoformat()
+            i, j = ps.span(after=cutoff)
+        else:
+            j = len(ps)
+            i = max(0, j - last_n) if last_n else 0
+        return dict(zip(FORM_FIELDS, ps.total(i, j)))
+
+    def recent_form(self, team: str, last_n: int = 10, days: Tuple[int, ...] = FORM_DAYS) -> Dict[str, dict]:
+        """{"Last 10": totals, "30 days": totals, ...}"""
+        out = {f"Last {last_n}": self.window(team, last_n=last_n)}
+        for d in days:
+            out[f"{d} days"] = self.window(team, days=d)
+        return out
+
+    def map_trend(self, team: str, map_name: str, window: int = 5) -> List[Tuple[str, float]]:
+        """(date, win rate %) over the team's last `window` games on the map, at every game played"""
+        ps = self.maps.get((team, map_name))
+        if ps is None:
+            return []
+        wins = ps.sums[0]
+        out = []
+        for j in range(1, len(ps) + 1):
+            i = max(0, j - window)
+            out.append((ps.keys[j - 1][0], calc_wr(wins[j] - wins[i], (j - i) - (wins[j] - wins[i]))))
+        return out
@@ -0,0 +1,213 @@
+# report.py
+# Command-line reports from data.json using the stats engine (no Streamlit).
+# Usage: python report.py [--region EMEA] [--from 2026-01-01] [--to 2026-02-01] [--patch 12.00] leaderboard [--top 20] [--csv]
+#        python report.py team "Team Liquid"
+#        python report.py h2h "Team Liquid" "FNATIC"
+#        python report.py form "Team Liquid"
+#        python report.py ratings [--top 20] [--per-map] [--no-margin]
+#        python report.py --from 2026-01-01 comps [--map Lotus] [--roles Controller=2]
+#        python report.py predict "Team Liquid" "FNATIC" [--format Bo5]
+#        python report.py veto "Team Liquid" "FNATIC" [--format Bo5]
+
+import argparse
+import csv
+import sys
+
+from comp_index import ROLES, CompIndex
+from predictor import current_map_pool, simulate
+from ratings import EloRatings
+from recent_form import FormIndex
+from stats_engine import (
+    REGION_TEAMS, calc_wr, filter_matches, get_leaderboard, get_team_stats, h2h_matches, load_data,
+)
+from veto_model import VetoModel
+
+LEADERBOARD_COLUMNS = ["#", "Team", "Matches", "W-L", "Win %", "Map W-L", "Map %",
+                       "Round W-L", "Round %", "Pistol W-L", "Pistol %"]
+
+
+def print_table(rows, columns):
+    cells = [[f"{r[c]:.1f}" if isinstance(r[c], float) else str(r[c]) for c in columns] for r in rows]
+    widths = [max([len(c)] + [len(row[i]) for row in cells]) for i, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+
+
+def report_leaderboard(teams, matches, args):
+    rows = get_leaderboard(teams, matches)[:args.top]
+    if args.csv:
+        w = csv.DictWriter(sys.stdout, fieldnames=LEADERBOARD_COLUMNS, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(rows)
+    else:
+        print_table(rows, LEADERBOARD_COLUMNS)
+
+
+def report_team(team, matches):
+    tm = [m for m in matches if m.left == team or m.right == team]
+    if not tm:
+        print(f"No matches found for {team}")
+        return
+    s, _ = get_team_stats(team, tm)
+    print(f"{team}: series {s['series_wins']}-{s['series_losses']} "
+          f"({calc_wr(s['series_wins'], s['series_losses']):.1f}%), "
+          f"maps {s['total_map_wins']}-{s['total_map_losses']}, "
+          f"pistols {s['pistol_wins']}-{s['pistol_losses']}")
+    rows = []
+    for mn, d in sorted(s["maps"].items()):
+        rows.append({"Map": mn, "W-L": f"{d['wins']}-{d['losses']}", "Win %": calc_wr(d["wins"], d["losses"]),
+                     "Picks": d["picks"], "Bans": d["bans"],
+                     "1st Ban": s["ban_1st"].get(mn, 0), "2nd Ban": s["ban_2nd"].get(mn, 0)})
+    print()
+    print_table(rows, ["Map", "W-L", "Win %", "Picks", "Bans", "1st Ban", "2nd Ban"])
+
+
+def report_h2h(team1, team2, matches):
+    h2h = h2h_matches(matches, team1, team2)
+    if not h2h:
+        print(f"No direct matches found between {team1} and {team2}")
+        return
+    s1, _ = get_team_stats(team1, h2h)
+    s2, _ = get_team_stats(team2, h2h)
+    print(f"{team1} {s1['series_wins']} - {s2['series_wins']} {team2} "
+          f"(maps {s1['total_map_wins']}-{s2['total_map_wins']})")
+    for m in sorted(h2h, key=lambda x: x.date or "0000", reverse=True):
+        is_left = m.left == team1
+        maps = ", ".join(f"{p.map} {p.ls if is_left else p.rs}-{p.rs if is_left else p.ls}" for p in m.played)
+        print(f"  {m.date}  {'W' if m.winner == team1 else 'L'}  {maps}")
+
+
+def report_form(team, matches):
+    index = FormIndex(matches)
+    rows = []
+    for label, w in index.recent_form(team).items():
+        losses = w["series"] - w["series_wins"]
+        rows.append({"Window": label, "Series": f"{w['series_wins']}-{losses}",
+                     "Win %": calc_wr(w["series_wins"], losses),
+                     "Maps": f"{w['map_wins']}-{w['map_losses']}",
+                     "Round %": calc_wr(w["round_wins"], w["round_losses"]),
+                     "Pistol %": calc_wr(w["pistol_wins"], w["pistol_losses"]),
+                     "Atk %": calc_wr(w["atk_won"], w["atk_lost"]), "Def %": calc_wr(w["def_won"], w["def_lost"])})
+    print(f"{team}: recent form up to {index.latest}")
+    print_table(rows, ["Window", "Series", "Win %", "Maps", "Round %", "Pistol %", "Atk %", "Def %"])
+
+
+def report_ratings(matches, args):
+    elo = EloRatings(matches, per_map=args.per_map, margin=not args.no_margin)
+    rows = [dict(r, Elo=f"{r['Elo']:.0f}", Change=f"{elo.change(r['Team']):+.0f}") for r in elo.table()[:args.top]]
+    print_table(rows, ["#", "Team", "Elo", "Change", "Rated"])
+
+
+def report_comps(matches, args):
+    ci = CompIndex(matches)
+    print(f"Most successful comps{' on ' + args.map if args.map else ''} (min {args.min_games} games)")
+    print_table(ci.comp_stats(min_games=args.min_games, top=args.top, map_name=args.map),
+                ["Comp", "Games", "Wins", "Win %"])
+    if args.roles:
+        roles = {}
+        for spec in args.roles:
+            role, _, count = spec.partition("=")
+            if role not in ROLES:
+                sys.exit(f"Unknown role {role!r}; choose from {', '.join(ROLES)}")
+            roles[role] = int(count or 1)
+        print()
+        print(f"Teams running {', '.join(f'{k}x {r}' for r, k in roles.items())}")
+        print_table(ci.teams_with_roles(roles, map_name=args.map), ["Team", "Games", "Wins", "Win %", "Share %"])
+
+
+def report_predict(team1, team2, all_matches, matches, args):
+    elo = EloRatings(all_matches)
+    s1, _ = get_team_stats(team1, matches)
+    s2, _ = get_team_stats(team2, matches)
+    pred = simulate(current_map_pool(all_matches), s1, s2, elo.rating(team1), elo.rating(team2), args.format, args.sims)
+    print(f"{team1} {pred['team1_win']:.1f}% - {100 - pred['team1_win']:.1f}% {team2} "
+          f"({args.format}, {pred['sims']:,} simulations)")
+    print()
+    print_table(pred["scores"], ["Score", "Probability"])
+    print()
+    print_table(pred["maps"], ["Map", "In Series %", "Played %", "Team 1 Map Win %"])
+    print()
+    print_table(pred["sequences"], ["Maps", "Probability"])
+
+
+def report_veto(first, second, matches, args):
+    veto = VetoModel(matches).predict(first, second, current_map_pool(matches), args.format)
+    print(f"{first} vetoes first ({args.format})")
+    print()
+    print_table(veto["steps"], ["Step", "Team", "Action", "Map", "Probability", "Alternatives"])
+    print()
+    print_table(veto["sequences"], ["Veto", "Probability"])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Print dashboard stats from data.json")
+    ap.add_argument("--data", default="./web/data.json")
+    ap.add_argument("--region", default="All Regions", choices=["All Regions"] + list(REGION_TEAMS))
+    ap.add_argument("--from", dest="date_from", help="YYYY-MM-DD")
+    ap.add_argument("--to", dest="date_to", help="YYYY-MM-DD")
+    ap.add_argument("--patch", action="append", help="Only this patch ID (repeatable; see patches.py)")
+    sub = ap.add_subparsers(dest="command", required=True)
+    lb = sub.add_parser("leaderboard")
+    lb.add_argument("--top", type=int, default=None)
+    lb.add_argument("--csv", action="store_true")
+    tp = sub.add_parser("team")
+    tp.add_argument("team")
+    hp = sub.add_parser("h2h")
+    hp.add_argument("team1")
+    hp.add_argument("team2")
+    fp = sub.add_parser("form", help="Last 10 series and last 30/60/90 days (ignores --region/--from/--to)")
+    fp.add_argument("team")
+    rp = sub.add_parser("ratings", help="Elo table over all matches (ignores --region/--from/--to)")
+    rp.add_argument("--top", type=int, default=None)
+    rp.add_argument("--per-map", action="store_true", help="Rate every map instead of every series")
+    rp.add_argument("--no-margin", action="store_true", help="Ignore round margins")
+    cp = sub.add_parser("comps", help="Comp win rates and role setups (honours --region/--from/--to)")
+    cp.add_argument("--map")
+    cp.add_argument("--top", type=int, default=15)
+    cp.add_argument("--min-games", type=int, default=3)
+    cp.add_argument("--roles", nargs="+", metavar="ROLE=N", help="e.g. Controller=2")
+    pp = sub.add_parser("predict", help="Monte Carlo veto + series prediction (stats honour the filters, Elo uses all)")
+    pp.add_argument("team1")
+    pp.add_argument("team2")
+    pp.add_argument("--format", choices=["Bo3", "Bo5"], default="Bo3")
+    pp.add_argument("--sims", type=int, default=200_000)
+    vp = sub.add_parser("veto", help="Most likely veto, team1 vetoing first (uses all matches)")
+    vp.add_argument("team1")
+    vp.add_argument("team2")
+    vp.add_argument("--format", choices=["Bo3", "Bo5"], default="Bo3")
+    args = ap.parse_args()
+
+    teams, matches = load_data(args.data)
+    all_matches = matches
+    if args.command == "form":
+        report_form(args.team, matches)
+        return
+    if args.command == "ratings":
+        report_ratings(matches, args)
+        return
+    if args.command == "veto":
+        report_veto(args.team1, args.team2, matches, args)
+        return
+    date_range = None
+    if args.date_from or args.date_to:
+        date_range = (args.date_from or "0000-00-00", args.date_to or "9999-99-99")
+    matches = filter_matches(matches, args.region, date_range)
+    if args.patch:
+        matches = [m for m in matches if m.patch in args.patch]
+
+    if args.command == "leaderboard":
+        report_leaderboard(teams, matches, args)
+    elif args.command == "predict":
+        report_predict(args.team1, args.team2, all_matches, matches, args)
+    elif args.command == "comps":
+        report_comps(matches, args)
+    elif args.command == "team":
+        report_team(args.team, matches)
+    else:
+        report_h2h(args.team1, args.team2, matches)
+
+
+if __name__ == "__main__":
+    main()
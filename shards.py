@@ -0,0 +1,142 @@
+# shards.py
+# Sharded static output for the web/ frontend.
+# build_data_json.py --shards splits data.json into an index shard (teams
+# with their records, months, patches), one shard per team and one per month
+# of matches. Shard names carry a hash of their content, so a client can
+# cache them forever and only ever downloads what changed; manifest.json (the
+# one file to revalidate) maps teams and months to the current shard names.
+# Every shard also gets a precompressed .gz next to it (and .br when the
+# optional brotli package is installed) for static servers that serve
+# precompressed files (nginx gzip_static/brotli_static, Caddy precompressed).
+# Shards stay on disk while any of the last KEEP_BUILDS manifests references
+# them (generations.json records which), so clients holding an older cached
+# manifest, or a page loaded mid-deploy, still find every shard it names.
+# Layout:  <dir>/manifest.json
+#          <dir>/generations.json               files of the last KEEP_BUILDS builds, newest first
+#          <dir>/index.<hash>.json
+#          <dir>/team/<slug>.<hash>.json     matches of one team, newest first
+#          <dir>/month/<YYYY-MM>.<hash>.json matches of one month ("undated" for the rest)
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Tuple
+
+try:
+    import brotli
+except ImportError:   # optional: only .gz variants without it
+    brotli = None
+
+MANIFEST_VERSION = 1
+HASH_LEN = 12
+KEEP_BUILDS = 3
+GENERATIONS = "generations.json"
+
+
+def slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", name).strip("-").lower() or "team"
+
+
+def encode(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _write_atomic(path: str, body: bytes) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(body)
+    os.replace(tmp, path)
+
+
+class ShardWriter:
+    """Writes content-hashed shards plus their compressed variants; remembers every file it produced"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.written: set = set()
+        self.encodings = ["gz"] + (["br"] if brotli else [])
+        self.bytes = {"json": 0, "gz": 0, "br": 0}
+        self.new = 0
+
+    def put(self, subdir: str, stem: str, obj) -> str:
+        """Write obj as <subdir>/<stem>.<hash>.json (+ .gz/.br); returns the path relative to the shard dir"""
+        body = encode(obj)
+        digest = hashlib.sha256(body).hexdigest()[:HASH_LEN]
+        rel = f"{subdir}/{stem}.{digest}.json" if subdir else f"{stem}.{digest}.json"
+        path = os.path.join(self.directory, rel)
+        variants = {path: lambda: body, path + ".gz": lambda: gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli:
+            variants[path + ".br"] = lambda: brotli.compress(body, quality=11)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        for p, make in variants.items():
+            # Same name means same content: shards unchanged since the last build are left alone
+            if not os.path.exists(p):
+                _write_atomic(p, make())
+                self.new += 1
+            self.written.add(os.path.normpath(p))
+            self.bytes[p.rsplit(".", 1)[-1]] += os.path.getsize(p)
+        return rel
+
+    def prune(self, keep: int = KEEP_BUILDS) -> int:
+        """Record this build's files as the newest generation and remove shards that none of the
+        last `keep` builds wrote; without a record of earlier builds nothing is removed"""
+        path = os.path.join(self.directory, GENERATIONS)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                earlier = json.load(f)["builds"]
+        except (OSError, ValueError, KeyError):
+            earlier = None
+        builds = [sorted(os.path.relpath(p, self.directory).replace(os.sep, "/") for p in self.written)]
+        builds += (earlier or [])[:max(0, keep - 1)]
+        _write_atomic(path, json.dumps({"builds": builds}, indent=0).encode("utf-8"))
+        if earlier is None:
+            return 0
+        live = {os.path.normpath(os.path.join(self.directory, rel)) for files in builds for rel in files}
+        removed = 0
+        for root, _, files in os.walk(self.directory):
+            for fn in files:
+                p = os.path.normpath(os.path.join(root, fn))
+                if fn not in ("manifest.json", GENERATIONS) and p not in live:
+                    os.remove(p)
+                    removed += 1
+        return removed
+
+
+def team_record(team: str, matches: List[dict]) -> dict:
+    wins = sum(1 for m in matches if m.get("winner") == team)
+    decided = sum(1 for m in matches if m.get("winner"))
+    dates = [m["date"] for m in matches if m.get("date")]
+    return {"matches": len(matches), "wins": wins, "losses": decided - wins,
+            "first": min(dates) if dates else None, "last": max(dates) if dates else None}
+
+
+def write_shards(data: dict, directory: str, version: str = None, prune: bool = True,
+                 keep: int = KEEP_BUILDS) -> Tuple[dict, dict]:
+    """Shard a data.json dict into directory, keeping the shards of the last `keep` builds;
+    returns the manifest and file counts/sizes"""
+    newest = sorted(data["matches"], key=lambda m: m.get("date") or "", reverse=True)
+    by_team: Dict[str, List[dict]] = {t: [] for t in data["teams"]}
+    by_month: Dict[str, List[dict]] = {}
+    for m in newest:
+        for team in {m.get("left"), m.get("right")}:
+            if team in by_team:
+                by_team[team].append(m)
+        month = m["date"][:7] if m.get("date") else "undated"
+        by_month.setdefault(month, []).append(m)
+
+    w = ShardWriter(directory)
+    teams = {t: w.put("team", slug(t), {"team": t, "matches": ms}) for t, ms in by_team.items()}
+    months = {mo: w.put("month", mo, {"month": mo, "matches": ms}) for mo, ms in sorted(by_month.items())}
+    index = w.put("", "index", {
+        "teams": {t: dict(team_record(t, ms), shard=teams[t]) for t, ms in by_team.items()},
+        "months": {mo: {"matches": len(ms), "shard": months[mo]} for mo, ms in sorted(by_month.items())},
+        "patches": data.get("patches", []),
+    })
+    manifest = {"manifest_version": MANIFEST_VERSION, "version": version, "encodings": w.encodings,
+                "matches": len(data["matches"]), "index": index, "teams": teams, "months": months}
+    # The manifest goes last, so a client never sees it point at a shard that isn't there yet
+    _write_atomic(os.path.join(directory, "manifest.json"), json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8"))
+    removed = w.prune(keep) if prune else 0
+    return manifest, {"files": len(w.written), "new": w.new, "removed": removed, "bytes": w.bytes}
@@ -0,0 +1,324 @@
+# stats_engine.py
+# Streamlit-free stats engine: team stats, leaderboard, filtering and H2H
+# selection over data.json matches. Used by the dashboard, build-time
+# precomputation (build_data_json.py --precompute), report.py and the
+# benchmarks. Only standard-library imports, so batch jobs start fast.
+# Matches are match_model.Match records, not raw data.json dicts.
+
+import gc
+import json
+import re
+from functools import lru_cache
+
+from match_model import SCHEMA_VERSION, NamePool, parse_matches
+from patches import DEFAULT_CALENDAR, assign_patches
+from veto_model import VetoModel
+
+# Bump whenever cached or precomputed aggregates change shape or meaning
+ENGINE_VERSION = 6
+# Filter signature of the unfiltered view: the empty filter_engine query
+NO_FILTER = ()
+
+REGION_TEAMS = {
+    "Americas": [
+        "Sentinels", "NRG", "Cloud9", "100 Thieves", "Evil Geniuses", "LOUD",
+        "FURIA", "MIBR", "Leviatán", "KRÜ Esports", "G2 Esports", "Envy"
+    ],
+    "EMEA": [
+        "Team Liquid", "Team Vitality", "Team Heretics", "Fnatic",
+        "FUT Esports", "BBL Esports", "GIANTX", "Karmine Corp",
+        "Natus Vincere", "Gentle Mates", "PCIFIC Esports", "ULF Esports"
+    ],
+    "Pacific": [
+        "T1", "Nongshim RedForce", "DRX", "FULL SENSE", "Paper Rex", "ZETA DIVISION",
+        "Rex Regum Qeon", "DetonatioN FocusMe", "Talon Esports", "Team Secret",
+        "Global Esports", "Gen.G"
+    ],
+    "China": [
+        "EDward Gaming", "FunPlus Phoenix", "Trace Esports", "Bilibili Gaming",
+        "Wolves Esports", "TYLOO", "All Gamers", "JDG Esports",
+        "Titan Esports Club", "Dragon Ranger Gaming", "Xi Lai Gaming", "Nova Esports"
+    ],
+    "Masters Santiago": [
+        "All Gamers", "Xi Lai Gaming", "EDward Gaming", "Nongshim RedForce",
+        "T1", "Paper Rex", "BBL Esports", "Gentle Mates",
+        "Team Liquid", "FURIA", "G2 Esports", "NRG"
+    ]
+}
+
+@lru_cache(maxsize=4096)
+def normalize_name(name):
+    if not name: return ""
+    n = name.lower()
+    n = re.sub(r'\b(team|esports|gaming)\b', '', n)
+    n = re.sub(r'[^\w\s]', '', n)
+    return re.sub(r'\s+', ' ', n).strip()
+
+def is_team_in_region(team_name, region):
+    if not region or region == "All Regions": return True
+    for t in REGION_TEAMS.get(region, []):
+        if normalize_name(t) == normalize_name(team_name): return True
+    return False
+
+def load_data(path):
+    # Millions of small acyclic objects: cyclic GC passes during the bulk load only cost time
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        pool = NamePool()
+        teams = sorted(pool[t] for t in data.get("teams", []))
+        # Normalized builds (build_data_json.py) are trusted: no per-field type checks
+        matches = parse_matches(data.get("matches", []), pool, trusted=data.get("schema") == SCHEMA_VERSION)
+        # Builds that predate the patch calendar get their patches from the default one
+        assign_patches(matches, data.get("patches") or DEFAULT_CALENDAR)
+        return teams, matches
+    finally:
+        if gc_enabled: gc.enable()
+
+def clean_map_name(mn):
+    if not mn or not isinstance(mn, str): return "Unknown"
+    c = re.sub(r'[\t\n\r\x00-\x1f\x7f-\x9f]', '', mn)
+    return c[:15] if len(c) > 15 else (c or "Unknown")
+
+def calc_wr(w, l):
+    return (w / (w + l) * 100) if (w + l) > 0 else 0
+
+# --- Core Stats Engine ---
+def new_team_stats():
+    return {
+        "maps": {},
+        "series_played": 0, "series_wins": 0, "series_losses": 0,
+        "total_map_wins": 0, "total_map_losses": 0,
+        "pistol_wins": 0, "pistol_losses": 0,
+        "atk_rounds": 0, "def_rounds": 0,
+        "atk_rounds_lost": 0, "def_rounds_lost": 0,
+        "ban_1st": {}, "ban_2nd": {},
+        "pick_wins": 0, "pick_losses": 0,
+    }
+
+def get_team_stats(team, matches):
+    stats = new_team_stats()
+    matches_played = []
+    for m in matches:
+        if m.left == team or m.right == team:
+            matches_played.append(m)
+            add_match(stats, team, m)
+    return stats, matches_played
+
+def batch_team_stats(teams, pairs):
+    """Stats for many teams in one pass over (match, team) pairs in match order"""
+    out = {t: new_team_stats() for t in teams}
+    for m, team in pairs:
+        add_match(out[team], team, m)
+    return out
+
+def team_pairs(teams, matches):
+    """(match, team) for every listed team that played each match"""
+    wanted = set(teams)
+    for m in matches:
+        if m.left in wanted: yield m, m.left
+        if m.right in wanted and m.right != m.left: yield m, m.right
+
+def add_match(stats, team, m):
+    """Add one of the team's matches to its get_team_stats totals"""
+    is_left = m.left == team
+    stats["series_played"] += 1
+    winner = m.winner
+    if winner == team: stats["series_wins"] += 1
+    elif winner: stats["series_losses"] += 1
+
+    for p in m.played:
+        map_name = p.map
+        if not map_name: continue
+
+        if map_name not in stats["maps"]:
+            stats["maps"][map_name] = {
+                "played": 0, "wins": 0, "losses": 0,
+                "round_wins": 0, "round_losses": 0,
+                "picks": 0, "bans": 0, "pick_wins": 0, "pick_losses": 0,
+                "pistol_wins": 0, "pistol_losses": 0, "pistol_rounds": 0,
+                "atk_rounds_won": 0, "def_rounds_won": 0,
+                "atk_rounds_lost": 0, "def_rounds_lost": 0,
+                "agents": {}
+            }
+        ms = stats["maps"][map_name]
+        ms["played"] += 1
+
+        ls, rs = p.ls, p.rs
+        my_score = ls if is_left else rs
+        opp_score = rs if is_left else ls
+        ms["round_wins"] += my_score; ms["round_losses"] += opp_score
+
+        if my_score > opp_score:
+            ms["wins"] += 1; stats["total_map_wins"] += 1
+        else:
+            ms["losses"] += 1; stats["total_map_losses"] += 1
+
+        pistols = p.pistols
+        if pistols:
+            my_p, opp_p = pistols if is_left else pistols[::-1]
+            ms["pistol_wins"] += my_p; ms["pistol_losses"] += opp_p
+            ms["pistol_rounds"] += (my_p + opp_p)
+            stats["pistol_wins"] += my_p; stats["pistol_losses"] += opp_p
+
+        sides = p.sides
+        if sides:
+            if is_left:
+                my_atk, my_def, opp_atk, opp_def = sides
+            else:
+                opp_atk, opp_def, my_atk, my_def = sides
+            ms["atk_rounds_won"] += my_atk; ms["def_rounds_won"] += my_def
+            ms["atk_rounds_lost"] += opp_def; ms["def_rounds_lost"] += opp_atk
+            stats["atk_rounds"] += my_atk; stats["def_rounds"] += my_def
+            stats["atk_rounds_lost"] += opp_def; stats["def_rounds_lost"] += opp_atk
+
+        my_agents = p.left_agents if is_left else p.right_agents
+        for ag in my_agents:
+            if ag: ms["agents"][ag] = ms["agents"].get(ag, 0) + 1
+
+    # Veto: picks, bans, 1st/2nd ban tracking
+    team_ban_count = 0
+    for event in m.veto:
+        map_v = event.map; evt_type = event.type; evt_team = event.team
+        if map_v and evt_team == team and evt_type in ("pick", "ban"):
+            # Create map entry if it doesn't exist yet
+            if map_v not in stats["maps"]:
+                stats["maps"][map_v] = {
+                    "played": 0, "wins": 0, "losses": 0,
+                    "round_wins": 0, "round_losses": 0,
+                    "picks": 0, "bans": 0, "pick_wins": 0, "pick_losses": 0,
+                    "pistol_wins": 0, "pistol_losses": 0, "pistol_rounds": 0,
+                    "atk_rounds_won": 0, "def_rounds_won": 0,
+                    "atk_rounds_lost": 0, "def_rounds_lost": 0,
+                    "agents": {}
+                }
+            if evt_type == "pick": stats["maps"][map_v]["picks"] += 1
+            elif evt_type == "ban": stats["maps"][map_v]["bans"] += 1
+        if evt_type == "ban" and evt_team == team and map_v:
+            team_ban_count += 1
+            if team_ban_count == 1:
+                stats["ban_1st"][map_v] = stats["ban_1st"].get(map_v, 0) + 1
+            elif team_ban_count == 2:
+                stats["ban_2nd"][map_v] = stats["ban_2nd"].get(map_v, 0) + 1
+
+    # Track pick win/loss (skip BO5s - more than 3 maps played)
+    played_maps = m.played
+    if len(played_maps) <= 3:
+        team_picks = set()
+        for event in m.veto:
+            if event.type == "pick" and event.team == team:
+                team_picks.add(event.map)
+        for p in played_maps:
+            mn = p.map
+            if mn in team_picks and mn in stats["maps"]:
+                ls_v, rs_v = p.ls, p.rs
+                my_s = ls_v if is_left else rs_v
+                op_s = rs_v if is_left else ls_v
+                if my_s > op_s:
+                    stats["maps"][mn]["pick_wins"] += 1
+                    stats["pick_wins"] += 1
+                else:
+                    stats["maps"][mn]["pick_losses"] += 1
+                    stats["pick_losses"] += 1
+
+def leaderboard_counts(teams, matches, by_team=None):
+    """Raw per-team leaderboard totals; additive, so per-segment counts can be merged"""
+    # by_team overrides the per-team match lists (e.g. team-relative filters from filter_engine)
+    if by_team is None:
+        by_team = {t: [] for t in teams}
+        for m in matches:
+            for t in {m.left, m.right}:
+                if t in by_team: by_team[t].append(m)
+    counts = {}
+    for team in teams:
+        tm = by_team.get(team)
+        if not tm: continue
+        wins = sum(1 for m in tm if m.winner == team)
+        map_w = map_l = pw = pt = rw = rl = 0
+        for match in tm:
+            is_left = match.left == team
+            for mp in match.played:
+                ls_v, rs_v = mp.ls, mp.rs
+                my_s = ls_v if is_left else rs_v
+                op_s = rs_v if is_left else ls_v
+                if my_s > op_s: map_w += 1
+                else: map_l += 1
+                if mp.pistols: pw += mp.pistols[0 if is_left else 1]
+                pt += 2; rw += my_s; rl += op_s
+        counts[team] = {"matches": len(tm), "wins": wins, "map_w": map_w, "map_l": map_l,
+                        "rw": rw, "rl": rl, "pw": pw, "pt": pt}
+    return counts
+
+def leaderboard_rows(counts):
+    lb_data = []
+    for team, c in sorted(counts.items()):
+        wins, losses = c["wins"], c["matches"] - c["wins"]
+        map_w, map_l, rw, rl, pw, pt = c["map_w"], c["map_l"], c["rw"], c["rl"], c["pw"], c["pt"]
+        lb_data.append({
+            "Team": team, "Matches": c["matches"], "W-L": f"{wins}-{losses}",
+            "Win %": calc_wr(wins, losses),
+            "Map W-L": f"{map_w}-{map_l}", "Map %": calc_wr(map_w, map_l),
+            "Round W-L": f"{rw}-{rl}", "Round %": calc_wr(rw, rl),
+            "Pistol W-L": f"{pw}-{pt - pw}", "Pistol %": calc_wr(pw, pt - pw),
+        })
+    lb_data.sort(key=lambda x: x["Win %"], reverse=True)
+    for i, row in enumerate(lb_data, 1): row["#"] = i
+    return lb_data
+
+def get_leaderboard(teams, matches, by_team=None):
+    return leaderboard_rows(leaderboard_counts(teams, matches, by_team))
+
+def merge_counts(parts):
+    """Sum additive aggregates (team stats, leaderboard counts): numbers add, dicts merge, lists concatenate"""
+    out = {}
+    for part in parts:
+        for k, v in part.items():
+            if k not in out:
+                out[k] = merge_counts([v]) if isinstance(v, dict) else (list(v) if isinstance(v, list) else v)
+            elif isinstance(v, dict):
+                out[k] = merge_counts([out[k], v])
+            elif isinstance(v, list):
+                out[k].extend(v)
+            else:
+                out[k] += v
+    return out
+
+def filter_matches(matches, region, date_range=None):
+    out = []
+    for m in matches:
+        if not (is_team_in_region(m.left, region) or is_team_in_region(m.right, region)):
+            continue
+        if date_range:
+            md = m.date
+            if md and not (date_range[0] <= md <= date_range[1]): continue
+        out.append(m)
+    return out
+
+def h2h_matches(matches, team1, team2):
+    return [m for m in matches if {m.left, m.right} == {team1, team2}]
+
+def segment_stats(teams, matches):
+    """Mergeable leaderboard counts and team stats for one patch segment"""
+    by_team = {t: [] for t in teams}
+    for m in matches:
+        for t in {m.left, m.right}:
+            if t in by_team: by_team[t].append(m)
+    return {"leaderboard_counts": leaderboard_counts(teams, matches, by_team),
+            "team_stats": {t: get_team_stats(t, tm)[0] for t, tm in by_team.items() if tm}}
+
+def precompute(teams, matches):
+    """Unfiltered leaderboard, per-team stats, per-patch segments and veto model, as written next to data.json at build time"""
+    by_patch = {}
+    for m in matches:
+        if m.patch: by_patch.setdefault(m.patch, []).append(m)
+    everything = segment_stats(teams, matches)
+    return {
+        "engine_version": ENGINE_VERSION,
+        "filter": list(NO_FILTER),
+        "leaderboard": leaderboard_rows(everything["leaderboard_counts"]),
+        "team_stats": everything["team_stats"],
+        "segments": {p: segment_stats(teams, pm) for p, pm in by_patch.items()},
+        "veto_model": VetoModel(matches).to_dict(),
+    }
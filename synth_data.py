@@ -0,0 +1,143 @@
+# synth_data.py
+# Generates realistic synthetic data.json files for benchmarking.
+# Team, map and agent vocabularies come from an existing data.json; veto
+# shapes, series formats, scores, sides and pistols mirror the scraped data.
+# Usage: python synth_data.py --matches 1000 10000 100000 --output ./bench_data
+
+import argparse
+import json
+import os
+import random
+from datetime import date, timedelta
+from typing import Dict, List
+
+from normalize import normalize_data
+from stats_engine import REGION_TEAMS, normalize_name
+
+BO3_VETO = ("ban", "ban", "pick", "pick", "ban", "ban", "decider")
+BO5_VETO = ("ban", "ban", "pick", "pick", "pick", "pick", "decider")
+BO5_RATE = 0.1
+END_DATE = date(2026, 2, 15)
+
+
+def load_vocab(path: str) -> Dict[str, List[str]]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    maps, agents = set(), set()
+    for m in data.get("matches", []):
+        for p in m.get("played", []):
+            if p.get("map"): maps.add(p["map"])
+            agents.update(a for a in p.get("left_agents", []) + p.get("right_agents", []) if a)
+        for e in (m.get("veto") or {}).get("events", []):
+            if e.get("map"): maps.add(e["map"])
+    return {"teams": sorted(data.get("teams", [])), "maps": sorted(maps), "agents": sorted(agents)}
+
+
+def team_regions(teams: List[str]) -> Dict[str, List[str]]:
+    """Group data.json team names by dashboard region (unknown teams share a bucket)"""
+    by_norm = {normalize_name(t): r for r, names in REGION_TEAMS.items() if r != "Masters Santiago" for t in names}
+    groups: Dict[str, List[str]] = {}
+    for t in teams:
+        groups.setdefault(by_norm.get(normalize_name(t), "Other"), []).append(t)
+    return groups
+
+
+def map_score(rng: random.Random):
+    """(winner rounds, loser rounds) including occasional overtime"""
+    if rng.random() < 0.08:
+        loser = rng.randint(12, 16)
+        return loser + 2, loser
+    return 13, min(11, int(rng.triangular(0, 11, 9)))
+
+
+def split_sides(rng: random.Random, rounds: int):
+    atk = rng.randint(max(0, rounds - 12), min(12, rounds))
+    return atk, rounds - atk
+
+
+def generate(n_matches: int, vocab: Dict[str, List[str]], seed: int = 7, days: int = 730) -> dict:
+    rng = random.Random(seed)
+    teams, maps, agents = vocab["teams"], vocab["maps"], vocab["agents"]
+    regions = [g for g in team_regions(teams).values() if len(g) >= 2]
+    strength = {t: rng.gauss(0, 1) for t in teams}
+    comps = {(t, mp): rng.sample(agents, 5) for t in teams for mp in maps}
+    start = END_DATE - timedelta(days=days)
+
+    def lineup(team, mp):
+        comp = list(comps[(team, mp)])
+        if rng.random() < 0.3:
+            comp[rng.randrange(5)] = rng.choice([a for a in agents if a not in comp])
+        return comp
+
+    matches = []
+    for i in range(n_matches):
+        pool = rng.choice(regions) if rng.random() < 0.85 else teams
+        left, right = rng.sample(pool, 2)
+        bo5 = rng.random() < BO5_RATE
+        shape = BO5_VETO if bo5 else BO3_VETO
+        remaining = rng.sample(maps, len(maps))
+        events, picks = [], []
+        for order, kind in enumerate(shape, 1):
+            actor = left if order % 2 else right
+            mp = remaining.pop()
+            if kind == "decider":
+                events.append({"order": order, "type": "decider", "team": None, "map": mp})
+                picks.append(mp)
+            else:
+                events.append({"order": order, "type": kind, "team": actor, "map": mp})
+                if kind == "pick": picks.append(mp)
+        need = 3 if bo5 else 2
+        p_left = 1 / (1 + 10 ** ((strength[right] - strength[left]) / 2.5))
+        d = (start + timedelta(days=rng.randrange(days + 1))).isoformat()
+        played, lw, rw = [], 0, 0
+        for mp in picks:
+            if lw == need or rw == need: break
+            left_won = rng.random() < p_left
+            win_r, lose_r = map_score(rng)
+            ls, rs = (win_r, lose_r) if left_won else (lose_r, win_r)
+            l_atk, l_def = split_sides(rng, ls)
+            r_atk, r_def = split_sides(rng, rs)
+            pl = rng.choice((0, 1, 1, 2))
+            if left_won: lw += 1
+            else: rw += 1
+            played.append({
+                "map": mp, "ls": ls, "rs": rs, "picked_by": None,
+                "left_agents": lineup(left, mp), "right_agents": lineup(right, mp),
+                "pistols": {"left": pl, "right": 2 - pl},
+                "sides": {"left_atk": l_atk, "left_def": l_def, "right_atk": r_atk, "right_def": r_def},
+            })
+        matches.append({
+            "id": 600000 + i, "date": d, "left": left, "right": right,
+            "winner": left if lw > rw else right, "played": played,
+            "veto": {"events": events, "decider": events[-1]["map"]},
+        })
+    return {"teams": sorted(teams), "matches": matches}
+
+
+def write_dataset(n_matches: int, vocab: Dict[str, List[str]], path: str, seed: int = 7) -> dict:
+    """Generate n_matches and write them to path, normalized like a real build"""
+    # Normalized output carries "schema": 1, so benchmarks load through the trusted fast path
+    data, _ = normalize_data(generate(n_matches, vocab, seed=seed))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    return data
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate synthetic data.json files for benchmarks")
+    ap.add_argument("--matches", nargs="+", type=int, default=[1000, 10000, 100000])
+    ap.add_argument("--vocab", default="./web/data.json", help="data.json to take team/map/agent names from")
+    ap.add_argument("--output", default="./bench_data")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    vocab = load_vocab(args.vocab)
+    os.makedirs(args.output, exist_ok=True)
+    for n in args.matches:
+        out_path = os.path.join(args.output, f"synth_{n}.json")
+        data = write_dataset(n, vocab, out_path, seed=args.seed)
+        print(f"✓ Wrote {out_path} with {len(data['teams'])} teams and {n} matches")
+
+
+if __name__ == "__main__":
+    main()
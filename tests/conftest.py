@@ -0,0 +1,61 @@
+# tests/conftest.py
+# Shared fixtures: the shipped sample data.json, and a small synthetic
+# archive (synth_data.py with the sample's vocabulary, including undated
+# series and Bo1s without a scraped veto), normalized like a real build,
+# plus its parsed match records.
+# Run the suite from the repository root: python -m pytest -q
+
+import copy
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from match_model import parse_matches  # noqa: E402
+from normalize import normalize_data  # noqa: E402
+from patches import DEFAULT_CALENDAR, assign_patches  # noqa: E402
+from synth_data import generate, load_vocab  # noqa: E402
+
+N_MATCHES = 600
+
+
+@pytest.fixture
+def data_path():
+    """The shipped sample data.json"""
+    return os.path.join(ROOT, "web", "data.json")
+
+
+@pytest.fixture(scope="session")
+def vocab():
+    return load_vocab(os.path.join(ROOT, "web", "data.json"))
+
+
+@pytest.fixture(scope="session")
+def _archive(vocab):
+    data = generate(N_MATCHES, vocab, seed=11)
+    for m in data["matches"][:6]:
+        m["date"] = None                       # undated series pass date filters and skip form/Elo
+    for i, m in enumerate(data["matches"][6:40]):
+        # Bo1s without a scraped veto; some record the picker on the map itself
+        p = m["played"][0]
+        p["picked_by"] = m["left"] if i % 2 else None
+        m.update(played=[p], veto=None, winner=m["left"] if p["ls"] > p["rs"] else m["right"])
+    clean, _ = normalize_data(data)
+    return clean
+
+
+@pytest.fixture
+def archive(_archive):
+    """Normalized data.json dict (a fresh copy per test)"""
+    return copy.deepcopy(_archive)
+
+
+@pytest.fixture
+def matches(_archive):
+    """Parsed match records of the archive, with patches assigned"""
+    ms = parse_matches(_archive["matches"], trusted=True)
+    assign_patches(ms, DEFAULT_CALENDAR)
+    return ms
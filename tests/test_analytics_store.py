@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+
+from analytics_store import AnalyticsStore, added_matches, approx_size
+from match_model import parse_matches
+from ratings import EloRatings
+
+
+def write(path, archive, matches):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(archive, matches=matches), f)
+    return str(path)
+
+
+def elo(store):
+    return store.incremental(("elo",), lambda: EloRatings(store.matches),
+                             lambda old, added: old.extended(added, store.matches), persist=False)
+
+
+def test_team_index_covers_every_side(data_path):
+    store = AnalyticsStore(data_path)
+    assert sum(len(store.matches_for(t)) for t in store.by_team) == 2 * len(store.matches)
+    for t in store.teams[:10]:
+        assert all(any(m is x for x in store.matches) for m in store.matches_for(t))
+    assert store.matches_for("Nobody") == []
+
+
+def test_concurrent_requests_compute_once(data_path):
+    store = AnalyticsStore(data_path)
+    calls, results = [], []
+    start = threading.Event()
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"value": 42}
+
+    def worker():
+        start.wait()
+        results.append(store.aggregate(("slow",), compute))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    start.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert store.stats()["misses"] == 1 and store.stats()["hits"] == 7
+
+
+def test_least_recently_used_entries_are_evicted(data_path):
+    store = AnalyticsStore(data_path, budget_mb=1)
+    blob = lambda tag: [tag * 1000 for _ in range(100)]        # ~100 KB each
+    for i in range(6):
+        store.aggregate(("blob", i), lambda i=i: blob(str(i)))
+    store.aggregate(("blob", 0), lambda: None)                  # touch: 0 becomes most recent
+    for i in range(6, 12):
+        store.aggregate(("blob", i), lambda i=i: blob(str(i)))
+    stats = store.stats()
+    assert stats["evictions"] > 0 and stats["used_mb"] <= 1
+    assert store.aggregate(("blob", 0), lambda: "recomputed") != "recomputed"
+    assert store.aggregate(("blob", 1), lambda: "recomputed") == "recomputed"
+
+
+def test_values_over_budget_are_not_kept(data_path):
+    store = AnalyticsStore(data_path, budget_mb=1)
+    big = ["%d" % i * 300 for i in range(5000)]               # ~2 MB
+    assert store.aggregate(("big",), lambda: big) is big
+    assert store.stats()["entries"] == 0
+
+
+def test_sizes_count_slotted_records_but_not_loaded_ones(archive, tmp_path):
+    store = AnalyticsStore(write(tmp_path / "data.json", archive, archive["matches"]))
+    copies = parse_matches(archive["matches"][:50], trusted=True)
+    assert approx_size(copies) > 50 * approx_size(copies[0].played[0].left_agents)
+    assert approx_size(store.matches[:50], store._shared) < approx_size(copies) / 10
+    store._put(("k",), list(range(100)))
+    store._put(("k",), list(range(100)))
+    assert store.used_bytes == approx_size(list(range(100)))
+
+
+def test_added_matches(archive):
+    raw = archive["matches"]
+    old = parse_matches(raw[:500], trusted=True)
+    assert [m.id for m in added_matches(old, parse_matches(raw, trusted=True))] == [m["id"] for m in raw[500:]]
+    assert added_matches(old, parse_matches(raw[1:], trusted=True)) is None          # removed
+    edited = json.loads(json.dumps(raw))
+    edited[3]["played"][0]["ls"] += 1
+    assert added_matches(old, parse_matches(edited, trusted=True)) is None            # edited
+
+
+def test_reload_extends_carried_ratings(archive, tmp_path):
+    path = tmp_path / "data.json"
+    first = AnalyticsStore(write(path, archive, archive["matches"][:450]))
+    before = elo(first)
+    second = AnalyticsStore(write(path, archive, archive["matches"]), previous=first)
+    assert len(second.added) == len(archive["matches"]) - 450
+    grown = elo(second)
+    batch = EloRatings(second.matches)
+    assert grown.ratings == batch.ratings and grown.history == batch.history
+    assert elo(first) is before and len(before.applied) < len(grown.applied)
+
+    archive["matches"][0]["winner"] = None
+    third = AnalyticsStore(write(path, archive, archive["matches"]), previous=second)
+    assert third.added == [] and elo(third).ratings == EloRatings(third.matches).ratings
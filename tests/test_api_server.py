@@ -0,0 +1,109 @@
+import gzip
+import http.client
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import api_server
+from api_server import Api, Handler
+from filter_engine import series_format
+
+
+@pytest.fixture
+def server(archive, tmp_path, monkeypatch):
+    """A live API server over the synthetic archive; yields a request(path, headers) helper"""
+    monkeypatch.setattr(api_server, "RELOAD_CHECK_S", 0.0)
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(archive))
+    api = Api(str(path), str(tmp_path / "cache"))
+    handler = type("TestHandler", (Handler,), {"api": api})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=10)
+
+    def request(target, headers=None, method="GET"):
+        conn.request(method, target, headers=headers or {})
+        r = conn.getresponse()
+        return r, r.read()
+
+    request.path, request.api = path, api
+    yield request
+    conn.close()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_routes_answer_json(server, archive, matches):
+    r, body = server("/api/teams")
+    assert r.status == 200 and r.getheader("Content-Type").startswith("application/json")
+    assert json.loads(body) == sorted(archive["teams"])
+    team = archive["matches"][0]["left"]
+    stats = json.loads(server("/api/team/" + team.replace(" ", "%20"))[1])
+    assert stats["series_played"] == sum(team in (m["left"], m["right"]) for m in archive["matches"])
+    page = json.loads(server("/api/matches?format=Bo3&limit=5&offset=2")[1])
+    assert len(page["matches"]) == 5 and page["offset"] == 2
+    assert page["total"] == sum(series_format(m) == "Bo3" for m in matches)
+    r, body = server("/api/leaderboard", {"Accept-Encoding": "gzip"})
+    assert r.getheader("Content-Encoding") == "gzip"
+    assert len(json.loads(gzip.decompress(body))) == len(archive["teams"])
+    r, body = server("/api/leaderboard", method="HEAD")
+    assert r.status == 200 and body == b"" and int(r.getheader("Content-Length")) > 0
+
+
+def test_revalidation(server):
+    r, _ = server("/api/leaderboard")
+    etag, last_modified = r.getheader("ETag"), r.getheader("Last-Modified")
+    assert etag and last_modified
+    assert server("/api/leaderboard", {"If-None-Match": etag})[0].status == 304
+    assert server("/api/leaderboard", {"If-None-Match": 'W/"other", ' + etag})[0].status == 304
+    assert server("/api/leaderboard", {"If-Modified-Since": last_modified})[0].status == 304
+    assert server("/api/leaderboard?region=EMEA", {"If-None-Match": etag})[0].status == 200
+    assert server("/api/leaderboard", {"If-None-Match": '"other"'})[0].status == 200
+    # new data changes every ETag
+    with open(server.path, "a") as f:
+        f.write("\n")
+    r, _ = server("/api/leaderboard", {"If-None-Match": etag})
+    assert r.status == 200 and r.getheader("ETag") != etag
+
+
+@pytest.mark.parametrize("target, status", [
+    ("/api/leaderboard?format=Bo7", 400),
+    ("/api/leaderboard?region=Atlantis", 400),
+    ("/api/matches?from=2025-13-01", 400),
+    ("/api/matches?limit=ten", 400),
+    ("/api/matches?offset=-1", 400),
+    ("/api/nothing", 404),
+    ("/api/team/Nobody", 404),
+    ("/api/team/Nobody/maps", 404),
+    ("/index.html", 404),
+])
+def test_bad_requests(server, target, status):
+    r, body = server(target)
+    assert r.status == status
+    assert "error" in json.loads(body) and r.getheader("ETag") is None
+
+
+def test_handler_errors_are_a_json_500(server, monkeypatch):
+    broken, real = [True], server.api.leaderboard
+
+    def flaky(*args):
+        if broken:
+            raise RuntimeError("engine failure")
+        return real(*args)
+    monkeypatch.setattr(server.api, "leaderboard", flaky)
+    r, body = server("/api/leaderboard")
+    assert r.status == 500 and json.loads(body) == {"error": "internal error"}
+    # the connection stays usable and the failure is not cached
+    assert server("/api/teams")[0].status == 200
+    broken.clear()
+    assert server("/api/leaderboard")[0].status == 200
+
+
+def test_first_refresh_loads_on_a_young_clock(archive, tmp_path, monkeypatch):
+    monkeypatch.setattr(api_server.time, "monotonic", lambda: 1.0)
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(archive))
+    store, _ = Api(str(path)).refresh()
+    assert len(store.matches) == len(archive["matches"])
@@ -0,0 +1,23 @@
+from filter_engine import FilterEngine, canonical
+from stats_engine import batch_team_stats, get_team_stats, team_pairs
+
+
+def teams_of(matches):
+    return sorted({t for m in matches for t in (m.left, m.right) if t})
+
+
+def test_batch_equals_per_team_stats(matches):
+    teams = teams_of(matches)[:12]
+    batch = batch_team_stats(teams, team_pairs(teams, matches))
+    assert batch == {t: get_team_stats(t, matches)[0] for t in teams}
+
+
+def test_batch_over_filter_engine_pairs(matches):
+    engine = FilterEngine(matches)
+    rows = engine.select(canonical([("format", "Bo3"), ("map", sorted(engine.map_ids)[0])]))
+    teams = teams_of(matches)
+    match_idx, pos = engine.team_pairs(rows, teams)
+    batch = batch_team_stats(teams, ((matches[k], teams[i]) for k, i in zip(match_idx.tolist(), pos.tolist())))
+    for t in teams:
+        own = [matches[k] for k in engine.team_index(rows, t).tolist()]
+        assert batch[t] == get_team_stats(t, own)[0], t
@@ -0,0 +1,71 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from comp_index import AGENT_ROLES, COMP_SIZE, CompIndex
+
+
+def lineup_rows(matches):
+    """(agents, map, team, date, won) for every complete lineup, straight from the matches"""
+    rows = []
+    for m in matches:
+        for p in m.played:
+            for team, lineup, won in ((m.left, p.left_agents, p.ls > p.rs), (m.right, p.right_agents, p.rs > p.ls)):
+                if team and len(set(lineup)) == COMP_SIZE and all(lineup):
+                    rows.append((frozenset(lineup), p.map, team, m.date, won))
+    return rows
+
+
+@pytest.fixture
+def index(matches):
+    return CompIndex(matches)
+
+
+def test_comp_stats_match_naive_counts(matches, index):
+    rows = lineup_rows(matches)
+    map_name = Counter(r[1] for r in rows).most_common(1)[0][0]
+    on_map = [r for r in rows if r[1] == map_name]
+    games = Counter(r[0] for r in on_map)
+    wins = Counter(r[0] for r in on_map if r[4])
+    got = index.comp_stats(min_games=2, top=None, map_name=map_name)
+    assert {frozenset(r["Comp"].split(", ")): (r["Games"], r["Wins"]) for r in got} == \
+        {c: (g, wins[c]) for c, g in games.items() if g >= 2}
+    keys = [(r["Win %"], r["Games"]) for r in got]
+    assert keys == sorted(keys, reverse=True)
+    assert len(index.comp_stats(min_games=1, top=3)) == 3
+
+
+def test_date_and_team_filters(matches, index):
+    rows = lineup_rows(matches)
+    dates = sorted(r[3] for r in rows if r[3])
+    since, until = dates[len(dates) // 4], dates[len(dates) // 2]
+    teams = sorted({r[2] for r in rows})[:3]
+    want = sum(1 for r in rows if r[2] in teams and r[3] and since <= r[3] <= until)
+    assert int(index.select(teams=teams, since=since, until=until).sum()) == want
+    assert int(index.select(map_name="Atlantis").sum()) == 0
+
+
+def test_pick_rates_match_naive_share(matches, index):
+    rows = lineup_rows(matches)
+    maps, agents, rates = index.pick_rates()
+    for i, mp in enumerate(maps):
+        on_map = [r[0] for r in rows if r[1] == mp]
+        for j, a in enumerate(agents):
+            assert rates[i, j] == pytest.approx(100 * sum(a in c for c in on_map) / len(on_map))
+
+
+def test_role_queries(matches, index):
+    rows = lineup_rows(matches)
+    double = [r for r in rows if sum(AGENT_ROLES.get(a) == "Controller" for a in r[0]) >= 2]
+    got = index.teams_with_roles({"Controller": 2})
+    assert {r["Team"]: r["Games"] for r in got} == dict(Counter(r[2] for r in double))
+    totals = Counter(r[2] for r in rows)
+    for r in got:
+        assert r["Share %"] == pytest.approx(100 * r["Games"] / totals[r["Team"]])
+    for cid in range(len(index.masks)):
+        names = index.comp_agent_names(cid)
+        assert len(names) == COMP_SIZE
+        assert list(index.comp_roles[cid]) == [sum(AGENT_ROLES.get(a) == role for a in names)
+                                               for role in ("Controller", "Duelist", "Initiator", "Sentinel")]
+    assert np.all(index.comp_agents.sum(axis=1) == COMP_SIZE)
@@ -0,0 +1,27 @@
+from consistency import RESCRAPE, check_archive
+
+
+def flags(report):
+    return {(r["id"], r["check"]) for r in report["rows"]}
+
+
+def test_generated_archive_is_consistent(matches):
+    report = check_archive(matches)
+    assert report["rescrape"] == []
+    assert not {c for _, c in flags(report)} & set(RESCRAPE)
+
+
+def test_injected_faults_are_flagged(matches):
+    ms = [m for m in matches if m.veto and len(m.played) >= 2][:6]
+    a, b, c, d, e, f = ms
+    p = a.played[0]; p.sides = (p.sides[0] + 1,) + p.sides[1:]
+    b.played[0].pistols = (3, 0)
+    c.played[0].left_agents = c.played[0].left_agents[:4]
+    p = d.played[0]; p.ls, p.rs = 13, 12
+    p.sides = (6, 7, 6, 6)
+    e.winner = e.right if e.winner == e.left else e.left
+    f.played = f.played[:1]
+    report = check_archive(matches)
+    assert {(a.id, "sides_sum"), (b.id, "pistols_over_2"), (c.id, "agents_missing"), (d.id, "impossible_score"),
+            (e.id, "winner_mismatch"), (f.id, "maps_missing")} == flags(report)
+    assert report["rescrape"] == sorted([a.id, b.id, c.id, d.id, f.id])
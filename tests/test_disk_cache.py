@@ -0,0 +1,73 @@
+import os
+import shutil
+
+from analytics_store import AnalyticsStore
+from disk_cache import MISSING, DiskCache, file_hash
+
+
+def entry_files(directory):
+    return sorted(os.path.join(r, f) for r, _, fs in os.walk(directory) for f in fs if f.endswith(".pkl"))
+
+
+def test_round_trip_and_namespaces(tmp_path):
+    a = DiskCache(str(tmp_path), "v1-aaaa")
+    a.put(("team_stats", "FNATIC"), {"wins": 3})
+    assert a.get(("team_stats", "FNATIC")) == {"wins": 3}
+    assert a.get(("team_stats", "NRG")) is MISSING
+    # Another data hash or engine version never sees these entries
+    assert DiskCache(str(tmp_path), "v1-bbbb").get(("team_stats", "FNATIC")) is MISSING
+    assert DiskCache(str(tmp_path), "v2-aaaa").get(("team_stats", "FNATIC")) is MISSING
+    assert DiskCache(str(tmp_path), "v1-aaaa").get(("team_stats", "FNATIC")) == {"wins": 3}
+
+
+def test_unreadable_entries_are_dropped(tmp_path):
+    cache = DiskCache(str(tmp_path), "ns")
+    cache.put("k", list(range(100)))
+    (path,) = entry_files(tmp_path)
+    with open(path, "wb") as f:
+        f.write(b"\x80\x05truncated")
+    assert cache.get("k") is MISSING
+    assert entry_files(tmp_path) == []
+
+
+def test_overwrites_replace_the_old_size(tmp_path):
+    cache = DiskCache(str(tmp_path), "ns", max_mb=1)
+    blob = os.urandom(300 * 1024)
+    for _ in range(5):
+        cache.put("k", blob)                                # the same key rewritten stays one entry
+    assert cache.used_bytes == sum(os.path.getsize(p) for p in entry_files(tmp_path))
+    cache.put("k", b"small")
+    assert cache.used_bytes == os.path.getsize(cache._path("k"))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiskCache(str(tmp_path), "ns", max_mb=1)
+    blob = os.urandom(300 * 1024)
+    for i in range(3):
+        cache.put(i, blob + bytes([i]))
+        os.utime(cache._path(i), (1000 + i, 1000 + i))    # written in order 0, 1, 2
+    assert cache.get(0) is not MISSING                      # reading 0 makes it the most recent
+    cache.put(3, blob + b"3")                               # over 1 MB: the oldest go first
+    assert cache.used_bytes <= cache.max_bytes
+    assert [i for i in range(4) if cache.get(i) is not MISSING] == [0, 2, 3]
+
+
+def test_store_reuses_disk_cache_until_the_data_changes(data_path, tmp_path):
+    data = tmp_path / "data.json"
+    shutil.copy(data_path, data)
+    cache_dir = str(tmp_path / "cache")
+    calls = []
+    compute = lambda: calls.append(1) or {"n": len(calls)}
+
+    first = AnalyticsStore(str(data), cache_dir=cache_dir)
+    assert first.aggregate(("leaderboard", ()), compute) == {"n": 1}
+    second = AnalyticsStore(str(data), cache_dir=cache_dir)
+    assert second.aggregate(("leaderboard", ()), compute) == {"n": 1}
+    assert second.aggregate(("filtered", ()), compute, persist=False) == {"n": 2}
+    assert AnalyticsStore(str(data), cache_dir=cache_dir).aggregate(("filtered", ()), compute, persist=False) == {"n": 3}
+
+    with open(data, "a", encoding="utf-8") as f:
+        f.write("\n")
+    changed = AnalyticsStore(str(data), cache_dir=cache_dir)
+    assert changed.version == file_hash(str(data))[:16] != first.version
+    assert changed.aggregate(("leaderboard", ()), compute) == {"n": 4}
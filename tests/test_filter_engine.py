@@ -0,0 +1,104 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from filter_engine import FilterEngine, canonical, series_format
+from stats_engine import REGION_TEAMS, is_team_in_region
+
+
+def naive(m, team, query):
+    """Whether team's side of match m passes query, straight from the predicate definitions"""
+    opp = m.right if m.left == team else m.left
+    is_left = m.left == team
+    map_preds = []
+    for kind, *args in query:
+        if kind == "region" and not (is_team_in_region(m.left, args[0]) or is_team_in_region(m.right, args[0])):
+            return False
+        if kind == "opponent_region" and not is_team_in_region(opp, args[0]):
+            return False
+        if kind == "opponent" and opp != args[0]:
+            return False
+        if kind == "date" and m.date and not ((args[0] or "") <= m.date <= (args[1] or "9999")):
+            return False
+        if kind == "patch" and m.patch not in args:
+            return False
+        if kind == "format" and series_format(m) != args[0]:
+            return False
+        if kind in ("map", "picked_by", "agent"):
+            map_preds.append((kind, args[0]))
+    if not map_preds:
+        return True
+    picks = {e.map: e.team for e in m.veto if e.type == "pick"}
+    for p in m.played:
+        by = picks.get(p.map) or p.picked_by
+        picker = "team" if by == team else ("opponent" if by == opp else "decider")
+        lineup = p.left_agents if is_left else p.right_agents
+        if all((kind == "map" and p.map == v) or (kind == "picked_by" and picker == v) or
+               (kind == "agent" and v in lineup) for kind, v in map_preds):
+            return True
+    return False
+
+
+@pytest.fixture
+def engine(matches):
+    return FilterEngine(matches)
+
+
+def queries(matches, engine):
+    dates = sorted(m.date for m in matches if m.date)
+    team = next(t for t in engine.teams if t)
+    agent = sorted(engine.agent_ids)[0]
+    map_name = sorted(engine.map_ids)[0]
+    region = next(r for r in REGION_TEAMS if any(is_team_in_region(t, r) for t in engine.teams if t))
+    patch = next(m.patch for m in matches if m.patch)
+    singles = [("region", region), ("opponent_region", region), ("opponent", team),
+               ("date", dates[len(dates) // 3], dates[2 * len(dates) // 3]), ("date", None, dates[10]),
+               ("patch", patch), ("format", "Bo5"), ("format", "Bo1"), ("map", map_name),
+               ("picked_by", "team"), ("picked_by", "opponent"), ("picked_by", "decider"), ("agent", agent)]
+    out = [canonical([q]) for q in singles]
+    out += [canonical(pair) for pair in itertools.combinations(singles, 2)]
+    out.append(canonical([("map", map_name), ("picked_by", "opponent"), ("agent", agent), ("opponent_region", region)]))
+    return out
+
+
+def test_team_rows_match_naive_filter(matches, engine):
+    teams = [t for t in engine.teams if t]
+    for query in queries(matches, engine):
+        rows = engine.select(query)
+        for team in teams:
+            got = engine.team_index(rows, team).tolist()
+            want = [k for k, m in enumerate(matches) if team in (m.left, m.right) and naive(m, team, query)]
+            assert got == want, (query, team)
+
+
+def test_match_index_is_either_side(matches, engine):
+    for query in queries(matches, engine)[:15]:
+        got = engine.match_index(engine.select(query)).tolist()
+        want = [k for k, m in enumerate(matches) if naive(m, m.left, query) or naive(m, m.right, query)]
+        assert got == want, query
+
+
+def test_cached_masks_give_the_same_rows(matches, engine):
+    cache = {}
+    mask = lambda pred: cache.setdefault(pred, engine.mask(pred))
+    for query in queries(matches, engine):
+        assert np.array_equal(engine.select(query, mask), engine.select(query))
+
+
+def test_team_pairs_and_most_active(matches, engine):
+    rows = engine.select(canonical([("format", "Bo3")]))
+    teams = [t for t in engine.teams if t][:5]
+    match_idx, pos = engine.team_pairs(rows, teams)
+    want = sorted((k, i) for i, t in enumerate(teams) for k in engine.team_index(rows, t).tolist())
+    assert list(zip(match_idx.tolist(), pos.tolist())) == want
+    counts = {t: len(engine.team_index(rows, t)) for t in engine.teams if t}
+    top = engine.most_active(rows, 4)
+    assert [counts[t] for t in top] == sorted(counts.values(), reverse=True)[:4]
+
+
+def test_unknown_predicate_is_an_error(engine):
+    with pytest.raises(ValueError):
+        engine.mask(("colour", "red"))
+    with pytest.raises(ValueError):
+        engine.mask(("region", "Atlantis"))
@@ -0,0 +1,41 @@
+from collections import Counter
+
+import numpy as np
+
+from h2h_matrix import H2HMatrix
+from stats_engine import get_team_stats
+
+
+def test_records_agree_with_get_team_stats(matches):
+    h2h = H2HMatrix(matches)
+    pairs = Counter(frozenset((m.left, m.right)) for m in matches if m.left and m.right and m.left != m.right)
+    for pair, n in pairs.most_common(15):
+        t1, t2 = sorted(pair)
+        between = [m for m in matches if {m.left, m.right} == pair]
+        st, _ = get_team_stats(t1, between)
+        rec = h2h.record(t1, t2)
+        assert rec["played"] == n == st["series_played"]
+        assert rec["series"] == (st["series_wins"], st["series_losses"])
+        assert rec["maps"] == (st["total_map_wins"], st["total_map_losses"])
+        assert rec["rounds"] == (sum(d["round_wins"] for d in st["maps"].values()),
+                                 sum(d["round_losses"] for d in st["maps"].values()))
+        assert rec["pistols"] == (st["pistol_wins"], st["pistol_losses"])
+        assert h2h.matches(t2, t1) == between
+        # the other side of the table is the mirror image
+        back = h2h.record(t2, t1)
+        assert back["series"] == rec["series"][::-1] and back["rounds"] == rec["rounds"][::-1]
+
+
+def test_whole_league_views(matches):
+    h2h = H2HMatrix(matches)
+    assert np.array_equal(h2h.played, h2h.played.T)
+    assert h2h.played.sum() // 2 == sum(1 for m in matches if m.left and m.right and m.left != m.right)
+    teams = h2h.most_active(8)
+    pct, w, l = h2h.win_pct("series", teams)
+    met = w + l > 0
+    assert np.allclose(pct[met] + pct.T[met], 100)
+    assert np.isnan(pct[~met]).all()
+    team = teams[0]
+    table = h2h.table(team)
+    assert sum(r["Series"] for r in table) == h2h.played[h2h.ids[team]].sum()
+    assert h2h.record(team, "Nobody")["played"] == 0 and h2h.table("Nobody") == []
@@ -0,0 +1,40 @@
+from match_history import MatchHistory
+
+
+def team_with_most(matches):
+    counts = {}
+    for m in matches:
+        for t in (m.left, m.right):
+            counts[t] = counts.get(t, 0) + 1
+    return max(counts, key=counts.get)
+
+
+def test_select_and_order_match_naive(matches):
+    team = team_with_most(matches)
+    mine = [m for m in matches if team in (m.left, m.right)]
+    hist = MatchHistory(team, mine)
+    newest = hist.matches
+    assert [m.date or "" for m in newest] == sorted((m.date or "" for m in mine), reverse=True)
+    opp = newest[0].opponent(team)
+    map_name = newest[0].played[0].map
+    rows = hist.select(opponent=opp, result="W", map_name=map_name).tolist()
+    assert rows == [i for i, m in enumerate(newest) if m.opponent(team) == opp and m.winner == team
+                    and any(p.map == map_name for p in m.played)]
+
+    def round_diff(m):
+        return sum((p.ls - p.rs) if m.left == team else (p.rs - p.ls) for p in m.played)
+    ordered = hist.order(hist.select(), "Round diff", descending=True).tolist()
+    assert [round_diff(newest[i]) for i in ordered] == sorted((round_diff(m) for m in newest), reverse=True)
+    page = hist.page(hist.select(), 1, 10)
+    assert [r["Date"] for r in page] == [m.date for m in newest[10:20]]
+
+
+def test_map_games_are_the_newest_games_on_the_map(matches):
+    team = team_with_most(matches)
+    hist = MatchHistory(team, [m for m in matches if team in (m.left, m.right)])
+    for map_name in hist.maps():
+        games = [(m, p) for m in hist.matches for p in m.played if p.map == map_name]
+        assert hist.map_game_count(map_name) == len({id(m) for m, _ in games})
+        got = hist.map_games(map_name, 0, 5)
+        assert [(g["date"], g["opponent"]) for g in got] == [(p.date or m.date, m.opponent(team)) for m, p in games[:5]]
+    assert hist.map_games("Atlantis") == []
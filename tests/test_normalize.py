@@ -0,0 +1,97 @@
+from match_model import parse_matches
+from normalize import normalize_data, normalize_matches, to_int
+
+
+def raw_match(**kw):
+    m = {"id": 1, "date": "2025-03-01", "left": "Alpha", "right": "Beta", "winner": "Alpha",
+         "played": [{"map": "Ascent", "ls": 13, "rs": 7, "picked_by": "Alpha",
+                     "left_agents": ["Jett", "Sova", "Omen", "Killjoy", "Skye"],
+                     "right_agents": ["Raze", "Fade", "Viper", "Cypher", "Breach"],
+                     "pistols": {"left": 1, "right": 1},
+                     "sides": {"left_atk": 7, "left_def": 6, "right_atk": 3, "right_def": 4}}],
+         "veto": {"events": [{"order": 1, "type": "pick", "team": "Alpha", "map": "Ascent"}], "decider": None}}
+    m.update(kw)
+    return m
+
+
+def problems(rejects):
+    return [(r["where"], r["problem"], r["action"]) for r in rejects]
+
+
+def test_clean_match_passes_without_rejects():
+    out, rejects = normalize_matches([raw_match()])
+    assert rejects == []
+    assert out[0]["played"][0]["pistols"] == {"left": 1, "right": 1}
+
+
+def test_to_int():
+    assert [to_int(v) for v in (3, 3.0, "13", " 7 ", "-2")] == [3, 3, 13, 7, -2]
+    assert [to_int(v) for v in (3.5, "x", None, [1], True)] == [None, None, None, None, None]
+    # strings that pass a digit check but are not integers must not abort the build
+    assert [to_int(v) for v in ("--5", "-", "", "²", "1.5")] == [None, None, None, None, None]
+
+
+def test_types_and_names_are_repaired_silently():
+    m = raw_match(id="42")
+    m["played"][0].update(map=" ascent ", ls="13", rs=7.0)
+    m["played"][0]["left_agents"] = ["jett", "SOVA", "Omen", "Killjoy", "Skye"]
+    out, rejects = normalize_matches([m])
+    p = out[0]["played"][0]
+    assert (out[0]["id"], p["map"], p["ls"], p["rs"]) == (42, "Ascent", 13, 7)
+    assert p["left_agents"] == ["Jett", "Sova", "Omen", "Killjoy", "Skye"]
+    assert rejects == []
+
+
+def test_every_repair_is_reported():
+    m = raw_match(date="01/03/2025", winner="Gamma")
+    p = m["played"][0]
+    p.update(picked_by="Gamma", pistols={"left": 3, "right": "x"}, right_agents="Raze Fade")
+    p["left_agents"] = ["Jett", "Jett", "Sova", "Omen", "Killjoy", "Skye", "Neon", "pick"]
+    out, rejects = normalize_matches([m])
+    assert sorted(problems(rejects)) == sorted([
+        ("date", "not an ISO date", "cleared"),
+        ("winner", "not one of the teams", "cleared"),
+        ("played[0].picked_by", "not one of the teams", "cleared"),
+        ("played[0].pistols", "bad counts", "cleared"),
+        ("played[0].right_agents", "not a list", "cleared"),
+        ("played[0].left_agents", "not an agent", "dropped value"),
+        ("played[0].left_agents", "duplicate agent", "dropped value"),
+        ("played[0].left_agents", "more than 5 agents", "truncated"),
+    ])
+    p = out[0]["played"][0]
+    assert out[0]["date"] is None and out[0]["winner"] is None and p["picked_by"] is None
+    assert p["pistols"] == {} and p["right_agents"] == []
+    assert p["left_agents"] == ["Jett", "Sova", "Omen", "Killjoy", "Skye"]
+
+
+def test_drops_at_the_smallest_level():
+    m = raw_match()
+    m["played"].append({"map": "Atlantis", "ls": 13, "rs": 2})
+    m["played"].append({"map": "Bind", "ls": None, "rs": 13})
+    m["veto"]["events"].append({"order": 2, "type": "ban", "team": "Gamma", "map": "Bind"})
+    out, rejects = normalize_matches([m, raw_match(id="abc"), raw_match(id=2, right="Alpha"), raw_match()])
+    assert [x["id"] for x in out] == [1]
+    assert len(out[0]["played"]) == 1 and len(out[0]["veto"]["events"]) == 1
+    assert sorted(problems(rejects)) == sorted([
+        ("played[1]", "unknown map", "dropped map"),
+        ("played[2]", "bad score", "dropped map"),
+        ("veto.events[1]", "bad veto event", "dropped event"),
+        ("id", "bad id", "dropped match"),
+        ("teams", "missing or identical teams", "dropped match"),
+        ("id", "duplicate id", "dropped match"),
+    ])
+
+
+def test_missing_keys_get_defaults():
+    out, rejects = normalize_matches([{"id": 5, "left": "Alpha", "right": "Beta"}])
+    assert rejects == []
+    assert out[0]["veto"] == {"events": [], "decider": None}
+    assert out[0]["played"] == [] and out[0]["date"] is None
+
+
+def test_normalized_output_is_stable_and_parses_the_same_trusted(archive):
+    again, report = normalize_data(archive)
+    assert report["rejects"] == [] and again["matches"] == archive["matches"]
+    trusted = parse_matches(archive["matches"], trusted=True)
+    checked = parse_matches(archive["matches"])
+    assert [m.fields() for m in trusted] == [m.fields() for m in checked]
@@ -0,0 +1,39 @@
+import json
+
+from patches import DEFAULT_CALENDAR, PatchLookup, assign_patches, load_calendar, patch_spans
+from stats_engine import merge_counts, segment_stats
+
+
+def test_lookup_uses_the_latest_start(tmp_path):
+    lookup = PatchLookup([{"patch": "b", "start": "2025-03-01"}, {"patch": "a", "start": "2025-01-01"}])
+    assert lookup("2024-12-31") is None and lookup(None) is None
+    assert lookup("2025-01-01") == "a" and lookup("2025-02-28T23:00") == "a"
+    assert lookup("2025-03-01") == "b" and lookup("2030-01-01") == "b"
+    path = tmp_path / "patches.json"
+    path.write_text(json.dumps([{"patch": "y", "start": "2025-02-01"}, {"patch": "x", "start": "2025-01-01"}]))
+    assert [p["patch"] for p in load_calendar(str(path))] == ["x", "y"]
+    assert load_calendar(str(tmp_path / "missing.json")) == DEFAULT_CALENDAR
+
+
+def test_assign_keeps_existing_patches(matches):
+    m = next(m for m in matches if m.date)
+    m.patch = "custom"
+    assign_patches(matches, DEFAULT_CALENDAR)
+    assert m.patch == "custom"
+    assert all(m.patch is None for m in matches if not m.date)
+    spans = patch_spans(matches)
+    for p, (first, last) in spans.items():
+        dates = [m.date for m in matches if m.patch == p]
+        assert (first, last) == (min(dates), max(dates))
+
+
+def test_merged_segments_equal_a_direct_pass(matches):
+    teams = sorted({t for m in matches for t in (m.left, m.right) if t})
+    by_patch = {}
+    for m in matches:
+        if m.patch: by_patch.setdefault(m.patch, []).append(m)
+    chosen = sorted(by_patch)[:2]
+    merged = merge_counts(segment_stats(teams, by_patch[p]) for p in chosen)
+    direct = segment_stats(teams, [m for m in matches if m.patch in chosen])
+    assert merged["leaderboard_counts"] == direct["leaderboard_counts"]
+    assert merged["team_stats"] == direct["team_stats"]
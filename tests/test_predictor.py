@@ -0,0 +1,52 @@
+import pytest
+
+from predictor import current_map_pool, map_win_probs, simulate
+
+POOL = ["Ascent", "Bind", "Haven", "Lotus", "Split", "Sunset", "Icebox"]
+EVEN = {"maps": {}, "ban_1st": {}, "ban_2nd": {}}
+
+
+def test_map_pool_comes_from_recent_vetoes(matches):
+    pool = current_map_pool(matches)
+    assert len(pool) == 7 and pool == sorted(pool)
+    assert set(pool) <= {e.map for m in matches for e in m.veto}
+    assert current_map_pool([]) == []
+
+
+def test_even_teams_split_evenly():
+    res = simulate(POOL, EVEN, EVEN, 1500, 1500, n=50_000, seed=1)
+    assert res["team1_win"] == pytest.approx(50, abs=1.5)
+    assert sum(r["Probability"] for r in res["scores"]) == pytest.approx(100)
+    assert sum(r["Probability"] for r in res["scores"] if r["Score"][0] == "2") == pytest.approx(res["team1_win"])
+    # three maps in every Bo3 series, two or three of them played
+    assert sum(r["In Series %"] for r in res["maps"]) == pytest.approx(300)
+    assert 200 <= sum(r["Played %"] for r in res["maps"]) <= 300
+    assert all(r["Played %"] <= r["In Series %"] for r in res["maps"])
+
+
+def test_stronger_team_is_favoured_symmetrically():
+    a = simulate(POOL, EVEN, EVEN, 1700, 1500, fmt="Bo5", n=50_000, seed=2)
+    b = simulate(POOL, EVEN, EVEN, 1500, 1700, fmt="Bo5", n=50_000, seed=2)
+    assert a["team1_win"] > 75
+    assert a["team1_win"] + b["team1_win"] == pytest.approx(100, abs=1.5)
+    assert {r["Score"] for r in a["scores"]} <= {"3-0", "3-1", "3-2", "0-3", "1-3", "2-3"}
+
+
+def test_veto_tendencies_steer_the_maps():
+    # a map both teams ban first is almost never played, one they pick usually is
+    team = {"maps": {"Haven": {"picks": 50}}, "ban_1st": {"Ascent": 50}, "ban_2nd": {}}
+    res = simulate(POOL, team, team, 1500, 1500, n=20_000, seed=3)
+    rates = {r["Map"]: r["In Series %"] for r in res["maps"]}
+    assert rates["Ascent"] < 5 and rates["Haven"] > 75
+
+
+def test_map_records_shift_map_odds():
+    s1 = {"maps": {"Haven": {"wins": 20, "losses": 2}}}
+    p = map_win_probs(POOL, s1, EVEN, 1500, 1500)
+    assert p[POOL.index("Haven")] > 0.8
+    assert p[POOL.index("Bind")] == pytest.approx(0.5)
+
+
+def test_small_pool_is_rejected():
+    with pytest.raises(ValueError):
+        simulate(POOL[:5], EVEN, EVEN, 1500, 1500)
@@ -0,0 +1,65 @@
+import copy
+import random
+
+import pytest
+
+from match_model import MapResult, Match
+from ratings import BASE_RATING, EloRatings, expected_score
+
+
+def assert_same(a, b):
+    assert a.ratings == b.ratings
+    assert a.history == b.history
+    assert [k for k, _ in a.applied] == [k for k, _ in b.applied]
+
+
+@pytest.mark.parametrize("per_map", [False, True])
+@pytest.mark.parametrize("order", ["by date", "shuffled"])
+def test_incremental_equals_batch(matches, per_map, order):
+    ms = sorted(matches, key=lambda m: (m.date or "", m.id)) if order == "by date" else \
+        random.Random(3).sample(matches, len(matches))
+    batch = EloRatings(ms, per_map=per_map)
+    grown = EloRatings(ms[:100], per_map=per_map)
+    for i in range(100, len(ms), 70):
+        grown.add(ms[i:i + 70])
+    assert_same(grown, batch)
+
+
+def test_appending_newer_matches_replays_nothing(matches):
+    ms = sorted((m for m in matches if m.date), key=lambda m: (m.date, m.id))
+    elo = EloRatings(ms[:-10])
+    assert elo.add(ms[-10:]) == 10
+
+
+def test_extended_copy_leaves_the_original_untouched(matches):
+    ms = random.Random(4).sample(matches, len(matches))
+    base = EloRatings(ms[:400])
+    ratings, history = dict(base.ratings), {t: list(h) for t, h in base.history.items()}
+    grown = base.extended(ms[400:])
+    assert_same(grown, EloRatings(ms))
+    assert base.ratings == ratings and base.history == history
+
+
+def test_copy_swaps_in_current_records(matches):
+    elo = EloRatings(matches)
+    newer = [copy.copy(m) for m in matches]
+    swapped = elo.copy(newer)
+    by_id = {m.id: m for m in newer}
+    assert all(m is by_id[m.id] for _, m in swapped.applied)
+
+
+def test_zero_sum_and_undated_matches_skipped(matches):
+    elo = EloRatings(matches)
+    assert sum(elo.ratings.values()) == pytest.approx(BASE_RATING * len(elo.ratings))
+    assert len(elo.applied) == sum(1 for m in matches if m.date)
+    assert elo.rating("Nobody") == BASE_RATING and elo.change("Nobody") == 0.0
+    assert expected_score(1600, 1600) == 0.5
+
+
+def test_series_margin_is_counted_from_the_winner(matches):
+    maps = (MapResult("Ascent", 13, 11), MapResult("Bind", 13, 11), MapResult("Haven", 2, 13))
+    close = EloRatings([Match(1, "2025-01-01", "A", "B", "A", maps)])
+    # A won 2-1 but lost on total rounds (28-35): no margin boost, just the plain K update
+    assert close.rating("A") - BASE_RATING == pytest.approx(close.k / 2)
+    swept = EloRatings([Match(1, "2025-01-01", "A", "B", "A", maps[:2])])
+    assert swept.rating("A") > close.rating("A")
@@ -0,0 +1,87 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from recent_form import FORM_FIELDS, FormIndex, PrefixSums, series_row
+from stats_engine import calc_wr
+
+
+def brute_series(matches, team):
+    """The team's dated series as (key, FORM_FIELDS row), oldest first"""
+    rows = [((m.date, m.id), series_row(m, team)) for m in matches if m.date and team in (m.left, m.right)]
+    return sorted(rows, key=lambda r: r[0])
+
+
+def total(rows):
+    return {f: sum(v[i] for _, v in rows) for i, f in enumerate(FORM_FIELDS)}
+
+
+def teams_of(matches):
+    return sorted({t for m in matches for t in (m.left, m.right)})
+
+
+def assert_same(a, b):
+    assert a.latest == b.latest
+    assert a.series.keys() == b.series.keys() and a.maps.keys() == b.maps.keys()
+    for t in b.series:
+        assert (a.series[t].keys, a.series[t].sums) == (b.series[t].keys, b.series[t].sums), t
+    for k in b.maps:
+        assert (a.maps[k].keys, a.maps[k].sums) == (b.maps[k].keys, b.maps[k].sums), k
+
+
+def test_windows_match_brute_force_sums(matches):
+    index = FormIndex(matches)
+    latest = date.fromisoformat(max(m.date for m in matches if m.date))
+    for team in teams_of(matches):
+        rows = brute_series(matches, team)
+        for n in (1, 5, 10, len(rows) + 3):
+            assert index.window(team, last_n=n) == total(rows[-n:]), (team, n)
+        assert index.window(team) == total(rows)
+        for days in (0, 7, 30, 90, 1000):
+            cutoff = (latest - timedelta(days=days)).isoformat()
+            assert index.window(team, days=days) == total([r for r in rows if r[0][0] > cutoff]), (team, days)
+    assert index.window("Nobody", last_n=10) == dict.fromkeys(FORM_FIELDS, 0)
+
+
+def test_map_trend_matches_brute_force(matches):
+    index = FormIndex(matches)
+    for team in teams_of(matches)[:8]:
+        for map_name in sorted({p.map for m in matches for p in m.played}):
+            games = sorted(((p.date or m.date, m.id, n), (p.ls > p.rs) == (m.left == team))
+                           for m in matches if m.date and team in (m.left, m.right)
+                           for n, p in enumerate(m.played) if p.map == map_name)
+            want = []
+            for j in range(1, len(games) + 1):
+                window = [won for _, won in games[max(0, j - 5):j]]
+                want.append((games[j - 1][0][0], calc_wr(sum(window), len(window) - sum(window))))
+            assert index.map_trend(team, map_name) == want
+
+
+@pytest.mark.parametrize("order", ["by date", "shuffled"])
+def test_incremental_build_equals_batch(matches, order):
+    ms = sorted(matches, key=lambda m: (m.date or "", m.id)) if order == "by date" else \
+        random.Random(5).sample(matches, len(matches))
+    batch = FormIndex(ms)
+    grown = FormIndex(ms[:200])
+    for i in range(200, len(ms), 150):
+        grown.add(ms[i:i + 150])
+    assert_same(grown, batch)
+
+
+def test_extended_leaves_the_original_untouched(matches):
+    ms = random.Random(9).sample(matches, len(matches))
+    base = FormIndex(ms[:450])
+    before = {t: (list(ps.keys), [list(c) for c in ps.sums]) for t, ps in base.series.items()}
+    grown = base.extended(ms[450:])
+    assert_same(grown, FormIndex(ms))
+    assert {t: (list(ps.keys), [list(c) for c in ps.sums]) for t, ps in base.series.items()} == before
+
+
+def test_prefix_sums_reorder_late_rows():
+    ps = PrefixSums(1)
+    ps.extend([(("2025-01-02", 1), (1,)), (("2025-01-05", 2), (2,))])
+    ps.extend([(("2025-01-03", 3), (4,))])
+    assert ps.keys == [("2025-01-02", 1), ("2025-01-03", 3), ("2025-01-05", 2)]
+    assert ps.total(0, 3) == (7,) and ps.total(1, 2) == (4,)
+    assert ps.span(after="2025-01-02", until="2025-01-04") == (1, 2)
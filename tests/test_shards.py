@@ -0,0 +1,48 @@
+import copy
+import json
+import os
+
+from shards import GENERATIONS, write_shards
+
+
+def referenced(manifest):
+    return [manifest["index"], *manifest["teams"].values(), *manifest["months"].values()]
+
+
+def test_shards_of_recent_builds_survive(archive, tmp_path):
+    manifests = []
+    for build in range(5):
+        data = copy.deepcopy(archive)
+        data["matches"][build]["winner"] = None
+        manifest, info = write_shards(data, str(tmp_path), keep=3)
+        manifests.append(manifest)
+        for i, m in enumerate(manifests):
+            alive = all(os.path.exists(tmp_path / rel) for rel in referenced(m))
+            assert alive == (i > build - 3), (build, i)
+    with open(tmp_path / GENERATIONS, encoding="utf-8") as f:
+        assert len(json.load(f)["builds"]) == 3
+
+
+def test_shards_hold_every_match(archive, tmp_path):
+    manifest, _ = write_shards(archive, str(tmp_path))
+    seen = []
+    for rel in manifest["months"].values():
+        with open(tmp_path / rel, encoding="utf-8") as f:
+            seen += [m["id"] for m in json.load(f)["matches"]]
+    assert sorted(seen) == sorted(m["id"] for m in archive["matches"])
+    assert os.path.exists(tmp_path / (manifest["index"] + ".gz"))
+    team, rel = next(iter(manifest["teams"].items()))
+    with open(tmp_path / rel, encoding="utf-8") as f:
+        ids = [m["id"] for m in json.load(f)["matches"]]
+    assert sorted(ids) == sorted(m["id"] for m in archive["matches"] if team in (m["left"], m["right"]))
+
+
+def test_rebuild_only_writes_changed_shards(archive, tmp_path):
+    first, _ = write_shards(archive, str(tmp_path))
+    again, info = write_shards(archive, str(tmp_path))
+    assert again == first and info["new"] == 0 and info["removed"] == 0
+    data = copy.deepcopy(archive)
+    data["matches"][0]["winner"] = None
+    changed, info = write_shards(data, str(tmp_path))
+    assert 0 < info["new"] < info["files"]
+    assert all(os.path.exists(tmp_path / rel) for rel in referenced(changed))
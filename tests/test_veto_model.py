@@ -0,0 +1,57 @@
+import json
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+from veto_model import VetoModel
+
+POOL = ["Ascent", "Bind", "Haven", "Lotus", "Split", "Sunset", "Icebox"]
+
+
+def veto_match(left, right, steps):
+    """A Bo3 between left and right with the given (team, type, map) steps; the unused map is the decider"""
+    veto = [SimpleNamespace(order=i + 1, team=t, type=a, map=mp) for i, (t, a, mp) in enumerate(steps)]
+    decider = next(mp for mp in POOL if mp not in {s[2] for s in steps})
+    return SimpleNamespace(left=left, right=right, veto=veto, decider=decider)
+
+
+def test_counts_match_the_vetoes(matches):
+    model = VetoModel(matches)
+    firsts = Counter()
+    for m in matches:
+        events = sorted(m.veto, key=lambda e: e.order or 0)
+        for team in (m.left, m.right):
+            first = next((e for e in events if e.type == "ban" and e.team == team), None)
+            if m.left and m.right and first:
+                firsts[team, first.map] += 1
+    assert model.vetoes == sum(1 for m in matches if m.veto and m.left and m.right)
+    assert sum(c[0] for c in model.everyone["ban1"].values()) == sum(firsts.values())
+    for (team, mp), n in firsts.items():
+        assert model.teams[team]["ban1"][mp][0] == n
+    # a map is only counted as available while it is still in the pool
+    for c in model.everyone["pick2"].values():
+        assert 0 <= c[0] <= c[1]
+
+
+def test_habits_drive_the_prediction():
+    steps = [("A", "ban", "Ascent"), ("B", "ban", "Bind"), ("A", "pick", "Haven"),
+             ("B", "pick", "Lotus"), ("A", "ban", "Split"), ("B", "ban", "Sunset")]
+    model = VetoModel([veto_match("A", "B", steps)] * 10)
+    res = model.predict("A", "B", POOL)
+    assert [r["Map"] for r in res["steps"]] == ["Ascent", "Bind", "Haven", "Lotus", "Split", "Sunset", "Icebox"]
+    assert res["steps"][0]["Probability"] > 50
+    assert res["sequences"][0]["Veto"] == " → ".join(s[2] for s in steps)
+    probs = model.choice_probs("A", "B", "ban1", POOL)
+    assert sum(probs.values()) == pytest.approx(1)
+    # an unknown team falls back to everyone's habits
+    assert max(model.choice_probs("X", "Y", "ban1", POOL), key=lambda mp: probs[mp]) == "Ascent"
+
+
+def test_round_trips_through_json(matches):
+    model = VetoModel(matches)
+    loaded = VetoModel.from_dict(json.loads(json.dumps(model.to_dict())))
+    team, opp = next((m.left, m.right) for m in matches if m.veto)
+    assert loaded.predict(team, opp, POOL, fmt="Bo5") == model.predict(team, opp, POOL, fmt="Bo5")
+    with pytest.raises(ValueError):
+        model.predict(team, opp, POOL[:6])
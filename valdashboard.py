@@ -1,12 +1,26 @@
 import streamlit as st
-import json
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 import os
-import re
 from datetime import datetime
 
+from analytics_store import AnalyticsStore, data_version
+from comp_index import ROLES, CompIndex
+from filter_engine import FORMATS, PICKED_BY, FilterEngine, canonical
+from h2h_matrix import H2HMatrix
+from match_history import SORTS as HISTORY_SORTS, MatchHistory
+from patches import patch_spans
+from predictor import current_map_pool, simulate
+from profiling import RerunProfiler, SectionStats, profiling_requested
+from ratings import EloRatings
+from recent_form import FormIndex
+from veto_model import VetoModel
+# pandas and plotly are imported inside the views/figure builders that use them,
+# so a rerun of a view without tables or charts never pays their import cost;
+# numpy only comes in through the engine modules (the filter engine needs it on every rerun)
+from stats_engine import (
+    REGION_TEAMS, calc_wr, get_leaderboard, get_team_stats, is_team_in_region,
+    batch_team_stats, leaderboard_counts, leaderboard_rows, merge_counts,
+)
+
 # --- Configuration ---
 st.set_page_config(page_title="VAL Dashboard", layout="wide", page_icon="⚔️")
 
@@ -118,8 +132,16 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# --- Profiling (opt-in: ?debug=1 or VAL_PROFILE=1) ---
+@st.cache_resource(show_spinner=False)
+def get_section_stats():
+    # Rolling per-section timings shared by every session in this process
+    return SectionStats()
+
+prof = RerunProfiler(profiling_requested(st.query_params), get_section_stats())
+
 # --- Data Loading ---
-DATA_PATH = "./web/data.json"
+DATA_PATH = os.environ.get("VAL_DATA_PATH") or "./web/data.json"
 if not os.path.exists(DATA_PATH):
     DATA_PATH = "web/data.json"
 if not os.path.exists(DATA_PATH):
@@ -128,216 +150,36 @@ if not os.path.exists(DATA_PATH):
     st.error("❌ Cannot find data.json!")
     st.stop()
 
-REGION_TEAMS = {
-    "Americas": [
-        "Sentinels", "NRG", "Cloud9", "100 Thieves", "Evil Geniuses", "LOUD",
-        "FURIA", "MIBR", "Leviatán", "KRÜ Esports", "G2 Esports", "Envy"
-    ],
-    "EMEA": [
-        "Team Liquid", "Team Vitality", "Team Heretics", "Fnatic",
-        "FUT Esports", "BBL Esports", "GIANTX", "Karmine Corp",
-        "Natus Vincere", "Gentle Mates", "PCIFIC Esports", "ULF Esports"
-    ],
-    "Pacific": [
-        "T1", "Nongshim RedForce", "DRX", "FULL SENSE", "Paper Rex", "ZETA DIVISION",
-        "Rex Regum Qeon", "DetonatioN FocusMe", "Talon Esports", "Team Secret",
-        "Global Esports", "Gen.G"
-    ],
-    "China": [
-        "EDward Gaming", "FunPlus Phoenix", "Trace Esports", "Bilibili Gaming",
-        "Wolves Esports", "TYLOO", "All Gamers", "JDG Esports",
-        "Titan Esports Club", "Dragon Ranger Gaming", "Xi Lai Gaming", "Nova Esports"
-    ],
-    "Masters Santiago": [
-        "All Gamers", "Xi Lai Gaming", "EDward Gaming", "Nongshim RedForce",
-        "T1", "Paper Rex", "BBL Esports", "Gentle Mates",
-        "Team Liquid", "FURIA", "G2 Esports", "NRG"
-    ]
-}
-
-def normalize_name(name):
-    if not name: return ""
-    n = name.lower()
-    n = re.sub(r'\b(team|esports|gaming)\b', '', n)
-    n = re.sub(r'[^\w\s]', '', n)
-    return re.sub(r'\s+', ' ', n).strip()
-
-def is_team_in_region(team_name, region):
-    if not region or region == "All Regions": return True
-    for t in REGION_TEAMS.get(region, []):
-        if normalize_name(t) == normalize_name(team_name): return True
-    return False
-
-@st.cache_data
-def load_data():
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return sorted(data.get("teams", [])), data.get("matches", [])
-
-all_teams, matches_raw = load_data()
-
-def safe_int(v, d=0):
-    if v is None: return d
-    try: return int(v)
-    except: return d
-
-def clean_map_name(mn):
-    if not mn or not isinstance(mn, str): return "Unknown"
-    c = re.sub(r'[\t\n\r\x00-\x1f\x7f-\x9f]', '', mn)
-    return c[:15] if len(c) > 15 else (c or "Unknown")
-
-def calc_wr(w, l):
-    return (w / (w + l) * 100) if (w + l) > 0 else 0
-
-# --- Core Stats Engine ---
-def get_team_stats(team, matches):
-    stats = {
-        "maps": {},
-        "series_played": 0, "series_wins": 0, "series_losses": 0,
-        "total_map_wins": 0, "total_map_losses": 0,
-        "pistol_wins": 0, "pistol_losses": 0,
-        "atk_rounds": 0, "def_rounds": 0,
-        "atk_rounds_lost": 0, "def_rounds_lost": 0,
-        "ban_1st": {}, "ban_2nd": {},
-        "pick_wins": 0, "pick_losses": 0,
-    }
-    matches_played = []
-
-    for m in matches:
-        is_left = m.get("left") == team
-        is_right = m.get("right") == team
-        if not (is_left or is_right): continue
-
-        matches_played.append(m)
-        stats["series_played"] += 1
-        winner = m.get("winner")
-        if winner == team: stats["series_wins"] += 1
-        elif winner: stats["series_losses"] += 1
-
-        for p in m.get("played", []):
-            map_name = p.get("map")
-            if not map_name or not isinstance(map_name, str) or len(map_name) > 20: continue
-            if '\t' in map_name or '\n' in map_name: continue
-
-            if map_name not in stats["maps"]:
-                stats["maps"][map_name] = {
-                    "played": 0, "wins": 0, "losses": 0,
-                    "round_wins": 0, "round_losses": 0,
-                    "picks": 0, "bans": 0, "pick_wins": 0, "pick_losses": 0,
-                    "pistol_wins": 0, "pistol_losses": 0, "pistol_rounds": 0,
-                    "atk_rounds_won": 0, "def_rounds_won": 0,
-                    "atk_rounds_lost": 0, "def_rounds_lost": 0,
-                    "agents": {}, "history": []
-                }
-            ms = stats["maps"][map_name]
-            ms["played"] += 1
-
-            ls = safe_int(p.get("ls", 0)); rs = safe_int(p.get("rs", 0))
-            my_score = ls if is_left else rs
-            opp_score = rs if is_left else ls
-            ms["round_wins"] += my_score; ms["round_losses"] += opp_score
-
-            if my_score > opp_score:
-                ms["wins"] += 1; stats["total_map_wins"] += 1
-            else:
-                ms["losses"] += 1; stats["total_map_losses"] += 1
-
-            pistols = p.get("pistols", {})
-            if pistols and isinstance(pistols, dict):
-                my_p = safe_int(pistols.get("left" if is_left else "right", 0))
-                opp_p = safe_int(pistols.get("right" if is_left else "left", 0))
-                ms["pistol_wins"] += my_p; ms["pistol_losses"] += opp_p
-                ms["pistol_rounds"] += (my_p + opp_p)
-                stats["pistol_wins"] += my_p; stats["pistol_losses"] += opp_p
-
-            sides = p.get("sides", {})
-            if sides and isinstance(sides, dict):
-                if is_left:
-                    my_atk, my_def = safe_int(sides.get("left_atk", 0)), safe_int(sides.get("left_def", 0))
-                    opp_atk, opp_def = safe_int(sides.get("right_atk", 0)), safe_int(sides.get("right_def", 0))
-                else:
-                    my_atk, my_def = safe_int(sides.get("right_atk", 0)), safe_int(sides.get("right_def", 0))
-                    opp_atk, opp_def = safe_int(sides.get("left_atk", 0)), safe_int(sides.get("left_def", 0))
-                ms["atk_rounds_won"] += my_atk; ms["def_rounds_won"] += my_def
-                ms["atk_rounds_lost"] += opp_def; ms["def_rounds_lost"] += opp_atk
-                stats["atk_rounds"] += my_atk; stats["def_rounds"] += my_def
-                stats["atk_rounds_lost"] += opp_def; stats["def_rounds_lost"] += opp_atk
-
-            my_agents = p.get("left_agents" if is_left else "right_agents", [])
-            for ag in my_agents:
-                if ag: ms["agents"][ag] = ms["agents"].get(ag, 0) + 1
-
-            opponent = m.get("right" if is_left else "left")
-            # Store sides and pistol info for history display
-            h_entry = {
-                "date": p.get("date") or m.get("date"),
-                "opponent": opponent,
-                "score": f"{my_score}-{opp_score}",
-                "agents": my_agents,
-                "atk": 0, "def": 0, "pistol_w": 0, "pistol_l": 0
-            }
-            if sides and isinstance(sides, dict):
-                h_entry["atk"] = my_atk
-                h_entry["def"] = my_def
-            if pistols and isinstance(pistols, dict):
-                h_entry["pistol_w"] = my_p
-                h_entry["pistol_l"] = opp_p
-            ms["history"].append(h_entry)
-
-        # Veto: picks, bans, 1st/2nd ban tracking
-        veto = m.get("veto", {})
-        team_ban_count = 0
-        for event in veto.get("events", []):
-            map_v = event.get("map"); evt_type = event.get("type"); evt_team = event.get("team")
-            if map_v and evt_team == team and evt_type in ("pick", "ban"):
-                # Create map entry if it doesn't exist yet
-                if map_v not in stats["maps"]:
-                    stats["maps"][map_v] = {
-                        "played": 0, "wins": 0, "losses": 0,
-                        "round_wins": 0, "round_losses": 0,
-                        "picks": 0, "bans": 0, "pick_wins": 0, "pick_losses": 0,
-                        "pistol_wins": 0, "pistol_losses": 0, "pistol_rounds": 0,
-                        "atk_rounds_won": 0, "def_rounds_won": 0,
-                        "atk_rounds_lost": 0, "def_rounds_lost": 0,
-                        "agents": {}, "history": []
-                    }
-                if evt_type == "pick": stats["maps"][map_v]["picks"] += 1
-                elif evt_type == "ban": stats["maps"][map_v]["bans"] += 1
-            if evt_type == "ban" and evt_team == team and map_v:
-                team_ban_count += 1
-                if team_ban_count == 1:
-                    stats["ban_1st"][map_v] = stats["ban_1st"].get(map_v, 0) + 1
-                elif team_ban_count == 2:
-                    stats["ban_2nd"][map_v] = stats["ban_2nd"].get(map_v, 0) + 1
-
-        # Track pick win/loss (skip BO5s - more than 3 maps played)
-        played_maps = m.get("played", [])
-        if len(played_maps) <= 3:
-            team_picks = set()
-            for event in veto.get("events", []):
-                if event.get("type") == "pick" and event.get("team") == team:
-                    team_picks.add(event.get("map"))
-            for p in played_maps:
-                mn = p.get("map")
-                if mn in team_picks and mn in stats["maps"]:
-                    ls_v = safe_int(p.get("ls", 0))
-                    rs_v = safe_int(p.get("rs", 0))
-                    my_s = ls_v if is_left else rs_v
-                    op_s = rs_v if is_left else ls_v
-                    if my_s > op_s:
-                        stats["maps"][mn]["pick_wins"] += 1
-                        stats["pick_wins"] += 1
-                    else:
-                        stats["maps"][mn]["pick_losses"] += 1
-                        stats["pick_losses"] += 1
-
-    return stats, matches_played
+@st.cache_resource(show_spinner=False)
+def live_stores():
+    # path -> the store serving it now; its replacement takes over its incremental aggregates
+    return {}
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_store(path, version):
+    # One store per process (and per data version), shared by every session
+    stores = live_stores()
+    store = AnalyticsStore(path, cache_dir=os.environ.get("VAL_CACHE_DIR", ".val_cache"), previous=stores.get(path))
+    # Aggregates written by build_data_json.py --precompute make the unfiltered views warm from the start
+    store.seed_precomputed(os.path.join(os.path.dirname(path), "stats.json"))
+    stores[path] = store
+    return store
+
+with prof.section("load_data"):
+    store = get_store(DATA_PATH, data_version(DATA_PATH))
+prof.store = store
+all_teams, matches_raw = store.teams, store.matches
+DATA_VERSION = store.version
 
 # --- Guard ---
 if not all_teams or not matches_raw:
     st.error("⚠️ No data found. Run scraper & build_data_json.py first!")
     st.stop()
 
+# Columnar view of every match: filters compile to boolean masks over it
+with prof.section("filter_engine"):
+    engine = store.aggregate(("filter_engine",), lambda: FilterEngine(matches_raw))
+
 # =============================================
 # SIDEBAR
 # =============================================
@@ -370,7 +212,7 @@ with st.sidebar:
     min_date = max_date = None
     if date_filter:
         for m in matches_raw:
-            d = m.get("date")
+            d = m.date
             if d:
                 if min_date is None or d < min_date: min_date = d
                 if max_date is None or d > max_date: max_date = d
@@ -380,121 +222,367 @@ with st.sidebar:
         else:
             date_filter = False
 
+    spans = store.aggregate(("patch_spans",), lambda: patch_spans(matches_raw))
+    current_patch = st.checkbox("🩹 Current patch only", disabled=not spans,
+                                help=f"Patch {next(iter(spans), '—')}" if spans else "No patch calendar")
+    patch_sel = [next(iter(spans))] if current_patch else st.multiselect(
+        "Patches", list(spans), key="patches", placeholder="All patches",
+        format_func=lambda p: f"{p} ({spans[p][0]} → {spans[p][1]})")
+
+    with st.expander("🔬 More filters"):
+        opts = engine.options()
+        any_ = "Any"
+        f_map = st.selectbox("Map played", [any_] + opts["map"], key="f_map")
+        f_opp = st.selectbox("Opponent", [any_] + opts["opponent"], key="f_opp")
+        f_opp_region = st.selectbox("Opponent region", [any_] + opts["opponent_region"], key="f_opp_region")
+        f_format = st.selectbox("Series format", [any_] + list(FORMATS), key="f_format")
+        f_picked = st.selectbox("Map picked by", [any_] + list(PICKED_BY), key="f_picked",
+                                help="With 'Map played' set, the same map must also match")
+        f_agent = st.selectbox("Agent played", [any_] + opts["agent"], key="f_agent")
+        st.caption("Opponent, picked-by and agent filters are relative to each team: "
+                   "a team's stats only use matches where its own side qualifies")
+
     st.markdown("---")
     st.caption(f"{len(all_teams)} teams · {len(matches_raw)} matches")
 
 # =============================================
 # APPLY FILTERS
 # =============================================
-filtered_matches = []
-for m in matches_raw:
-    if not (is_team_in_region(m.get("left"), region) or is_team_in_region(m.get("right"), region)):
-        continue
-    if date_filter and min_date and max_date:
-        md = m.get("date")
-        if md and not (str(start_date) <= md <= str(end_date)): continue
-    filtered_matches.append(m)
-
-team1_matches = [m for m in filtered_matches if m.get("left") == team1 or m.get("right") == team1]
-team2_matches = [m for m in filtered_matches if m.get("left") == team2 or m.get("right") == team2]
-h2h_matches = [m for m in filtered_matches if {m.get("left"), m.get("right")} == {team1, team2}]
-
-t1_stats, _ = get_team_stats(team1, team1_matches)
-t2_stats, _ = get_team_stats(team2, team2_matches)
+predicates = [("region", region)] if region != "All Regions" else []
+if date_filter:
+    predicates.append(("date", str(start_date), str(end_date)))
+for kind, value in (("map", f_map), ("opponent", f_opp), ("opponent_region", f_opp_region),
+                    ("format", f_format), ("picked_by", f_picked), ("agent", f_agent)):
+    if value != any_:
+        predicates.append((kind, value))
+if patch_sel:
+    predicates.append(("patch",) + tuple(sorted(patch_sel)))
+# Cache key for anything derived from the filtered data: the canonical predicate tuple
+FILTER_SIG = canonical(predicates)
+# Patch-only selections are served by merging per-patch segment aggregates (precomputed at build time)
+SEGMENTS = FILTER_SIG[0][1:] if len(FILTER_SIG) == 1 and FILTER_SIG[0][0] == "patch" else ()
+prof.context.update(team1=team1, team2=team2, filter=FILTER_SIG)
+
+def predicate_mask(pred):
+    # One cached mask per predicate, shared by every query that uses it
+    return store.aggregate(("filter_mask", pred), lambda: engine.mask(pred), persist=False)
+
+with prof.section("filter"):
+    filter_rows = store.aggregate(("filter_rows", FILTER_SIG), lambda: engine.select(FILTER_SIG, predicate_mask),
+                                  persist=False)
+    filtered_matches = store.aggregate(("filtered", FILTER_SIG),
+                                       lambda: [matches_raw[i] for i in engine.match_index(filter_rows)],
+                                       persist=False)
+
+# Team match lists and stats live in the shared store, built on first use by any session
+def team_matches(team):
+    return store.aggregate(("team_matches", team, FILTER_SIG),
+                           lambda: [matches_raw[i] for i in engine.team_index(filter_rows, team)],
+                           persist=False)
+
+def segment_team_stats(team, patch):
+    return store.aggregate(("team_stats", team, (("patch", patch),)), lambda: get_team_stats(
+        team, [m for m in store.matches_for(team) if m.patch == patch])[0])
+
+def team_stats(team):
+    with prof.section("get_team_stats", team=team):
+        if len(SEGMENTS) == 1:
+            return segment_team_stats(team, SEGMENTS[0])
+        if SEGMENTS:
+            return store.aggregate(("team_stats", team, FILTER_SIG),
+                                   lambda: merge_counts([segment_team_stats(team, p) for p in SEGMENTS]))
+        return store.aggregate(("team_stats", team, FILTER_SIG),
+                               lambda: get_team_stats(team, team_matches(team))[0])
+
+def teams_stats(teams):
+    """team_stats for many teams; those not in memory yet come from one batch pass over their matches"""
+    missing = [t for t in teams if not store.cached(("team_stats", t, FILTER_SIG))]
+    if len(missing) > 1 and not SEGMENTS:
+        batch = {}
+        def compute(team):
+            if not batch:
+                with prof.section("batch_team_stats", teams=len(missing)):
+                    ks, pos = engine.team_pairs(filter_rows, missing)
+                    batch.update(batch_team_stats(missing, ((matches_raw[k], missing[j])
+                                                            for k, j in zip(ks.tolist(), pos.tolist()))))
+            return batch[team]
+        for t in missing:
+            store.aggregate(("team_stats", t, FILTER_SIG), lambda t=t: compute(t))
+    return {t: team_stats(t) for t in teams}
+
+# Date-sorted history columns; the History and H2H tables filter, sort and page over them
+def match_history(team):
+    return store.aggregate(("match_history", team, FILTER_SIG), lambda: MatchHistory(team, team_matches(team)),
+                           persist=False)
+
+# Every pair's series/map/round/pistol records in one pass; pairwise lookups are array indexing
+def h2h_matrix():
+    with prof.section("h2h_matrix"):
+        return store.aggregate(("h2h_matrix", FILTER_SIG), lambda: H2HMatrix(filtered_matches), persist=False)
+
+# Recent form ignores the sidebar filters: windows are relative to the newest match in the data
+def form_index():
+    with prof.section("recent_form"):
+        return store.incremental(("form_index",), lambda: FormIndex(matches_raw),
+                                 lambda old, added: old.extended(added))
+
+# Elo ratings also use every match, in date order
+def elo_ratings():
+    with prof.section("elo"):
+        # Holds the matches themselves (for late-data replay): cheaper to rebuild than to unpickle.
+        # When data.json only gains matches, the previous data version's ratings just add them
+        return store.incremental(("elo",), lambda: EloRatings(matches_raw),
+                                 lambda old, added: old.extended(added, matches_raw), persist=False)
+
+# Monte Carlo series prediction from the (filtered) team stats and all-time Elo
+def series_prediction(fmt):
+    pool = store.aggregate(("map_pool",), lambda: current_map_pool(matches_raw))
+    with prof.section("predictor", cache=None):
+        return store.aggregate(("prediction", team1, team2, fmt, FILTER_SIG), lambda: simulate(
+            pool, team_stats(team1), team_stats(team2), elo_ratings().rating(team1), elo_ratings().rating(team2), fmt))
+
+# Veto tables come precomputed in stats.json when the build ran with --precompute
+def veto_model():
+    with prof.section("veto_model"):
+        return store.aggregate(("veto_model",), lambda: VetoModel(matches_raw))
+
+def veto_prediction(first, second, fmt):
+    pool = store.aggregate(("map_pool",), lambda: current_map_pool(matches_raw))
+    return store.aggregate(("veto_prediction", first, second, fmt), lambda: veto_model().predict(first, second, pool, fmt))
+
+# Every lineup of every played map, interned once; comp queries filter its columns
+def comp_index():
+    with prof.section("comp_index"):
+        return store.aggregate(("comp_index",), lambda: CompIndex(matches_raw))
 
 # =============================================
-# ALL TABS — same as original, cleaned up
+# FIGURES — built once per (team, chart, filter, data version)
 # =============================================
-tab_home, tab_leaderboard, tab_overview, tab_history, tab_h2h, tab_map, tab_comp = st.tabs([
-    "🏠 Home", "🏆 Leaderboard", "📊 Overview", "📜 History", "⚔️ Head-to-Head", "🗺️ Map Deep Dive", "📈 Comparison"
-])
+CHART_LAYOUT = dict(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color='#e8ecf1')
+# Series colours for multi-team charts: the two sidebar team colours first
+COMPARE_COLORS = ['#E59E6D', '#ADDFB3', '#EEE1C6', '#c45c5c', '#7FB3D5', '#C39BD3',
+                  '#F7DC6F', '#76D7C4', '#F0B27A', '#AEB6BF', '#D98880', '#82E0AA']
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def figure_spec(team, kind, filter_sig, data_version, _build):
+    # _build is skipped by the cache hasher: the key is exactly (team, kind, filter, data version)
+    return _build().to_dict()
+
+def show_figure(team, kind, build, **chart_kwargs):
+    with prof.section("plotly", team=team, chart=kind):
+        spec = figure_spec(team, kind, FILTER_SIG, DATA_VERSION, build)
+        st.plotly_chart(spec, use_container_width=True, **chart_kwargs)
+
+def build_map_wr_figure(stats):
+    import pandas as pd
+    import plotly.express as px
+    map_wr_data = []
+    for mn, d in stats['maps'].items():
+        w, l = d['wins'], d['losses']
+        if w + l > 0:
+            pw_v, pl_v = d.get('pistol_wins', 0), d.get('pistol_losses', 0)
+            rec = f"{w}-{l}"
+            if pw_v + pl_v > 0: rec += f" | P:{pw_v}-{pl_v}"
+            map_wr_data.append({"Map": mn, "Win Rate": calc_wr(w, l), "Record": rec})
+    df = pd.DataFrame(map_wr_data).sort_values("Win Rate", ascending=False)
+    fig = px.bar(df, x="Map", y="Win Rate", text="Record", color="Win Rate",
+                 color_continuous_scale=[[0, '#c45c5c'], [0.5, '#ADDFB3'], [1, '#ADDFB3']])
+    fig.update_layout(**CHART_LAYOUT, showlegend=False, yaxis=dict(range=[0, 115]),
+                      margin=dict(t=10, b=10), height=300)
+    fig.update_traces(textposition='outside', textfont_size=11)
+    return fig
+
+def build_ban_figure(bans, title, color):
+    import pandas as pd
+    import plotly.express as px
+    total = sum(bans.values())
+    rows = [{"Map": m, "Count": c, "Rate": f"{c/total*100:.0f}%"}
+            for m, c in sorted(bans.items(), key=lambda x: x[1], reverse=True)]
+    fig = px.bar(pd.DataFrame(rows), x="Map", y="Count", text="Rate",
+                 title=f"{title} ({total} series)")
+    fig.update_layout(**CHART_LAYOUT, showlegend=False,
+                      yaxis=dict(range=[0, max(bans.values()) * 1.4]),
+                      margin=dict(t=30, b=10), height=260)
+    fig.update_traces(marker_color=color, textposition='outside')
+    return fig
+
+def build_trend_figure(trends, colors):
+    import pandas as pd
+    import plotly.express as px
+    rows = [{"Date": d, "Win Rate": wr, "Team": t} for t, pts in trends.items() for d, wr in pts]
+    fig = px.line(pd.DataFrame(rows), x="Date", y="Win Rate", color="Team", markers=True,
+                  color_discrete_map=colors)
+    fig.update_layout(**CHART_LAYOUT, yaxis=dict(range=[-5, 105]), margin=dict(t=10, b=10), height=280)
+    return fig
+
+def build_elo_figure(trajectories, colors):
+    import pandas as pd
+    import plotly.express as px
+    rows = [{"Date": d, "Elo": r, "Team": t} for t, pts in trajectories.items() for d, r in pts]
+    fig = px.line(pd.DataFrame(rows), x="Date", y="Elo", color="Team", color_discrete_map=colors)
+    fig.update_layout(**CHART_LAYOUT, margin=dict(t=10, b=10), height=300)
+    return fig
+
+def build_pick_rate_figure(maps, agents, rates):
+    import plotly.express as px
+    fig = px.imshow(rates, x=agents, y=maps, text_auto=".0f", aspect="auto",
+                    color_continuous_scale=[[0, '#2B2A27'], [0.5, '#E59E6D'], [1, '#ADDFB3']])
+    fig.update_layout(**CHART_LAYOUT, margin=dict(t=10, b=10), height=60 + 32 * len(maps),
+                      coloraxis_colorbar=dict(title="Pick %"))
+    fig.update_xaxes(side="top", tickangle=-45)
+    return fig
+
+def build_h2h_heatmap(teams, pct, wins, losses, label):
+    import plotly.graph_objects as go
+    text = [[f"{w}-{l}" if w + l else "" for w, l in zip(wr, lr)] for wr, lr in zip(wins.tolist(), losses.tolist())]
+    fig = go.Figure(go.Heatmap(z=pct, x=teams, y=teams, text=text, texttemplate="%{text}", zmin=0, zmax=100,
+                               colorscale=[[0, '#c45c5c'], [0.5, '#2B2A27'], [1, '#ADDFB3']],
+                               colorbar=dict(title=label), hoverongaps=False,
+                               hovertemplate="%{y} vs %{x}<br>%{text} (%{z:.0f}%)<extra></extra>"))
+    fig.update_layout(**CHART_LAYOUT, margin=dict(t=10, b=10), height=120 + 28 * len(teams),
+                      yaxis=dict(autorange="reversed"))
+    fig.update_xaxes(side="top", tickangle=-45)
+    return fig
+
+def build_comparison_figure(teams, stats, colors):
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+    plays = {}
+    for t in teams:
+        for mn, d in stats[t]["maps"].items():
+            plays[mn] = plays.get(mn, 0) + d.get("wins", 0) + d.get("losses", 0)
+    maps = sorted(plays, key=lambda mn: (-plays[mn], mn))
+    if len(teams) > 4:
+        # Many teams: a team x map grid reads better than a forest of grouped bars
+        z, text = [], []
+        for t in teams:
+            recs = [(d.get("wins", 0), d.get("losses", 0)) for d in (stats[t]["maps"].get(mn, {}) for mn in maps)]
+            z.append([calc_wr(w, l) if w + l else None for w, l in recs])
+            text.append([f"{w}-{l}" if w + l else "" for w, l in recs])
+        fig = go.Figure(go.Heatmap(z=z, x=maps, y=teams, text=text, texttemplate="%{text}", zmin=0, zmax=100,
+                                   colorscale=[[0, '#c45c5c'], [0.5, '#2B2A27'], [1, '#ADDFB3']],
+                                   colorbar=dict(title="Map %"), hoverongaps=False))
+        fig.update_layout(**CHART_LAYOUT, margin=dict(t=10, b=10), height=120 + 30 * len(teams),
+                          yaxis=dict(autorange="reversed"))
+        fig.update_xaxes(side="top")
+        return fig
+    comp_data = []
+    for mn in sorted(maps):
+        for t in teams:
+            d = stats[t]["maps"].get(mn, {})
+            pw_v, pl_v = d.get('pistol_wins', 0), d.get('pistol_losses', 0)
+            label = f"<b>{d.get('wins',0)}-{d.get('losses',0)}</b>"
+            if pw_v + pl_v > 0: label += f" (P:{pw_v}-{pl_v})"
+            comp_data.append({"Map": mn, "Team": t, "Win Rate": calc_wr(d.get("wins", 0), d.get("losses", 0)), "Label": label})
+    fig = px.bar(pd.DataFrame(comp_data), x="Map", y="Win Rate", color="Team", barmode="group", text="Label",
+                 color_discrete_map=colors)
+    fig.update_layout(**CHART_LAYOUT, yaxis=dict(range=[0, 130]),
+                      margin=dict(t=10, b=10), height=400)
+    fig.update_traces(textposition='outside')
+    return fig
 
+# =============================================
+# VIEWS — one render function per tab
+# =============================================
 # ========== HOME ==========
-with tab_home:
+FEED_PAGE = 15
+
+def render_home():
     c1, c2, c3 = st.columns(3)
     with c1: st.metric("Teams", len(all_teams))
     with c2: st.metric("Matches", len(filtered_matches))
     with c3:
-        st.metric("Maps Played", sum(len(m.get("played", [])) for m in filtered_matches))
+        st.metric("Maps Played", sum(len(m.played) for m in filtered_matches))
 
     st.markdown("---")
     st.subheader("Recent Matches")
 
-    recent = sorted(filtered_matches, key=lambda x: x.get("date", ""), reverse=True)[:15]
-    for match in recent:
-        left, right = match.get("left", ""), match.get("right", "")
-        winner = match.get("winner", "")
-        date = match.get("date", "")
-        played = match.get("played", [])
-        lw = sum(1 for p in played if safe_int(p.get("ls")) > safe_int(p.get("rs")))
-        rw = sum(1 for p in played if safe_int(p.get("rs")) > safe_int(p.get("ls")))
-
-        # Map pills - always from WINNER's perspective
-        pills = []
-        winner_is_left = (winner == left)
-        for p in played:
-            mn = clean_map_name(p.get("map", ""))
-            ls_v, rs_v = safe_int(p.get("ls")), safe_int(p.get("rs"))
-            # Show winner's score first
-            if winner:
-                w_score = ls_v if winner_is_left else rs_v
-                l_score = rs_v if winner_is_left else ls_v
-                if w_score > l_score:
-                    clr = "#ADDFB3"  # winner won this map
-                else:
-                    clr = "#c45c5c"  # winner lost this map
-                pills.append(f"<span class='map-pill' style='color:{clr}'>{mn} {w_score}-{l_score}</span>")
+    recent = store.aggregate(("recent", FILTER_SIG), lambda: sorted(filtered_matches, key=lambda x: x.date or "",
+                                                                    reverse=True), persist=False)
+    if not recent:
+        st.info("No matches for these filters."); return
+    shown = min(st.session_state.get("feed_size", FEED_PAGE), len(recent))
+    # One markdown element for the whole feed, from per-match HTML cached in the shared store
+    with prof.section("home_feed", matches=shown):
+        cards = [store.aggregate(("match_card", m.id, m.left, m.right), lambda m=m: match_card_html(m), persist=False) for m in recent[:shown]]
+        st.markdown("".join(cards), unsafe_allow_html=True)
+    if shown < len(recent):
+        def load_more(): st.session_state["feed_size"] = shown + FEED_PAGE
+        st.button(f"Load {min(FEED_PAGE, len(recent) - shown)} more", on_click=load_more, key="feed_more")
+        st.caption(f"Showing {shown} of {len(recent)} matches")
+
+def match_card_html(match):
+    left, right = match.left or "", match.right or ""
+    winner = match.winner or ""
+    date = match.date or ""
+    played = match.played
+    lw = sum(1 for p in played if p.ls > p.rs)
+    rw = sum(1 for p in played if p.rs > p.ls)
+
+    # Map pills - always from WINNER's perspective
+    pills = []
+    winner_is_left = (winner == left)
+    for p in played:
+        mn = p.map or "Unknown"
+        ls_v, rs_v = p.ls, p.rs
+        # Show winner's score first
+        if winner:
+            w_score = ls_v if winner_is_left else rs_v
+            l_score = rs_v if winner_is_left else ls_v
+            if w_score > l_score:
+                clr = "#ADDFB3"  # winner won this map
             else:
-                pills.append(f"<span class='map-pill' style='color:#94a3b8'>{mn} {ls_v}-{rs_v}</span>")
-
-        # Winner in green+bold, loser in muted gray — winner listed first
-        if winner == left:
-            team_html = f"<span class='win'>{left}</span> <b>{lw}</b> - <b>{rw}</b> <span class='loss'>{right}</span>"
-        elif winner == right:
-            team_html = f"<span class='win'>{right}</span> <b>{rw}</b> - <b>{lw}</b> <span class='loss'>{left}</span>"
+                clr = "#c45c5c"  # winner lost this map
+            pills.append(f"<span class='map-pill' style='color:{clr}'>{mn} {w_score}-{l_score}</span>")
         else:
-            team_html = f"<span>{left}</span> <b>{lw}</b> - <b>{rw}</b> <span>{right}</span>"
+            pills.append(f"<span class='map-pill' style='color:#94a3b8'>{mn} {ls_v}-{rs_v}</span>")
 
-        st.markdown(f"""<div class='match-card'>
-            <span class='date'>{date}</span>
-            <span class='teams'>{team_html}</span>
-            <div class='maps-row'>{"".join(pills)}</div>
-        </div>""", unsafe_allow_html=True)
+    # Winner in green+bold, loser in muted gray — winner listed first
+    if winner == left:
+        team_html = f"<span class='win'>{left}</span> <b>{lw}</b> - <b>{rw}</b> <span class='loss'>{right}</span>"
+    elif winner == right:
+        team_html = f"<span class='win'>{right}</span> <b>{rw}</b> - <b>{lw}</b> <span class='loss'>{left}</span>"
+    else:
+        team_html = f"<span>{left}</span> <b>{lw}</b> - <b>{rw}</b> <span>{right}</span>"
+
+    return f"""<div class='match-card'>
+        <span class='date'>{date}</span>
+        <span class='teams'>{team_html}</span>
+        <div class='maps-row'>{"".join(pills)}</div>
+    </div>"""
 
 # ========== LEADERBOARD ==========
-with tab_leaderboard:
+def segment_leaderboard_counts(patch):
+    sig = (("patch", patch),)
+    return store.aggregate(("leaderboard_counts", sig), lambda: leaderboard_counts(
+        all_teams, [matches_raw[i] for i in engine.match_index(engine.select(sig, predicate_mask))]))
+
+def render_leaderboard():
+    import pandas as pd
     st.subheader("Team Rankings")
-    lb_data = []
-    for team in all_teams:
-        tm = [m for m in filtered_matches if m.get("left") == team or m.get("right") == team]
-        if not tm: continue
-        wins = sum(1 for m in tm if m.get("winner") == team)
-        losses = len(tm) - wins
-        map_w = map_l = pw = pt = rw = rl = 0
-        for match in tm:
-            is_left = match.get("left") == team
-            for mp in match.get("played", []):
-                ls_v, rs_v = safe_int(mp.get("ls", 0)), safe_int(mp.get("rs", 0))
-                my_s = ls_v if is_left else rs_v
-                op_s = rs_v if is_left else ls_v
-                if my_s > op_s: map_w += 1
-                else: map_l += 1
-                pw += safe_int(mp.get("pistols", {}).get("left" if is_left else "right", 0))
-                pt += 2; rw += my_s; rl += op_s
-        lb_data.append({
-            "Team": team, "Matches": len(tm), "W-L": f"{wins}-{losses}",
-            "Win %": calc_wr(wins, losses),
-            "Map W-L": f"{map_w}-{map_l}", "Map %": calc_wr(map_w, map_l),
-            "Round W-L": f"{rw}-{rl}", "Round %": calc_wr(rw, rl),
-            "Pistol W-L": f"{pw}-{pt - pw}", "Pistol %": calc_wr(pw, pt - pw),
-        })
-    lb_data.sort(key=lambda x: x["Win %"], reverse=True)
-    for i, row in enumerate(lb_data, 1): row["#"] = i
+    with prof.section("leaderboard"):
+        if SEGMENTS:
+            lb_data = store.aggregate(("leaderboard", FILTER_SIG), lambda: leaderboard_rows(
+                merge_counts([segment_leaderboard_counts(p) for p in SEGMENTS])))
+        else:
+            lb_data = store.aggregate(("leaderboard", FILTER_SIG), lambda: get_leaderboard(
+                all_teams, filtered_matches, {t: team_matches(t) for t in all_teams}))
+    if not lb_data:
+        st.info("No matches for these filters."); return
     df_lb = pd.DataFrame(lb_data)
-    df_lb = df_lb[["#", "Team", "Matches", "W-L", "Win %", "Map W-L", "Map %", "Round W-L", "Round %", "Pistol W-L", "Pistol %"]]
+    elo = elo_ratings()
+    df_lb["Elo"] = df_lb["Team"].map(elo.rating).round()
+    rank_by = st.radio("Rank by", ["Win %", "Elo"], horizontal=True,
+                       help="Elo uses every match in date order and weights wins by opponent strength and round margin")
+    if rank_by == "Elo":
+        df_lb = df_lb.sort_values("Elo", ascending=False)
+        df_lb["#"] = range(1, len(df_lb) + 1)
+    df_lb = df_lb[["#", "Team", "Elo", "Matches", "W-L", "Win %", "Map W-L", "Map %", "Round W-L", "Round %", "Pistol W-L", "Pistol %"]]
     st.dataframe(df_lb, use_container_width=True, hide_index=True, height=600,
         column_config={
             "#": st.column_config.NumberColumn("#", format="%d", width="small"),
+            "Elo": st.column_config.NumberColumn("Elo", format="%d"),
             "Win %": st.column_config.NumberColumn("Win %", format="%.1f%%"),
             "Map %": st.column_config.NumberColumn("Map %", format="%.1f%%"),
             "Round %": st.column_config.NumberColumn("Round %", format="%.1f%%"),
@@ -503,7 +591,8 @@ with tab_leaderboard:
     st.download_button("📥 Download CSV", df_lb.to_csv(index=False), "valorant_rankings.csv", "text/csv")
 
 # ========== OVERVIEW ==========
-with tab_overview:
+def render_overview():
+    t1_stats, t2_stats = team_stats(team1), team_stats(team2)
     col_left, col_right = st.columns(2)
 
     def render_team_overview(col, team_name, stats, color):
@@ -522,6 +611,14 @@ with tab_overview:
                 st.metric("Win Rate", f"{wr:.1f}%")
             st.markdown("</div>", unsafe_allow_html=True)
 
+            # Recent form: last 10 series and last 30/60/90 days
+            form = form_index().recent_form(team_name)
+            for fc, (label, w) in zip(st.columns(len(form)), form.items()):
+                with fc:
+                    losses = w['series'] - w['series_wins']
+                    st.metric(label, f"{calc_wr(w['series_wins'], losses):.0f}%" if w['series'] else "–",
+                              f"{w['series_wins']}-{losses}" if w['series'] else None, delta_color="off")
+
             # Pistol + ATK/DEF in one compact row
             pt_total = stats['pistol_wins'] + stats['pistol_losses']
             atk_t = stats['atk_rounds'] + stats['atk_rounds_lost']
@@ -543,23 +640,8 @@ with tab_overview:
                         st.markdown(f"<div class='stat-box'><b>Map Pick WR:</b> {pick_wr:.1f}% ({stats['pick_wins']}-{stats['pick_losses']})</div>", unsafe_allow_html=True)
 
             # Map Win Rates
-            map_wr_data = []
-            for mn, d in stats['maps'].items():
-                w, l = d['wins'], d['losses']
-                if w + l > 0:
-                    pw_v, pl_v = d.get('pistol_wins', 0), d.get('pistol_losses', 0)
-                    rec = f"{w}-{l}"
-                    if pw_v + pl_v > 0: rec += f" | P:{pw_v}-{pl_v}"
-                    map_wr_data.append({"Map": mn, "Win Rate": calc_wr(w, l), "Record": rec})
-            if map_wr_data:
-                df = pd.DataFrame(map_wr_data).sort_values("Win Rate", ascending=False)
-                fig = px.bar(df, x="Map", y="Win Rate", text="Record", color="Win Rate",
-                             color_continuous_scale=[[0, '#c45c5c'], [0.5, '#ADDFB3'], [1, '#ADDFB3']])
-                fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                                  font_color='#e8ecf1', showlegend=False, yaxis=dict(range=[0, 115]),
-                                  margin=dict(t=10, b=10), height=300)
-                fig.update_traces(textposition='outside', textfont_size=11)
-                st.plotly_chart(fig, use_container_width=True, key=f"mwr_{team_name}")
+            if any(d['wins'] + d['losses'] > 0 for d in stats['maps'].values()):
+                show_figure(team_name, "map_wr", lambda: build_map_wr_figure(stats), key=f"mwr_{team_name}")
 
             # Ban Tendencies
             ban_1st = stats.get("ban_1st", {})
@@ -569,125 +651,147 @@ with tab_overview:
                     bc1, bc2 = st.columns(2)
                     with bc1:
                         if ban_1st:
-                            total_1 = sum(ban_1st.values())
-                            b1 = [{"Map": m, "Count": c, "Rate": f"{c/total_1*100:.0f}%"}
-                                  for m, c in sorted(ban_1st.items(), key=lambda x: x[1], reverse=True)]
-                            fig_b1 = px.bar(pd.DataFrame(b1), x="Map", y="Count", text="Rate",
-                                            title=f"1st Ban ({total_1} series)")
-                            fig_b1.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                                                 font_color='#e8ecf1', showlegend=False,
-                                                 yaxis=dict(range=[0, max(ban_1st.values()) * 1.4]),
-                                                 margin=dict(t=30, b=10), height=260)
-                            fig_b1.update_traces(marker_color='#c45c5c', textposition='outside')
-                            st.plotly_chart(fig_b1, use_container_width=True, key=f"b1_{team_name}")
+                            show_figure(team_name, "ban_1st", lambda: build_ban_figure(ban_1st, "1st Ban", '#c45c5c'),
+                                        key=f"b1_{team_name}")
                     with bc2:
                         if ban_2nd:
-                            total_2 = sum(ban_2nd.values())
-                            b2 = [{"Map": m, "Count": c, "Rate": f"{c/total_2*100:.0f}%"}
-                                  for m, c in sorted(ban_2nd.items(), key=lambda x: x[1], reverse=True)]
-                            fig_b2 = px.bar(pd.DataFrame(b2), x="Map", y="Count", text="Rate",
-                                            title=f"2nd Ban ({total_2} series)")
-                            fig_b2.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                                                 font_color='#e8ecf1', showlegend=False,
-                                                 yaxis=dict(range=[0, max(ban_2nd.values()) * 1.4]),
-                                                 margin=dict(t=30, b=10), height=260)
-                            fig_b2.update_traces(marker_color='#ADDFB3', textposition='outside')
-                            st.plotly_chart(fig_b2, use_container_width=True, key=f"b2_{team_name}")
+                            show_figure(team_name, "ban_2nd", lambda: build_ban_figure(ban_2nd, "2nd Ban", '#ADDFB3'),
+                                        key=f"b2_{team_name}")
 
     render_team_overview(col_left, team1, t1_stats, "#E59E6D")
     render_team_overview(col_right, team2, t2_stats, "#ADDFB3")
 
 # ========== HISTORY ==========
-with tab_history:
+def render_history_table(hist, key, opponents=True):
+    import pandas as pd
+    c1, c2, c3, c4, c5, c6 = st.columns([2, 1, 1.4, 1.4, 1, 1])
+    opp = c1.selectbox("Opponent", ["All"] + sorted(set(hist.opponents)), key=f"{key}_opp") if opponents else "All"
+    result = c2.selectbox("Result", ["All", "W", "L"], key=f"{key}_result")
+    map_name = c3.selectbox("Map", ["All"] + hist.maps(), key=f"{key}_map")
+    sort = c4.selectbox("Sort by", HISTORY_SORTS, key=f"{key}_sort")
+    size = c5.selectbox("Per page", [25, 50, 100], key=f"{key}_size")
+    descending = c6.toggle("Descending", True, key=f"{key}_desc")
+    rows = hist.order(hist.select(opp if opp != "All" else None, result if result != "All" else None,
+                                  map_name if map_name != "All" else None), sort, descending)
+    if not len(rows):
+        st.info("No matches found."); return
+    pages = -(-len(rows) // size)
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    # Only the visible page is formatted and sent to the browser
+    st.dataframe(pd.DataFrame(hist.page(rows, page - 1, size)), use_container_width=True, hide_index=True,
+                 column_config={"Maps": st.column_config.TextColumn(width="large"),
+                                "Round diff": st.column_config.NumberColumn(format="%+d")})
+    st.caption(f"{len(rows)} of {len(hist)} series · page {page} of {pages}")
+
+def render_history():
+    hist = match_history(team1)
     st.subheader(f"Match History: {team1}")
-    history_data = []
-    for m in sorted(team1_matches, key=lambda x: x.get("date") or "0000", reverse=True)[:20]:
-        is_left = m["left"] == team1
-        opp = m["right"] if is_left else m["left"]
-        lw = rw = 0; map_details = []
-        for p in m.get("played", []):
-            ls_v, rs_v = safe_int(p.get("ls", 0)), safe_int(p.get("rs", 0))
-            if ls_v > rs_v: lw += 1
-            elif rs_v > ls_v: rw += 1
-            my_s = ls_v if is_left else rs_v
-            op_s = rs_v if is_left else ls_v
-            clr = "#ADDFB3" if my_s > op_s else "#c45c5c"
-            mn = clean_map_name(p.get('map', '?'))
-            pist = p.get("pistols", {})
-            if pist and isinstance(pist, dict):
-                mp_v = safe_int(pist.get("left" if is_left else "right", 0))
-                op_v = safe_int(pist.get("right" if is_left else "left", 0))
-                map_details.append(f"<span style='color:{clr}'>{mn} {my_s}-{op_s} (P:{mp_v}-{op_v})</span>")
-            else:
-                map_details.append(f"<span style='color:{clr}'>{mn} {my_s}-{op_s}</span>")
-        winner = m.get("winner")
-        wl = "W" if winner == team1 else ("L" if winner else "-")
-        wl_cls = "win" if wl == "W" else "loss"
-        my_w = lw if is_left else rw; my_l = rw if is_left else lw
-        history_data.append({
-            "Date": m.get("date"), "Opponent": opp,
-            "Result": f"<span class='{wl_cls}'>{wl}</span> {my_w}-{my_l}",
-            "Maps": " | ".join(map_details)
-        })
-    if history_data:
-        st.write(pd.DataFrame(history_data).to_html(escape=False, index=False), unsafe_allow_html=True)
+    if len(hist):
+        render_history_table(hist, "hist")
     else:
         st.info("No matches found.")
 
 # ========== HEAD-TO-HEAD ==========
-with tab_h2h:
+def render_prediction():
+    import pandas as pd
+    fmt = st.radio("Series format", ["Bo3", "Bo5"], horizontal=True, key="pred_fmt")
+    try:
+        pred = series_prediction(fmt)
+    except ValueError as e:
+        st.caption(f"No prediction: {e}"); return
+    c1, c2 = st.columns(2)
+    with c1: st.metric(f"{team1} wins", f"{pred['team1_win']:.1f}%")
+    with c2: st.metric(f"{team2} wins", f"{100 - pred['team1_win']:.1f}%")
+    pct = lambda label: st.column_config.ProgressColumn(label, format="%.1f%%", min_value=0, max_value=100)
+    sc, mc = st.columns([1, 2])
+    with sc:
+        st.dataframe(pd.DataFrame(pred["scores"]).rename(columns={"Score": f"Score ({team1} first)"}),
+                     use_container_width=True, hide_index=True, column_config={"Probability": pct("Probability")})
+    with mc:
+        st.dataframe(pd.DataFrame(pred["maps"]).rename(columns={"Team 1 Map Win %": f"{team1} Map Win %"}),
+                     use_container_width=True, hide_index=True,
+                     column_config={"In Series %": pct("In Series %"), "Played %": pct("Played %"),
+                                    f"{team1} Map Win %": pct(f"{team1} Map Win %")})
+    st.caption("Most likely map orders: " + " · ".join(f"{s['Maps']} ({s['Probability']:.1f}%)" for s in pred["sequences"][:3])
+               + f" — {pred['sims']:,} simulated vetoes and series; map pool: {', '.join(pred['pool'])}")
+
+def render_veto_prediction():
+    import pandas as pd
+    c1, c2 = st.columns(2)
+    with c1: first = st.radio("Vetoes first", [team1, team2], horizontal=True, key="veto_first")
+    with c2: fmt = st.radio("Format", ["Bo3", "Bo5"], horizontal=True, key="veto_fmt")
+    second = team2 if first == team1 else team1
+    try:
+        veto = veto_prediction(first, second, fmt)
+    except ValueError as e:
+        st.caption(f"No veto prediction: {e}"); return
+    st.dataframe(pd.DataFrame(veto["steps"]), use_container_width=True, hide_index=True, column_config={
+        "Probability": st.column_config.ProgressColumn("Probability", format="%.0f%%", min_value=0, max_value=100)})
+    st.caption("Most likely full vetoes: " + " · ".join(f"{s['Veto']} ({s['Probability']:.1f}%)" for s in veto["sequences"])
+               + f" — learned from {veto_model().vetoes:,} vetoes (all data); each step shows its chance given the maps already gone")
+
+def render_h2h():
+    mx = h2h_matrix()
+    h2h = mx.matches(team1, team2)
     st.subheader(f"{team1} vs {team2}")
-    if not h2h_matches:
+    if team1 != team2:
+        with st.expander("🔮 Series Prediction", expanded=True):
+            render_prediction()
+        with st.expander("🗳️ Predicted Veto"):
+            render_veto_prediction()
+    if not h2h:
         st.info("No direct matches found between these two teams.")
     else:
-        h2stats, _ = get_team_stats(team1, h2h_matches)
-        t2hstats, _ = get_team_stats(team2, h2h_matches)
+        rec1, rec2 = mx.record(team1, team2), mx.record(team2, team1)
         cl, cm, cr = st.columns([1, 0.4, 1])
         with cl:
             st.markdown(f"<div class='team-header-left'><h3>{team1}</h3></div>", unsafe_allow_html=True)
-            st.metric("Series Wins", h2stats['series_wins'])
-            st.metric("Map Wins", h2stats['total_map_wins'])
-            pt1 = h2stats['pistol_wins'] + h2stats['pistol_losses']
-            if pt1 > 0:
-                st.metric("Pistol Wins", f"{h2stats['pistol_wins']}-{h2stats['pistol_losses']}",
-                           f"{calc_wr(h2stats['pistol_wins'], h2stats['pistol_losses']):.0f}%")
+            st.metric("Series Wins", rec1['series'][0])
+            st.metric("Map Wins", rec1['maps'][0])
+            if sum(rec1['pistols']) > 0:
+                st.metric("Pistol Wins", "%d-%d" % rec1['pistols'], f"{calc_wr(*rec1['pistols']):.0f}%")
         with cm:
             st.markdown("<div style='text-align:center; padding-top:40px'><h2 style='color:#475569'>VS</h2></div>", unsafe_allow_html=True)
         with cr:
             st.markdown(f"<div class='team-header-right'><h3>{team2}</h3></div>", unsafe_allow_html=True)
-            st.metric("Series Wins", t2hstats['series_wins'])
-            st.metric("Map Wins", t2hstats['total_map_wins'])
-            pt2 = t2hstats['pistol_wins'] + t2hstats['pistol_losses']
-            if pt2 > 0:
-                st.metric("Pistol Wins", f"{t2hstats['pistol_wins']}-{t2hstats['pistol_losses']}",
-                           f"{calc_wr(t2hstats['pistol_wins'], t2hstats['pistol_losses']):.0f}%")
+            st.metric("Series Wins", rec2['series'][0])
+            st.metric("Map Wins", rec2['maps'][0])
+            if sum(rec2['pistols']) > 0:
+                st.metric("Pistol Wins", "%d-%d" % rec2['pistols'], f"{calc_wr(*rec2['pistols']):.0f}%")
         st.markdown("---")
-        h2h_rows = []
-        for m in sorted(h2h_matches, key=lambda x: x.get("date") or "0000", reverse=True):
-            is_left = m["left"] == team1
-            lw = rw = 0; pills = []
-            for p in m.get("played", []):
-                ls_v, rs_v = safe_int(p.get("ls", 0)), safe_int(p.get("rs", 0))
-                if ls_v > rs_v: lw += 1
-                elif rs_v > ls_v: rw += 1
-                my_s = ls_v if is_left else rs_v
-                op_s = rs_v if is_left else ls_v
-                clr = "#ADDFB3" if my_s > op_s else "#c45c5c"
-                mn = clean_map_name(p.get('map', '?'))
-                pist = p.get("pistols", {})
-                if pist and isinstance(pist, dict):
-                    myp = safe_int(pist.get("left" if is_left else "right", 0))
-                    opp = safe_int(pist.get("right" if is_left else "left", 0))
-                    pills.append(f"<span class='map-pill' style='color:{clr}'>{mn} {my_s}-{op_s} (P:{myp}-{opp})</span>")
-                else:
-                    pills.append(f"<span class='map-pill' style='color:{clr}'>{mn} {my_s}-{op_s}</span>")
-            my_w = lw if is_left else rw; my_l = rw if is_left else lw
-            h2h_rows.append({"Date": m.get("date"), "Score": f"{my_w}-{my_l}", "Maps": " ".join(pills)})
-        st.write(pd.DataFrame(h2h_rows).to_html(escape=False, index=False), unsafe_allow_html=True)
+        render_history_table(store.aggregate(("match_history", team1, team2, FILTER_SIG),
+                                             lambda: MatchHistory(team1, h2h), persist=False),
+                             "h2h_hist", opponents=False)
+
+# ========== H2H MATRIX ==========
+def render_matrix():
+    import pandas as pd
+    mx = h2h_matrix()
+    if not mx.teams:
+        st.info("No matches for these filters."); return
+    c1, c2 = st.columns([1, 2])
+    with c1:
+        label = st.radio("Record", ["Series", "Maps", "Rounds"], horizontal=True, key="matrix_kind")
+    with c2:
+        top = st.slider("Teams (most active first)", 2, len(mx.teams), min(16, len(mx.teams)), key="matrix_top")
+    teams = mx.most_active(top)
+    pct, wins, losses = mx.win_pct(label.lower(), teams)
+    st.caption(f"Row team's {label.lower()} record against the column team (filtered matches)")
+    show_figure(tuple(teams), f"h2h_matrix_{label}", lambda: build_h2h_heatmap(teams, pct, wins, losses, f"{label} %"))
+    rows = mx.table(team1)
+    if rows:
+        st.markdown(f"**{team1} against every opponent**")
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True, column_config={
+            c: st.column_config.NumberColumn(c, format="%.1f%%") for c in ("Win %", "Map %", "Round %")})
 
 # ========== MAP DEEP DIVE ==========
-with tab_map:
+def render_map_deep_dive():
+    t1_stats, t2_stats = team_stats(team1), team_stats(team2)
     all_maps = sorted(set(list(t1_stats["maps"].keys()) + list(t2_stats["maps"].keys())))
+    if not all_maps:
+        st.info("Neither team played a map under these filters."); return
     selected_map = st.selectbox("Select Map", all_maps)
     if selected_map:
         col1, col2 = st.columns(2)
@@ -733,11 +837,11 @@ with tab_map:
                     st.markdown("".join([f"<span class='pill'>{k} ({v})</span>"
                                          for k, v in sorted(agents.items(), key=lambda x: x[1], reverse=True)[:5]]),
                                 unsafe_allow_html=True)
-                history = data.get("history", [])
-                if history:
+                # Newest first from the team's date-sorted history: only these five games are touched
+                recent_games = match_history(team_name).map_games(selected_map, 0, 5)
+                if recent_games:
                     with st.expander("Recent Comps", expanded=False):
-                        sorted_hist = sorted(history, key=lambda x: x.get('date') or '0000', reverse=True)
-                        for h in sorted_hist[:5]:
+                        for h in recent_games:
                             atk_r = h.get('atk', 0)
                             def_r = h.get('def', 0)
                             pw = h.get('pistol_w', 0)
@@ -753,41 +857,175 @@ with tab_map:
         render_map_card(col1, team1, t1_stats["maps"].get(selected_map, {}), "#ADDFB3", t1_stats)
         render_map_card(col2, team2, t2_stats["maps"].get(selected_map, {}), "#EEE1C6", t2_stats)
 
+        trends = {t: form_index().map_trend(t, selected_map) for t in (team1, team2)}
+        if any(trends.values()):
+            st.markdown(f"**{selected_map} win-rate trend** (rolling, last 5 games; all dates)")
+            show_figure((team1, team2), f"trend_{selected_map}",
+                        lambda: build_trend_figure(trends, {team1: "#ADDFB3", team2: "#EEE1C6"}))
+
+# ========== COMPS ==========
+def render_comps():
+    import pandas as pd
+    from datetime import date, timedelta
+    ci = comp_index()
+    if not len(ci):
+        st.info("No complete five-agent lineups in the data."); return
+    c1, c2, c3 = st.columns([1, 1, 1])
+    with c1:
+        map_choice = st.selectbox("Map", ["All maps"] + sorted(ci.maps), key="comp_map")
+    with c2:
+        scope = st.selectbox("Teams", ["Filtered league" if FILTER_SIG else "League", team1, team2], key="comp_scope")
+    with c3:
+        window = st.selectbox("Window", ["All dates", "Last 30 days", "Last 90 days"], key="comp_window",
+                              disabled=date_filter, help="The sidebar date range wins when it is on")
+    filters = {"map_name": None if map_choice == "All maps" else map_choice}
+    if scope in (team1, team2):
+        filters["teams"] = [scope]
+    if FILTER_SIG:
+        filters["rows"] = filter_rows
+    if window != "All dates" and not date_filter:
+        latest = max(m.date for m in matches_raw if m.date)
+        filters["since"] = (date.fromisoformat(latest) - timedelta(days=int(window.split()[1]))).isoformat()
+
+    st.subheader("Most Successful Comps")
+    min_games = st.number_input("Minimum games", 1, 50, 3, key="comp_min_games")
+    rows = ci.comp_stats(min_games=min_games, top=15, **filters)
+    if rows:
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True,
+                     column_config={"Win %": st.column_config.NumberColumn("Win %", format="%.1f%%")})
+    else:
+        st.info("No comp reaches the minimum number of games here.")
+
+    st.subheader("Agent Pick Rate by Map")
+    maps, agents, rates = ci.pick_rates(**{k: v for k, v in filters.items() if k != "map_name"})
+    sig = (scope, filters.get("since"))
+    show_figure(sig, "pick_rates", lambda: build_pick_rate_figure(maps, agents, rates))
+
+    st.subheader("Teams by Role Setup")
+    role_cols = st.columns(len(ROLES))
+    roles = {}
+    for col, r in zip(role_cols, ROLES):
+        with col:
+            roles[r] = st.number_input(f"Min {r}s", 0, 5, 2 if r == "Controller" else 0, key=f"comp_role_{r}")
+    role_rows = ci.teams_with_roles({r: k for r, k in roles.items() if k}, **filters)
+    if role_rows:
+        st.dataframe(pd.DataFrame(role_rows), use_container_width=True, hide_index=True,
+                     column_config={"Win %": st.column_config.NumberColumn("Win %", format="%.1f%%"),
+                                    "Share %": st.column_config.NumberColumn("Share %", format="%.0f%%",
+                                                                             help="Share of the team's maps with this setup")})
+    else:
+        st.info("No team fielded that setup.")
+
 # ========== COMPARISON ==========
-with tab_comp:
-    cl, cm, cr = st.columns([1, 0.2, 1])
-    with cl:
-        st.markdown(f"<h2 style='color:#E59E6D; text-align:center;'>{team1}</h2>", unsafe_allow_html=True)
-        st.metric("Series Win Rate", f"{calc_wr(t1_stats['series_wins'], t1_stats['series_losses']):.1f}%",
-                  f"{t1_stats['series_wins']}-{t1_stats['series_losses']}")
-        st.metric("Map Win Rate", f"{calc_wr(t1_stats['total_map_wins'], t1_stats['total_map_losses']):.1f}%",
-                  f"{t1_stats['total_map_wins']}-{t1_stats['total_map_losses']}")
-        st.metric("Pistol Win Rate", f"{calc_wr(t1_stats['pistol_wins'], t1_stats['pistol_losses']):.1f}%",
-                  f"{t1_stats['pistol_wins']}-{t1_stats['pistol_losses']}")
-    with cm:
-        st.markdown("<br><br><h3 style='text-align:center; color:#475569;'>VS</h3>", unsafe_allow_html=True)
-    with cr:
-        st.markdown(f"<h2 style='color:#EEE1C6; text-align:center;'>{team2}</h2>", unsafe_allow_html=True)
-        st.metric("Series Win Rate", f"{calc_wr(t2_stats['series_wins'], t2_stats['series_losses']):.1f}%",
-                  f"{t2_stats['series_wins']}-{t2_stats['series_losses']}")
-        st.metric("Map Win Rate", f"{calc_wr(t2_stats['total_map_wins'], t2_stats['total_map_losses']):.1f}%",
-                  f"{t2_stats['total_map_wins']}-{t2_stats['total_map_losses']}")
-        st.metric("Pistol Win Rate", f"{calc_wr(t2_stats['pistol_wins'], t2_stats['pistol_losses']):.1f}%",
-                  f"{t2_stats['pistol_wins']}-{t2_stats['pistol_losses']}")
-
-    st.markdown("<div class='legend-text'>Map Record (W-L) | Pistol Record</div>", unsafe_allow_html=True)
-    comp_data = []
-    for mn in sorted(set(list(t1_stats["maps"].keys()) + list(t2_stats["maps"].keys()))):
-        for t, d in [(team1, t1_stats["maps"].get(mn, {})), (team2, t2_stats["maps"].get(mn, {}))]:
-            pw_v, pl_v = d.get('pistol_wins', 0), d.get('pistol_losses', 0)
-            label = f"<b>{d.get('wins',0)}-{d.get('losses',0)}</b>"
-            if pw_v + pl_v > 0: label += f" (P:{pw_v}-{pl_v})"
-            comp_data.append({"Map": mn, "Team": t, "Win Rate": calc_wr(d.get("wins", 0), d.get("losses", 0)), "Label": label})
-    if comp_data:
-        fig = px.bar(pd.DataFrame(comp_data), x="Map", y="Win Rate", color="Team", barmode="group", text="Label",
-                     color_discrete_map={team1: '#E59E6D', team2: '#ADDFB3'})
-        fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                          font_color='#e8ecf1', yaxis=dict(range=[0, 130]),
-                          margin=dict(t=10, b=10), height=400)
-        fig.update_traces(textposition='outside')
-        st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+def comparison_rows(teams, stats, elo):
+    rows = []
+    for t in teams:
+        s = stats[t]
+        rows.append({"Team": t, "Elo": round(elo.rating(t)), "Series": f"{s['series_wins']}-{s['series_losses']}",
+                     "Win %": calc_wr(s['series_wins'], s['series_losses']),
+                     "Map %": calc_wr(s['total_map_wins'], s['total_map_losses']),
+                     "Pistol %": calc_wr(s['pistol_wins'], s['pistol_losses']),
+                     "Attack %": calc_wr(s['atk_rounds'], s['atk_rounds_lost']),
+                     "Defense %": calc_wr(s['def_rounds'], s['def_rounds_lost']),
+                     "Pick %": calc_wr(s['pick_wins'], s['pick_losses'])})
+    rows.sort(key=lambda r: r["Win %"], reverse=True)
+    return rows
+
+def render_comparison():
+    import pandas as pd
+    pair = list(dict.fromkeys([team1, team2]))
+    if "cmp_teams" not in st.session_state:
+        st.session_state["cmp_teams"] = pair
+    if region != "All Regions":
+        league, league_label = region_filtered_teams, f"All {region} teams"
+    else:
+        league = engine.most_active(filter_rows, 12)
+        league_label = "12 most active teams"
+    def pick(teams): st.session_state["cmp_teams"] = teams
+    b1, b2, _ = st.columns([1, 1, 2])
+    with b1: st.button("Team 1 vs Team 2", on_click=pick, args=(pair,), key="cmp_pair")
+    with b2: st.button(league_label, on_click=pick, args=(league,), key="cmp_league")
+    teams = st.multiselect("Teams to compare", all_teams, key="cmp_teams")
+    if not teams:
+        st.info("Pick at least one team."); return
+    stats = teams_stats(teams)
+    elo = elo_ratings()
+    colors = {t: COMPARE_COLORS[i % len(COMPARE_COLORS)] for i, t in enumerate(teams)}
+
+    if len(teams) == 2:
+        cl, cm, cr = st.columns([1, 0.2, 1])
+        for col, t, color in ((cl, teams[0], '#E59E6D'), (cr, teams[1], '#EEE1C6')):
+            s = stats[t]
+            with col:
+                st.markdown(f"<h2 style='color:{color}; text-align:center;'>{t}</h2>", unsafe_allow_html=True)
+                st.metric("Elo", f"{elo.rating(t):.0f}", f"{elo.change(t):+.0f} last 10")
+                st.metric("Series Win Rate", f"{calc_wr(s['series_wins'], s['series_losses']):.1f}%",
+                          f"{s['series_wins']}-{s['series_losses']}")
+                st.metric("Map Win Rate", f"{calc_wr(s['total_map_wins'], s['total_map_losses']):.1f}%",
+                          f"{s['total_map_wins']}-{s['total_map_losses']}")
+                st.metric("Pistol Win Rate", f"{calc_wr(s['pistol_wins'], s['pistol_losses']):.1f}%",
+                          f"{s['pistol_wins']}-{s['pistol_losses']}")
+        with cm:
+            st.markdown("<br><br><h3 style='text-align:center; color:#475569;'>VS</h3>", unsafe_allow_html=True)
+    else:
+        pct = {c: st.column_config.ProgressColumn(c, format="%.1f%%", min_value=0, max_value=100)
+               for c in ("Win %", "Map %", "Pistol %", "Attack %", "Defense %", "Pick %")}
+        st.dataframe(pd.DataFrame(comparison_rows(teams, stats, elo)), use_container_width=True, hide_index=True,
+                     column_config=pct)
+
+    if any(stats[t]["maps"] for t in teams):
+        st.markdown("<div class='legend-text'>Map Record (W-L) | Pistol Record</div>" if len(teams) <= 4
+                    else "<div class='legend-text'>Map win rate (W-L)</div>", unsafe_allow_html=True)
+        show_figure(tuple(teams), "comparison", lambda: build_comparison_figure(teams, stats, colors))
+
+    trajectories = {t: elo.trajectory(t) for t in teams}
+    if any(trajectories.values()):
+        st.markdown("**Elo trajectory** (all dates)")
+        show_figure(tuple(teams), "elo_trajectory", lambda: build_elo_figure(trajectories, colors))
+
+# =============================================
+# VIEW ROUTING — only the selected tab runs
+# =============================================
+VIEWS = [
+    ("🏠 Home", render_home),
+    ("🏆 Leaderboard", render_leaderboard),
+    ("📊 Overview", render_overview),
+    ("📜 History", render_history),
+    ("⚔️ Head-to-Head", render_h2h),
+    ("🧮 H2H Matrix", render_matrix),
+    ("🗺️ Map Deep Dive", render_map_deep_dive),
+    ("🧩 Comps", render_comps),
+    ("📈 Comparison", render_comparison),
+]
+
+def view_tabs(labels):
+    # on_change="rerun" tracks the selected tab so unselected ones can be skipped;
+    # older Streamlit builds lack it and fall back to rendering every tab.
+    try:
+        return st.tabs(labels, key="active_view", on_change="rerun")
+    except TypeError:
+        return st.tabs(labels)
+
+for tab, (_, render) in zip(view_tabs([label for label, _ in VIEWS]), VIEWS):
+    with tab:
+        if getattr(tab, "open", True):
+            with prof.section(render.__name__, cache=None):
+                render()
+
+# =============================================
+# PROFILING PANEL
+# =============================================
+prof.finish()
+if prof.enabled:
+    with st.sidebar.expander("⏱️ Rerun timings", expanded=True):
+        st.caption("This rerun (nested sections are included in their parent)")
+        st.dataframe([{"Section": r["section"], "ms": round(r["ms"], 1), "Team": r.get("team") or "",
+                       "Cache": r.get("cache") or ""} for r in prof.records],
+                     use_container_width=True, hide_index=True)
+        st.caption("Rolling across sessions")
+        st.dataframe([{"Section": r["section"], "n": r["n"], "p50 ms": round(r["p50_ms"], 1),
+                       "p95 ms": round(r["p95_ms"], 1)} for r in prof.shared.summary()],
+                     use_container_width=True, hide_index=True)
+        store_info = store.stats()
+        st.caption(f"Store: {store_info['entries']} entries · {store_info['used_mb']:.1f} MB · "
+                   f"log: {prof.shared.log_path}")
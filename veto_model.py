@@ -0,0 +1,128 @@
+# veto_model.py
+# Probabilistic map veto model built from every scraped veto sequence.
+# Each ban/pick is recorded under a slot (the team's 1st ban, 1st pick, 2nd
+# ban, ...) together with the maps still available at that moment, so a map
+# that was already removed never counts against it. The chance that a team
+# takes a map is its "taken when available" rate, backed off from the exact
+# opponent to the team to everyone, and renormalised over the maps left.
+# The tables are plain JSON (build_data_json.py --precompute writes them to
+# stats.json); predicting a veto is a handful of dict lookups per step.
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Veto steps after the coin flip: (action, 0 = team that vetoes first / 1 = the other team)
+VETO = {
+    "Bo3": (("ban", 0), ("ban", 1), ("pick", 0), ("pick", 1), ("ban", 0), ("ban", 1)),
+    "Bo5": (("ban", 0), ("ban", 1), ("pick", 0), ("pick", 1), ("pick", 0), ("pick", 1)),
+}
+TEAM_PRIOR = 3.0   # pseudo-observations pulling a team's rates towards everyone's
+PAIR_PRIOR = 3.0   # ... and a matchup's rates towards the team's
+BEAM = 16
+
+Table = Dict[str, Dict[str, List[int]]]   # slot -> map -> [times taken, times available]
+
+
+def _count(table: Table, slot: str, remaining: Iterable[str], taken: str) -> None:
+    by_map = table.setdefault(slot, {})
+    for mp in remaining:
+        c = by_map.setdefault(mp, [0, 0])
+        c[1] += 1
+        if mp == taken:
+            c[0] += 1
+
+
+def _rate(table: Table, slot: str, mp: str, prior_rate: float, strength: float) -> float:
+    taken, avail = table.get(slot, {}).get(mp, (0, 0))
+    return (taken + strength * prior_rate) / (avail + strength)
+
+
+class VetoModel:
+    """Slot-by-slot ban/pick counts for everyone, per team and per (team, opponent)"""
+
+    def __init__(self, matches: Iterable = ()):
+        self.everyone: Table = {}
+        self.teams: Dict[str, Table] = {}
+        self.pairs: Dict[str, Dict[str, Table]] = {}
+        self.vetoes = 0
+        self.add(matches)
+
+    def add(self, matches: Iterable) -> None:
+        for m in matches:
+            events = sorted((e for e in m.veto if e.map), key=lambda e: e.order or 0)
+            if not events or not (m.left and m.right):
+                continue
+            remaining = {e.map for e in events}
+            if m.decider:
+                remaining.add(m.decider)
+            seen: Dict[Tuple[str, str], int] = {}
+            for e in events:
+                if e.type not in ("ban", "pick") or e.team not in (m.left, m.right):
+                    remaining.discard(e.map)
+                    continue
+                n = seen[e.team, e.type] = seen.get((e.team, e.type), 0) + 1
+                slot = f"{e.type}{n}"
+                opp = m.right if e.team == m.left else m.left
+                _count(self.everyone, slot, remaining, e.map)
+                _count(self.teams.setdefault(e.team, {}), slot, remaining, e.map)
+                _count(self.pairs.setdefault(e.team, {}).setdefault(opp, {}), slot, remaining, e.map)
+                remaining.discard(e.map)
+            self.vetoes += 1
+
+    def to_dict(self) -> dict:
+        return {"vetoes": self.vetoes, "everyone": self.everyone, "teams": self.teams, "pairs": self.pairs}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "VetoModel":
+        model = cls()
+        model.vetoes = d.get("vetoes", 0)
+        model.everyone, model.teams, model.pairs = d["everyone"], d["teams"], d["pairs"]
+        return model
+
+    def choice_probs(self, team: str, opp: str, slot: str, remaining: Sequence[str]) -> Dict[str, float]:
+        """P(team takes each remaining map at this slot against opp)"""
+        team_t = self.teams.get(team, {})
+        pair_t = self.pairs.get(team, {}).get(opp, {})
+        weights = {}
+        for mp in remaining:
+            p_all = _rate(self.everyone, slot, mp, 1 / len(remaining), 1.0)
+            p_team = _rate(team_t, slot, mp, p_all, TEAM_PRIOR)
+            weights[mp] = _rate(pair_t, slot, mp, p_team, PAIR_PRIOR)
+        total = sum(weights.values())
+        return {mp: w / total for mp, w in weights.items()}
+
+    def predict(self, first: str, second: str, pool: Sequence[str], fmt: str = "Bo3", top: int = 3) -> dict:
+        """Most likely veto orders when `first` vetoes first (beam search over the step probabilities)"""
+        steps = VETO[fmt]
+        if len(pool) < len(steps) + 1:
+            raise ValueError(f"{fmt} veto needs {len(steps) + 1} maps, pool has {len(pool)}")
+        teams = (first, second)
+        slots = []
+        used: Dict[Tuple[int, str], int] = {}
+        for action, who in steps:
+            n = used[who, action] = used.get((who, action), 0) + 1
+            slots.append((who, action, f"{action}{n}"))
+
+        beam = [(1.0, ())]    # (probability, maps taken so far)
+        step_probs = {}       # maps taken so far -> choice probabilities at the next step
+        for who, _, slot in slots:
+            grown = []
+            for prob, taken in beam:
+                remaining = [mp for mp in pool if mp not in taken]
+                probs = step_probs[taken] = self.choice_probs(teams[who], teams[1 - who], slot, remaining)
+                grown.extend((prob * p, taken + (mp,)) for mp, p in probs.items())
+            grown.sort(key=lambda x: -x[0])
+            beam = grown[:BEAM]
+
+        best = beam[0][1]
+        rows = []
+        for i, (who, action, _) in enumerate(slots):
+            probs = step_probs[best[:i]]
+            alts = sorted(probs.items(), key=lambda x: -x[1])
+            rows.append({"Step": i + 1, "Team": teams[who], "Action": action.title(), "Map": best[i],
+                         "Probability": probs[best[i]] * 100,
+                         "Alternatives": ", ".join(f"{mp} {p * 100:.0f}%" for mp, p in alts[:4] if mp != best[i])})
+        deciders = [mp for mp in pool if mp not in best]
+        rows.append({"Step": len(slots) + 1, "Team": "—", "Action": "Decider", "Map": " / ".join(deciders),
+                     "Probability": 100 / len(deciders), "Alternatives": ""})
+        sequences = [{"Veto": " → ".join(taken), "Probability": prob * 100} for prob, taken in beam[:top]]
+        return {"first": first, "format": fmt, "steps": rows, "sequences": sequences}
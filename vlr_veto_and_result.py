@@ -4,7 +4,6 @@ import os
 import re
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
-from playwright.sync_api import sync_playwright
 import time
 
 DEBUG = True
@@ -536,6 +535,8 @@ def fetch_played_via_pills(pg, match_date, left_team, right_team):
     return out
 
 def run_one(match_id: int, output_dir: str, headless: bool) -> None:
+    # Imported here so the name tables above can be used without playwright installed
+    from playwright.sync_api import sync_playwright
     url = f"{VLR_BASE}/{match_id}"
     with sync_playwright() as p:
         print(f"\n[Scraping match {match_id}...]")
@@ -601,14 +602,23 @@ def run_one(match_id: int, output_dir: str, headless: bool) -> None:
         print(f"✓ Saved to {output_dir}/match_{match_id}_veto.json")
         br.close()
 
+def read_ids_file(path: str) -> List[int]:
+    """Match IDs, one per line; blank lines and # comments are skipped (consistency.py writes this format)"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [int(line.split("#", 1)[0]) for line in f if line.split("#", 1)[0].strip()]
+
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("match_ids", nargs="+", type=int)
+    ap.add_argument("match_ids", nargs="*", type=int)
+    ap.add_argument("--ids-file", help="Also scrape the match IDs listed in this file (e.g. rescrape.txt)")
     ap.add_argument("--output", default="./data")
     ap.add_argument("--no-headless", action="store_true")
     args = ap.parse_args()
+    match_ids = list(dict.fromkeys(args.match_ids + (read_ids_file(args.ids_file) if args.ids_file else [])))
+    if not match_ids:
+        ap.error("give match IDs and/or --ids-file")
     os.makedirs(args.output, exist_ok=True)
-    for mid in args.match_ids:
+    for mid in match_ids:
         run_one(mid, args.output, not args.no_headless)
 
 if __name__ == "__main__":